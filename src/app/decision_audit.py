@@ -0,0 +1,650 @@
+import argparse
+import bisect
+import fcntl
+import json
+import logging
+import os
+import random
+import resource
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import polars as pl
+import pyarrow.parquet as pq
+
+from app.decision_cache import input_data_hash
+from decisioning.classes.RulePlan import RulePlan
+from decisioning.modules.complete import module_outcome_column
+
+
+logger = logging.getLogger(__name__)
+
+# Columns of every audit file. Module and rule outcomes and the application
+# facts are JSON text, so files written under different rule sets share a schema.
+AUDIT_SCHEMA: dict[str, pl.DataType] = {
+    "applicationId": pl.String,
+    "decisionId": pl.String,
+    "decidedAt": pl.Datetime("us", "UTC"),
+    "inputDataHash": pl.String,
+    "finalDecision": pl.String,
+    "decisionStage": pl.String,
+    "primaryReasonCode": pl.String,
+    "secondaryReasonCodes": pl.List(pl.String),
+    "policyRuleIdsTriggered": pl.List(pl.String),
+    "ruleVersionsUsed": pl.List(pl.String),
+    "modelVersionsUsed": pl.List(pl.String),
+    "moduleOutcomes": pl.String,
+    "ruleOutcomes": pl.String,
+    "facts": pl.String,
+}
+JSON_COLUMNS: tuple[str, ...] = ("moduleOutcomes", "ruleOutcomes", "facts")
+
+# Hive-style partition directory: <root>/decisionDate=2026-01-31/part-....parquet
+PARTITION_COLUMN = "decisionDate"
+# A lookup decodes one whole row group; smaller groups read faster but compress worse.
+ROW_GROUP_SIZE = 4_096
+# Open file readers kept, with their parsed footers, for point lookups.
+MAX_OPEN_READERS = 256
+
+_HASH_SEED = 0x5EED
+# A location packs a file id and a row number: file_id * 2**32 + row.
+_ROW_BITS = 2**32
+_INDEX_SCHEMA = {"key": pl.UInt64, "location": pl.UInt64}
+
+
+def _hash_keys(values: pl.Series) -> pl.Series:
+    return values.cast(pl.String).hash(seed=_HASH_SEED)
+
+
+class DecisionIndex:
+    """
+    Compact hash index from a key column to row locations in audit files.
+
+    Entries are 16 bytes: the key's 64-bit hash and its packed location, kept
+    sorted by hash and binary searched. New files are merged into a small
+    sorted tier, which is merged into the main tier once it passes
+    ``merge_rows``, so appending a file costs a linear merge of the small tier
+    rather than a sort of everything. Hash collisions are possible, so callers
+    compare the key of the rows found. The tiers are replaced together, so
+    lookups never see a half update.
+    """
+
+    def __init__(self, merge_rows: int = 1_000_000):
+        self.merge_rows = merge_rows
+        empty = pl.DataFrame(schema=_INDEX_SCHEMA)
+        # (main, recent), both sorted by key
+        self._tiers: tuple[pl.DataFrame, pl.DataFrame] = (empty, empty)
+
+    def __len__(self) -> int:
+        main, recent = self._tiers
+        return main.height + recent.height
+
+    def add(self, files: list[tuple[pl.Series, int]]) -> None:
+        """Index each ``(keys, file_id)`` as rows 0..n-1 of file ``file_id``."""
+        if not files:
+            return
+        entries = pl.concat(
+            [
+                pl.DataFrame(
+                    {
+                        "key": _hash_keys(keys),
+                        "location": pl.int_range(0, len(keys), eager=True, dtype=pl.UInt64)
+                        + file_id * _ROW_BITS,
+                    }
+                )
+                for keys, file_id in files
+            ]
+        ).sort("key")
+        main, recent = self._tiers
+        recent = recent.merge_sorted(entries, "key")
+        if recent.height > self.merge_rows:
+            main, recent = main.merge_sorted(recent, "key"), recent.clear()
+        self._tiers = (main, recent)
+
+    def drop_files(self, file_ids: list[int]) -> None:
+        if not file_ids:
+            return
+        kept = ~(pl.col("location") // _ROW_BITS).is_in(file_ids)
+        self._tiers = tuple(tier.filter(kept) for tier in self._tiers)
+
+    def find(self, key: str) -> list[int]:
+        """Locations whose key hashes like ``key``."""
+        key_hash = _hash_keys(pl.Series([key]))[0]
+        locations = []
+        for tier in self._tiers:
+            hashes = tier["key"]
+            start = hashes.search_sorted(key_hash, "left")
+            end = hashes.search_sorted(key_hash, "right")
+            locations += tier["location"][start:end].to_list()
+        return locations
+
+
+def _decision_row(
+    application: dict, decision: dict, plans: dict[str, RulePlan], decided_at: datetime
+) -> dict:
+    rule_ids = [rule_id for plan in plans.values() for rule_id in plan.rule_ids]
+    module_columns = [module_outcome_column(module) for module in plans]
+    return {
+        "applicationId": str(application.get("applicationId") or ""),
+        "decisionId": decision.get("decisionId") or uuid.uuid4().hex,
+        "decidedAt": decided_at,
+        "inputDataHash": decision.get("inputDataHash") or input_data_hash(application),
+        "finalDecision": decision.get("finalDecision"),
+        "decisionStage": decision.get("decisionStage"),
+        "primaryReasonCode": decision.get("primaryReasonCode"),
+        "secondaryReasonCodes": list(decision.get("secondaryReasonCodes") or []),
+        "policyRuleIdsTriggered": list(decision.get("policyRuleIdsTriggered") or []),
+        "ruleVersionsUsed": list(decision.get("ruleVersionsUsed") or []),
+        "modelVersionsUsed": list(decision.get("modelVersionsUsed") or []),
+        "moduleOutcomes": json.dumps({col: decision.get(col) for col in module_columns}),
+        "ruleOutcomes": json.dumps({rule_id: decision.get(rule_id) for rule_id in rule_ids}),
+        "facts": json.dumps(application, sort_keys=True, default=str),
+    }
+
+
+def _api_record(row: dict) -> dict:
+    """An audit row as returned by the API: JSON columns decoded, time as ISO text."""
+    record = {col: row[col] for col in AUDIT_SCHEMA if col not in JSON_COLUMNS}
+    record["decidedAt"] = row["decidedAt"].isoformat()
+    for col in JSON_COLUMNS:
+        record[col] = json.loads(row[col]) if row[col] else None
+    return record
+
+
+class DecisionAuditStore:
+    """
+    Append-only audit log of decisions in date-partitioned Parquet files.
+
+    Decisions are buffered and written in batches by a background thread,
+    once ``batch_size`` rows are waiting or every ``flush_interval_s``
+    seconds. Each file is written under a temporary name and renamed, so
+    readers only ever see complete files. Hash indexes on applicationId and
+    decisionId resolve a point lookup to a row of one file; buffered rows are
+    served from memory. Files written by other processes are picked up on a
+    lookup miss. ``compact`` merges a partition's small files into files of
+    up to ``compact_target_rows`` rows.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        plans: dict[str, RulePlan],
+        batch_size: int = 1_000,
+        flush_interval_s: float = 1.0,
+        compact_target_rows: int = 1_000_000,
+        refresh_interval_s: float = 1.0,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.plans = plans
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.compact_target_rows = compact_target_rows
+        self.refresh_interval_s = refresh_interval_s
+
+        self._files: dict[int, Path] = {}
+        self._file_ids: dict[Path, int] = {}
+        self._file_rows: dict[int, int] = {}
+        self._next_file_id = 0
+        self._application_index = DecisionIndex()
+        self._decision_index = DecisionIndex()
+        # file id -> (reader, first row of each row group)
+        self._readers: OrderedDict[int, tuple[pq.ParquetFile, list[int]]] = OrderedDict()
+        self._readers_lock = threading.Lock()
+        # Serializes changes to the files and indexes.
+        self._write_lock = threading.Lock()
+
+        self._buffer: list[dict] = []
+        # Buffered rows by applicationId (latest) and decisionId, until indexed.
+        self._pending_applications: dict[str, dict] = {}
+        self._pending_decisions: dict[str, dict] = {}
+        self._buffer_lock = threading.Lock()
+        self._next_refresh = 0.0
+
+        self._rows_written = 0
+        self._files_written = 0
+        self._write_ms_total = 0.0
+        self._lookups = 0
+        self._lookup_ms_total = 0.0
+        self._compactions = 0
+        self._failed_flushes = 0
+
+        started = time.perf_counter()
+        self.refresh()
+        logger.info(
+            "Decision audit store opened root=%s files=%d rows=%d index_ms=%.1f",
+            self.root,
+            len(self._files),
+            len(self._application_index),
+            (time.perf_counter() - started) * 1000,
+        )
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="audit-flush", daemon=True)
+        self._flusher.start()
+
+    # Writing
+
+    def record(self, application: dict, decision: dict) -> str:
+        """
+        Queue a decision for the audit log.
+        Args:
+            application (dict): Application fields the decision was made on.
+            decision (dict): Decision object returned to the caller.
+        Returns:
+            str: The decisionId the decision is recorded under.
+        """
+        row = _decision_row(application, decision, self.plans, datetime.now(timezone.utc))
+        with self._buffer_lock:
+            self._buffer.append(row)
+            self._pending_applications[row["applicationId"]] = row
+            self._pending_decisions[row["decisionId"]] = row
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+        return row["decisionId"]
+
+    def _flush_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                self._failed_flushes += 1
+                logger.exception("Decision audit flush failed; rows stay buffered")
+
+    def flush(self) -> int:
+        """Write every buffered decision now. Returns the number of rows written."""
+        with self._buffer_lock:
+            rows = self._buffer
+            self._buffer = []
+        if not rows:
+            return 0
+        try:
+            self.append_frame(pl.DataFrame(rows, schema=AUDIT_SCHEMA))
+        except Exception:
+            with self._buffer_lock:
+                self._buffer = rows + self._buffer
+            raise
+        with self._buffer_lock:
+            for row in rows:
+                if self._pending_applications.get(row["applicationId"]) is row:
+                    del self._pending_applications[row["applicationId"]]
+                self._pending_decisions.pop(row["decisionId"], None)
+        return len(rows)
+
+    def _new_path(self, partition: str, prefix: str) -> Path:
+        directory = self.root / f"{PARTITION_COLUMN}={partition}"
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / f"{prefix}-{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.parquet"
+
+    def _write_file(self, frame: pl.DataFrame, path: Path) -> None:
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        frame.write_parquet(tmp_path, row_group_size=ROW_GROUP_SIZE, statistics=True)
+        tmp_path.replace(path)
+
+    def _index_files(self, files: list[tuple[Path, pl.DataFrame]]) -> None:
+        """Register each ``(path, key columns)`` under a new file id and index its keys."""
+        indexed = []
+        for path, keys in files:
+            file_id = self._next_file_id
+            self._next_file_id += 1
+            self._files[file_id] = path
+            self._file_ids[path] = file_id
+            self._file_rows[file_id] = keys.height
+            indexed.append((keys, file_id))
+        self._application_index.add([(keys["applicationId"], file_id) for keys, file_id in indexed])
+        self._decision_index.add([(keys["decisionId"], file_id) for keys, file_id in indexed])
+
+    def append_frame(self, frame: pl.DataFrame) -> None:
+        """
+        Write a frame of audit rows (AUDIT_SCHEMA columns) as one file per decision date.
+        Args:
+            frame (pl.DataFrame): Rows to append.
+        """
+        started = time.perf_counter()
+        frame = frame.select(list(AUDIT_SCHEMA)).with_columns(
+            pl.col("decidedAt").dt.date().cast(pl.String).alias(PARTITION_COLUMN)
+        )
+        with self._write_lock:
+            for (partition,), part in frame.group_by(PARTITION_COLUMN, maintain_order=True):
+                part = part.drop(PARTITION_COLUMN)
+                path = self._new_path(partition, "part")
+                self._write_file(part, path)
+                self._index_files([(path, part.select("applicationId", "decisionId"))])
+                self._files_written += 1
+        self._rows_written += frame.height
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._write_ms_total += elapsed_ms
+        logger.debug("Decision audit rows written rows=%d write_ms=%.1f", frame.height, elapsed_ms)
+
+    # Reading
+
+    def refresh(self) -> None:
+        """Index audit files written by other processes and forget deleted ones."""
+        with self._write_lock:
+            on_disk = set(self.root.glob(f"{PARTITION_COLUMN}=*/*.parquet"))
+            gone = [file_id for path, file_id in self._file_ids.items() if path not in on_disk]
+            self._forget_files(gone)
+            self._index_files(
+                [
+                    (path, pl.read_parquet(path, columns=["applicationId", "decisionId"]))
+                    for path in sorted(on_disk - set(self._file_ids))
+                ]
+            )
+
+    def _reader(self, file_id: int) -> tuple[pq.ParquetFile, list[int]]:
+        with self._readers_lock:
+            reader = self._readers.get(file_id)
+            if reader is not None:
+                self._readers.move_to_end(file_id)
+                return reader
+        path = self._files.get(file_id)
+        if path is None:
+            raise FileNotFoundError(f"audit file id {file_id} was compacted")
+        parquet_file = pq.ParquetFile(path)
+        metadata = parquet_file.metadata
+        group_starts = [0]
+        for group in range(metadata.num_row_groups - 1):
+            group_starts.append(group_starts[-1] + metadata.row_group(group).num_rows)
+        reader = (parquet_file, group_starts)
+        with self._readers_lock:
+            self._readers[file_id] = reader
+            while len(self._readers) > MAX_OPEN_READERS:
+                self._readers.popitem(last=False)
+        return reader
+
+    def _forget_files(self, file_ids: list[int]) -> None:
+        for file_id in file_ids:
+            del self._file_ids[self._files.pop(file_id)]
+            del self._file_rows[file_id]
+            with self._readers_lock:
+                self._readers.pop(file_id, None)
+        self._application_index.drop_files(file_ids)
+        self._decision_index.drop_files(file_ids)
+
+    def _read_rows(self, locations: list[int]) -> list[dict]:
+        rows = []
+        for location in locations:
+            row = location % _ROW_BITS
+            parquet_file, group_starts = self._reader(location // _ROW_BITS)
+            group = bisect.bisect_right(group_starts, row) - 1
+            table = parquet_file.read_row_group(group)
+            rows += table.slice(row - group_starts[group], 1).to_pylist()
+        return rows
+
+    def _find(self, index: DecisionIndex, column: str, key: str) -> dict | None:
+        try:
+            rows = self._read_rows(index.find(key))
+        except OSError:
+            # A compaction replaced the file between the index lookup and the read.
+            self.refresh()
+            rows = self._read_rows(index.find(key))
+        rows = [row for row in rows if row[column] == key]
+        return max(rows, key=lambda row: row["decidedAt"]) if rows else None
+
+    def get(self, application_id: str | None = None, decision_id: str | None = None) -> dict | None:
+        """
+        Stored decision for a decisionId, or the latest one for an applicationId.
+        Args:
+            application_id (str | None): Application to look up.
+            decision_id (str | None): Decision to look up; takes precedence.
+        Returns:
+            dict | None: Audit record with decoded module/rule outcomes and facts.
+        """
+        started = time.perf_counter()
+        if decision_id is not None:
+            pending, index, column, key = (
+                self._pending_decisions, self._decision_index, "decisionId", decision_id
+            )
+        else:
+            pending, index, column, key = (
+                self._pending_applications, self._application_index, "applicationId",
+                application_id,
+            )
+        row = pending.get(key)
+        if row is None:
+            row = self._find(index, column, key)
+        if row is None and time.monotonic() >= self._next_refresh:
+            self._next_refresh = time.monotonic() + self.refresh_interval_s
+            self.refresh()
+            row = self._find(index, column, key)
+        self._lookups += 1
+        self._lookup_ms_total += (time.perf_counter() - started) * 1000
+        return _api_record(row) if row is not None else None
+
+    # Maintenance
+
+    def _compaction_groups(self) -> list[tuple[list[Path], list[int]]]:
+        """Runs of two or more small files of one partition, together within the target size."""
+        with self._write_lock:
+            by_partition: dict[Path, list[int]] = {}
+            for file_id in sorted(self._files):
+                if self._file_rows[file_id] < self.compact_target_rows:
+                    by_partition.setdefault(self._files[file_id].parent, []).append(file_id)
+            runs = []
+            for file_ids in by_partition.values():
+                run, run_rows = [], 0
+                for file_id in file_ids:
+                    if run and run_rows + self._file_rows[file_id] > self.compact_target_rows:
+                        runs.append(run)
+                        run, run_rows = [], 0
+                    run.append(file_id)
+                    run_rows += self._file_rows[file_id]
+                runs.append(run)
+            return [
+                ([self._files[file_id] for file_id in run], run) for run in runs if len(run) > 1
+            ]
+
+    def compact(self) -> dict:
+        """
+        Merge each partition's small files, oldest first, into files of up to
+        ``compact_target_rows`` rows. Only one process compacts a store at a
+        time; others skip.
+        Returns:
+            dict: Groups merged, files merged and written, and duration.
+        """
+        started = time.perf_counter()
+        stats = {"groups": 0, "filesMerged": 0, "filesWritten": 0, "skipped": False}
+        lock_file = (self.root / ".compact.lock").open("w")
+        try:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                stats["skipped"] = True
+                return stats
+            self.refresh()
+            for paths, file_ids in self._compaction_groups():
+                path = self._new_path(paths[0].parent.name.split("=", 1)[1], "compact")
+                tmp_path = path.with_name(f".{path.name}.tmp")
+                # Streamed, so a group never has to fit in memory at once.
+                pl.scan_parquet(paths).sink_parquet(tmp_path, row_group_size=ROW_GROUP_SIZE)
+                tmp_path.replace(path)
+                keys = pl.read_parquet(path, columns=["applicationId", "decisionId"])
+                with self._write_lock:
+                    self._index_files([(path, keys)])
+                    self._forget_files(file_ids)
+                for old_path in paths:
+                    old_path.unlink(missing_ok=True)
+                stats["groups"] += 1
+                stats["filesMerged"] += len(paths)
+                stats["filesWritten"] += 1
+        finally:
+            lock_file.close()
+        self._compactions += 1
+        stats["elapsedMs"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info("Decision audit compaction done %s", stats)
+        return stats
+
+    def metrics(self) -> dict:
+        return {
+            "root": str(self.root),
+            "files": len(self._files),
+            "indexedRows": len(self._application_index),
+            "bufferedRows": len(self._buffer),
+            "rowsWritten": self._rows_written,
+            "filesWritten": self._files_written,
+            "failedFlushes": self._failed_flushes,
+            "meanWriteMsPerRow": (
+                round(self._write_ms_total / self._rows_written, 4) if self._rows_written else None
+            ),
+            "lookups": self._lookups,
+            "meanLookupMs": (
+                round(self._lookup_ms_total / self._lookups, 3) if self._lookups else None
+            ),
+            "compactions": self._compactions,
+        }
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+
+
+def synthetic_audit_frame(start: int, rows: int, days: int = 7) -> pl.DataFrame:
+    """``rows`` audit rows for applications APP_<start>..., spread over ``days`` dates."""
+    n = pl.col("n")
+    declined = n % 5 == 0
+    return pl.DataFrame({"n": pl.int_range(start, start + rows, eager=True)}).select(
+        applicationId="APP_" + n.cast(pl.String),
+        decisionId="DEC_" + n.cast(pl.String),
+        decidedAt=pl.lit(datetime(2026, 1, 1, tzinfo=timezone.utc)).dt.cast_time_unit("us")
+        + pl.duration(days=n % days, microseconds=n),
+        inputDataHash=n.hash(seed=_HASH_SEED).cast(pl.String).str.pad_start(64, "0"),
+        finalDecision=pl.when(declined).then(pl.lit("DECLINED")).otherwise(pl.lit("APPROVED")),
+        decisionStage=pl.when(declined).then(pl.lit("eligibility")).otherwise(pl.lit("decision")),
+        primaryReasonCode=pl.when(declined).then(pl.lit("D1001")),
+        secondaryReasonCodes=pl.lit([], dtype=pl.List(pl.String)),
+        policyRuleIdsTriggered=pl.when(declined)
+        .then(pl.lit(["D1001"], dtype=pl.List(pl.String)))
+        .otherwise(pl.lit([], dtype=pl.List(pl.String))),
+        ruleVersionsUsed=pl.lit(["eligibility@2026-01-01"], dtype=pl.List(pl.String)),
+        modelVersionsUsed=pl.lit(["pd_model@v1.8", "scorecard@v3.2"], dtype=pl.List(pl.String)),
+        moduleOutcomes=pl.lit('{"eligibilityOutcome": true}'),
+        ruleOutcomes=pl.when(declined)
+        .then(pl.lit('{"D1001": false}'))
+        .otherwise(pl.lit('{"D1001": true}')),
+        facts='{"applicantAge": ' + (18 + n % 60).cast(pl.String) + "}",
+    )
+
+
+def _percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return round(values[min(int(q * len(values)), len(values) - 1)], 3)
+
+
+def benchmark_audit_store(
+    rows: int, batch_rows: int = 100_000, lookups: int = 1_000, root: str | Path | None = None
+) -> dict:
+    """
+    Write ``rows`` synthetic decisions in batches of ``batch_rows``, reopen the
+    store (cold index build), time random point lookups by applicationId and
+    decisionId, compact, and time the lookups again.
+    Args:
+        rows (int): Decisions to write.
+        batch_rows (int): Rows per written batch, i.e. per file and date before compaction.
+        lookups (int): Point lookups per key and phase.
+        root (str | Path | None): Store directory; a temporary one by default.
+    Returns:
+        dict: Write throughput, index build time and size, lookup latency percentiles,
+            compaction time and file counts.
+    """
+    from decisioning.modules.complete import module_plans
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(root or tmp)
+        plans = module_plans()
+        store = DecisionAuditStore(root, plans)
+        started = time.perf_counter()
+        for start in range(0, rows, batch_rows):
+            store.append_frame(synthetic_audit_frame(start, min(batch_rows, rows - start)))
+        write_s = time.perf_counter() - started
+        files_written = store.metrics()["files"]
+        store.close()
+
+        started = time.perf_counter()
+        store = DecisionAuditStore(root, plans)
+        open_ms = (time.perf_counter() - started) * 1000
+        rng = random.Random(7)
+
+        def time_lookups() -> dict:
+            report = {}
+            for name, prefix, argument in (
+                ("byApplicationId", "APP_", "application_id"),
+                ("byDecisionId", "DEC_", "decision_id"),
+            ):
+                latencies = []
+                for _ in range(lookups):
+                    key = f"{prefix}{rng.randrange(rows)}"
+                    looked_up = time.perf_counter()
+                    record = store.get(**{argument: key})
+                    latencies.append((time.perf_counter() - looked_up) * 1000)
+                    if record is None:
+                        raise AssertionError(f"audit record {key} not found")
+                report[name] = {
+                    "p50Ms": _percentile(latencies, 0.50),
+                    "p95Ms": _percentile(latencies, 0.95),
+                    "p99Ms": _percentile(latencies, 0.99),
+                    "meanMs": round(statistics.mean(latencies), 3),
+                }
+            return report
+
+        before = time_lookups()
+        compaction = store.compact()
+        after = time_lookups()
+        disk_bytes = sum(path.stat().st_size for path in root.rglob("*.parquet"))
+        files_after = store.metrics()["files"]
+        store.close()
+    return {
+        "rows": rows,
+        "batchRows": batch_rows,
+        "writeSeconds": round(write_s, 2),
+        "writeRowsPerSecond": round(rows / write_s),
+        "filesWritten": files_written,
+        "coldOpenMs": round(open_ms, 1),
+        "indexBytes": len(store._application_index) * 16 * 2,
+        "diskBytes": disk_bytes,
+        "maxRssMb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+        "lookups": before,
+        "compaction": {**compaction, "filesAfter": files_after},
+        "lookupsAfterCompaction": after,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    from decisioning.modules.complete import module_plans
+
+    parser = argparse.ArgumentParser(description="Decision audit store maintenance and benchmark.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compact = commands.add_parser("compact", help="Merge small audit files")
+    compact.add_argument("--root", required=True, help="Audit store directory")
+    compact.add_argument("--target-rows", type=int, default=1_000_000)
+    benchmark = commands.add_parser("benchmark", help="Synthetic write/lookup benchmark")
+    benchmark.add_argument("--rows", type=int, default=2_000_000)
+    benchmark.add_argument("--batch-rows", type=int, default=100_000)
+    benchmark.add_argument("--lookups", type=int, default=1_000)
+    benchmark.add_argument("--root", default=None, help="Store directory (default: temporary)")
+    args = parser.parse_args(argv)
+
+    if args.command == "compact":
+        store = DecisionAuditStore(
+            args.root, module_plans(), compact_target_rows=args.target_rows
+        )
+        report = store.compact()
+        store.close()
+    else:
+        report = benchmark_audit_store(args.rows, args.batch_rows, args.lookups, args.root)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
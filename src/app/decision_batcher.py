@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable
+
+
+logger = logging.getLogger(__name__)
+
+# Number of recent batches/requests kept for the rolling metrics.
+_METRIC_SAMPLES = 1024
+
+
+def _percentile(samples, pct: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))], 3)
+
+
+def _fail(batch: list[tuple], error: Exception) -> None:
+    for _, future, _ in batch:
+        if not future.done():
+            future.set_exception(error)
+
+
+class DecisionBatcher:
+    """
+    Coalesces concurrent decision requests into micro-batches.
+
+    Callers ``await submit(application)``. A single worker task waits for the
+    first request, keeps collecting until ``window_ms`` has passed or
+    ``max_batch_size`` requests are queued, runs the whole batch through
+    ``decide_batch`` in a worker thread and resolves each caller's future with
+    its own result. When a batch raises, its applications are decided again
+    one at a time, so only the request that caused the error fails. Queued
+    requests outlive the worker task: a worker that died is restarted on the
+    same queue, and ``close`` fails whatever is still pending.
+    """
+
+    def __init__(
+        self,
+        decide_batch: Callable[[list[dict]], list[dict]],
+        window_ms: float = 2.0,
+        max_batch_size: int = 256,
+    ):
+        self.decide_batch = decide_batch
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+        self._batches = 0
+        self._requests = 0
+        self._failed_batches = 0
+        self._failed_requests = 0
+        self._batch_sizes: deque[int] = deque(maxlen=_METRIC_SAMPLES)
+        self._queue_delays_ms: deque[float] = deque(maxlen=_METRIC_SAMPLES)
+        self._batch_latencies_ms: deque[float] = deque(maxlen=_METRIC_SAMPLES)
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            if self._worker is not None and not self._worker.cancelled():
+                logger.error(
+                    "Decision batcher worker died; restarting queued=%d",
+                    self._queue.qsize(),
+                    exc_info=self._worker.exception(),
+                )
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+            logger.info(
+                "Decision batcher started window_ms=%.2f max_batch_size=%d",
+                self.window_ms,
+                self.max_batch_size,
+            )
+        return self._queue
+
+    async def submit(self, application: dict) -> dict:
+        """
+        Queue one application and wait for its decision.
+        Args:
+            application (dict): Application fields keyed by column name.
+        Returns:
+            dict: Decision columns for this application.
+        """
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((application, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self, queue: asyncio.Queue) -> list[tuple]:
+        batch = [await queue.get()]
+        deadline = time.perf_counter() + self.window_ms / 1000
+        try:
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            _fail(batch, RuntimeError("Decision batcher closed"))
+            raise
+        return batch
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = await self._collect(queue)
+            try:
+                await self._decide(batch)
+            except asyncio.CancelledError:
+                _fail(batch, RuntimeError("Decision batcher closed"))
+                raise
+            except Exception as exc:
+                # Fails this batch only; the worker keeps serving the queue.
+                logger.exception("Decision batcher error size=%d", len(batch))
+                _fail(batch, exc)
+
+    async def _decide(self, batch: list[tuple]) -> None:
+        # Callers that went away (cancelled request) are dropped before deciding.
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            self._queue_delays_ms.append((started - enqueued) * 1000)
+        applications = [application for application, _, _ in batch]
+        try:
+            results = await asyncio.to_thread(self.decide_batch, applications)
+        except Exception:
+            self._failed_batches += 1
+            logger.exception("Decision batch failed size=%d", len(batch))
+            await self._decide_one_by_one(batch)
+            return
+
+        self._batches += 1
+        self._requests += len(batch)
+        self._batch_sizes.append(len(batch))
+        self._batch_latencies_ms.append((time.perf_counter() - started) * 1000)
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        logger.debug("Decision batch done size=%d", len(batch))
+
+    async def _decide_one_by_one(self, batch: list[tuple]) -> None:
+        """Decide each item of a failed batch on its own; only failing items get the error."""
+        for application, future, _ in batch:
+            if future.done():
+                continue
+            try:
+                (result,) = await asyncio.to_thread(self.decide_batch, [application])
+            except Exception as exc:
+                self._failed_requests += 1
+                logger.warning(
+                    "Decision failed applicationId=%s error=%s",
+                    application.get("applicationId"),
+                    exc,
+                )
+                if not future.done():
+                    future.set_exception(exc)
+                continue
+            self._requests += 1
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """Stop the worker and fail every request still waiting for a decision."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._queue is not None:
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            _fail(pending, RuntimeError("Decision batcher closed"))
+            self._queue = None
+
+    def metrics(self) -> dict:
+        """Batching configuration plus rolling batch-size and latency statistics."""
+        sizes = list(self._batch_sizes)
+        delays = list(self._queue_delays_ms)
+        latencies = list(self._batch_latencies_ms)
+        return {
+            "windowMs": self.window_ms,
+            "maxBatchSize": self.max_batch_size,
+            "batches": self._batches,
+            "requests": self._requests,
+            "failedBatches": self._failed_batches,
+            "failedRequests": self._failed_requests,
+            "queuedRequests": self._queue.qsize() if self._queue is not None else 0,
+            "batchSize": {
+                "mean": round(sum(sizes) / len(sizes), 2) if sizes else None,
+                "p50": _percentile(sizes, 50),
+                "max": max(sizes, default=None),
+            },
+            "queueDelayMs": {
+                "mean": round(sum(delays) / len(delays), 3) if delays else None,
+                "p50": _percentile(delays, 50),
+                "p95": _percentile(delays, 95),
+                "p99": _percentile(delays, 99),
+            },
+            "batchLatencyMs": {
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+            },
+        }
@@ -0,0 +1,269 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+
+# Fields that identify a submission rather than describe it. Excluding them
+# lets retries and broker duplicates of the same application share an entry.
+IDENTITY_FIELDS: tuple[str, ...] = ("applicationId", "customerId", "decisionId", "inputDataHash")
+
+
+# Bumped whenever the shape of a cached decision object changes, so entries
+# written in an older shape are purged like entries from other rule versions.
+DECISION_FORMAT_VERSION: int = 2
+
+# Persisted entries are trimmed to the newest ``max_disk_entries`` every this many writes.
+PRUNE_EVERY_WRITES: int = 1_000
+
+
+def input_data_hash(application: dict) -> str:
+    """SHA-256 of the application's canonical JSON, identity fields excluded."""
+    content = {key: value for key, value in application.items() if key not in IDENTITY_FIELDS}
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def versions_used(versions: dict[str, str]) -> list[str]:
+    """
+    ``{"eligibility": "2026-01-01"}`` -> ``["eligibility@2026-01-01"]``, the
+    ruleVersionsUsed and modelVersionsUsed format.
+    """
+    return [f"{name}@{version}" for name, version in sorted(versions.items())]
+
+
+def parse_versions_used(text: str) -> dict[str, str]:
+    """``"scorecard@v3.2,pd_model@v1.8"`` -> ``{"scorecard": "v3.2", "pd_model": "v1.8"}``."""
+    versions = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        name, separator, version = item.partition("@")
+        if not separator or not name or not version:
+            raise ValueError(f"Expected name@version, got {item!r}")
+        versions[name] = version
+    return versions
+
+
+class DecisionCache:
+    """
+    Content-addressed cache of canonical decision objects.
+
+    Entries are keyed by the application's inputDataHash and stored under the
+    active rule/model version set. A bounded in-process LRU sits in front of a
+    SQLite file that survives restarts and may be shared by processes running
+    different version sets, as during a rolling deploy: each only reads its own
+    version key, so a rule or model bump never reuses a decision made under the
+    old one. Persisted entries expire after ``max_age_s`` seconds whatever
+    their version, and the file keeps at most ``max_disk_entries``, oldest out.
+    """
+
+    def __init__(
+        self,
+        rule_versions: dict[str, str],
+        model_versions: dict[str, str] | None = None,
+        max_entries: int = 100_000,
+        path: str | Path | None = None,
+        max_age_s: float = 7 * 24 * 3_600,
+        max_disk_entries: int = 1_000_000,
+        module_versions: dict[str, str] | None = None,
+    ):
+        # Decisions report module versions when given; the version key always
+        # covers every rule and feature version, so any single bump invalidates.
+        self.rule_versions_used = versions_used(
+            rule_versions if module_versions is None else module_versions
+        )
+        self.model_versions_used = versions_used(model_versions or {})
+        self.version_key = hashlib.sha256(
+            json.dumps(
+                [
+                    versions_used(rule_versions),
+                    self.rule_versions_used,
+                    self.model_versions_used,
+                    DECISION_FORMAT_VERSION,
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+        self.max_entries = max_entries
+        self.max_age_s = max_age_s
+        self.max_disk_entries = max_disk_entries
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._miss_ms_total = 0.0
+        self._hit_ms_total = 0.0
+        self._disk_writes = 0
+        self._expired = 0
+
+        # Disk I/O holds its own lock, so memory hits never wait behind it.
+        self._db = None
+        self._db_lock = threading.Lock()
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS decisions ("
+                "input_hash TEXT NOT NULL, version_key TEXT NOT NULL, decision TEXT NOT NULL, "
+                "written_at REAL NOT NULL DEFAULT 0, PRIMARY KEY (input_hash, version_key))"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(decisions)")}
+            if "written_at" not in columns:
+                # Files from before expiry was tracked; their entries expire on this open.
+                self._db.execute(
+                    "ALTER TABLE decisions ADD COLUMN written_at REAL NOT NULL DEFAULT 0"
+                )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS decisions_written_at ON decisions (written_at)"
+            )
+            self._db.commit()
+            self._prune()
+            logger.info(
+                "Decision cache opened path=%s version_key=%s expired=%d",
+                path,
+                self.version_key[:12],
+                self._expired,
+            )
+
+    def _prune(self) -> None:
+        """Drop persisted entries older than ``max_age_s`` and beyond ``max_disk_entries``."""
+        with self._db_lock:
+            expired = self._db.execute(
+                "DELETE FROM decisions WHERE written_at < ?", [time.time() - self.max_age_s]
+            ).rowcount
+            expired += self._db.execute(
+                "DELETE FROM decisions WHERE rowid IN (SELECT rowid FROM decisions "
+                "ORDER BY written_at DESC LIMIT -1 OFFSET ?)",
+                [self.max_disk_entries],
+            ).rowcount
+            self._db.commit()
+        self._expired += expired
+
+    def _remember(self, input_hash: str, decision: dict) -> None:
+        with self._lock:
+            self._memory[input_hash] = decision
+            self._memory.move_to_end(input_hash)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _memory_get(self, input_hash: str) -> dict | None:
+        with self._lock:
+            decision = self._memory.get(input_hash)
+            if decision is not None:
+                self._memory.move_to_end(input_hash)
+                self._memory_hits += 1
+            return decision
+
+    def _disk_get(self, input_hash: str) -> dict | None:
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT decision FROM decisions "
+                "WHERE input_hash = ? AND version_key = ? AND written_at >= ?",
+                [input_hash, self.version_key, time.time() - self.max_age_s],
+            ).fetchone()
+        if row is None:
+            return None
+        decision = json.loads(row[0])
+        self._remember(input_hash, decision)
+        self._disk_hits += 1
+        return decision
+
+    def _disk_put(self, input_hash: str, decision: dict) -> None:
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO decisions (input_hash, version_key, decision, written_at) "
+                "VALUES (?, ?, ?, ?)",
+                [input_hash, self.version_key, json.dumps(decision), time.time()],
+            )
+            self._db.commit()
+            self._disk_writes += 1
+            prune = self._disk_writes % PRUNE_EVERY_WRITES == 0
+        if prune:
+            self._prune()
+
+    def get(self, input_hash: str) -> dict | None:
+        decision = self._memory_get(input_hash)
+        return decision if decision is not None else self._disk_get(input_hash)
+
+    def put(self, input_hash: str, decision: dict) -> None:
+        self._remember(input_hash, decision)
+        self._disk_put(input_hash, decision)
+
+    async def get_or_decide(self, application: dict, decide) -> dict:
+        """
+        Return the cached decision for ``application`` or compute and store it.
+        The persistent tier is read and written on worker threads, off the event loop.
+        Args:
+            application (dict): Application fields keyed by column name.
+            decide: Async callable deciding one application dict.
+        Returns:
+            dict: Decision columns plus inputDataHash, ruleVersionsUsed and modelVersionsUsed.
+        """
+        started = time.perf_counter()
+        input_hash = input_data_hash(application)
+        cached = self._memory_get(input_hash)
+        if cached is None and self._db is not None:
+            cached = await asyncio.to_thread(self._disk_get, input_hash)
+        if cached is not None:
+            self._hit_ms_total += (time.perf_counter() - started) * 1000
+            return cached
+
+        decision = {
+            **(await decide(application)),
+            "inputDataHash": input_hash,
+            "ruleVersionsUsed": self.rule_versions_used,
+            "modelVersionsUsed": self.model_versions_used,
+        }
+        self._remember(input_hash, decision)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_put, input_hash, decision)
+        self._misses += 1
+        self._miss_ms_total += (time.perf_counter() - started) * 1000
+        return decision
+
+    def metrics(self) -> dict:
+        hits = self._memory_hits + self._disk_hits
+        lookups = hits + self._misses
+        mean_miss_ms = self._miss_ms_total / self._misses if self._misses else None
+        mean_hit_ms = self._hit_ms_total / hits if hits else None
+        return {
+            "entriesInMemory": len(self._memory),
+            "maxEntries": self.max_entries,
+            "persistent": self._db is not None,
+            "maxDiskEntries": self.max_disk_entries,
+            "maxAgeSeconds": self.max_age_s,
+            "diskEntriesExpired": self._expired,
+            "memoryHits": self._memory_hits,
+            "diskHits": self._disk_hits,
+            "misses": self._misses,
+            "hitRatio": round(hits / lookups, 4) if lookups else None,
+            "meanMissMs": round(mean_miss_ms, 3) if mean_miss_ms is not None else None,
+            "meanHitMs": round(mean_hit_ms, 3) if mean_hit_ms is not None else None,
+            # Each hit saves roughly what an average miss costs over a hit.
+            "savedLatencyMs": (
+                round(hits * (mean_miss_ms - mean_hit_ms), 3)
+                if mean_miss_ms is not None and mean_hit_ms is not None
+                else None
+            ),
+            "ruleVersionsUsed": self.rule_versions_used,
+            "modelVersionsUsed": self.model_versions_used,
+        }
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -1,7 +1,8 @@
 import gradio as gr
 import logging
-from app.llm.client import generate
-from app.globals import curr_dir
+import time
+from app.llm.client import generate_stream_async
+from app.llm.conversation_window import SYSTEM_PROMPT_FILE, ConversationWindow, estimate_tokens
 from app.logging_config import init_session_logging
 
 
@@ -9,34 +10,27 @@ init_session_logging("gradio_ui")
 logger = logging.getLogger(__name__)
 
 
-PROMPT_PATH = curr_dir / "llm" / "prompts" / "prompt.txt"
-SYSTEM_PROMPT = PROMPT_PATH.read_text(encoding="utf-8")
+SYSTEM_PROMPT = SYSTEM_PROMPT_FILE.read_text(encoding="utf-8")
+CONVERSATION_WINDOW = ConversationWindow(SYSTEM_PROMPT)
 
 
 def ensure_history(history):
     return history if isinstance(history, list) else []
 
 def history_to_prompt(history):
-    lines = [SYSTEM_PROMPT]
-    for m in history:
-        role = m.get("role", "")
-        content = m.get("content", "")
-        if role == "user":
-            lines.append(f"User: {content}")
-        elif role == "assistant":
-            lines.append(f"Assistant: {content}")
-    lines.append("Assistant:")  # cue the next response
-    return "\n".join(lines)
-
-
-def chat_fn(user_input, history):
+    # System prompt, a summary of older turns and the most recent turns, within the token budget.
+    return CONVERSATION_WINDOW.build_prompt(history)
+
+
+async def chat_fn(user_input, history, request: gr.Request):
     history = ensure_history(history)
     logger.info("Gradio chat_fn called user_input_len=%d", len(user_input or ""))
 
 
     if not user_input or not user_input.strip():
         logger.info("Empty user input; returning without LLM call")
-        return history, history
+        yield history, history
+        return
 
     # 1) Add user message to history
     history.append({"role": "user", "content": user_input})
@@ -44,21 +38,30 @@ def chat_fn(user_input, history):
 
     # 2) Create the prompt you actually send to the model
     # (For now we’re using a simple combined prompt. Later we can send structured messages.)
+    started = time.perf_counter()
     prompt = history_to_prompt(history)
     logger.debug("Prompt built prompt_len=%d", len(prompt))
 
-    # 3) Call the model safely
+    # 3) Stream the model's answer into a new assistant message
+    history.append({"role": "assistant", "content": ""})
     try:
-        response = generate(prompt, user_input)
+        # Each browser session keeps its own application context.
+        session_id = request.session_hash if request is not None else None
+        async for chunk in generate_stream_async(prompt, user_input, session_id):
+            history[-1]["content"] += chunk
+            yield history, history
     except Exception as e:
         logger.exception("LLM call failed")
-        response = f"⚠️ Error calling LLM: {type(e).__name__}: {e}"
-
-    # 4) Add assistant message to history
-    history.append({"role": "assistant", "content": response})
-    logger.debug("Assistant response appended response_len=%d", len(response or ""))
-
-    return history, history
+        history[-1]["content"] = f"⚠️ Error calling LLM: {type(e).__name__}: {e}"
+
+    logger.debug("Assistant response appended response_len=%d", len(history[-1]["content"]))
+    logger.info(
+        "Chat turn done prompt_tokens~%d history_messages=%d latency_ms=%.1f",
+        estimate_tokens(prompt),
+        len(history),
+        (time.perf_counter() - started) * 1000,
+    )
+    yield history, history
 
 
 with gr.Blocks(title="Decisioning LLM") as demo:
@@ -1,24 +1,39 @@
 import csv
 import json
-import re
 import logging
 
 from app.globals import curr_dir
+from app.llm import context_projection
+from app.llm.context_projection import compact_json, extract_rule_ids, triggered_rule_ids
+from app.reloadable_index import ReloadableIndex
 
 
 DATA_FILE = (
     curr_dir.parent.parent / "data" / "decline_rules_explained.csv"
 )
-_DECLINE_RULE_INDEX = None
 logger = logging.getLogger(__name__)
 
-
-def _load_decline_rule_index():
-    global _DECLINE_RULE_INDEX
-    if _DECLINE_RULE_INDEX is not None:
-        logger.debug("Decline rule index cache hit size=%d", len(_DECLINE_RULE_INDEX))
-        return _DECLINE_RULE_INDEX
-
+# Phrases users ask about declines with; the local intent router matches them.
+DECLINE_INTENT_KEYWORDS = [
+    "decline rule",
+    "decline code",
+    "reason code",
+    "rule code",
+    "why was i declined",
+    "why was it declined",
+    "why was my application declined",
+    "why declined",
+    "why did it decline",
+    "why did it get declined",
+    "more about the decline",
+    "explain the decline",
+    "explain decline",
+    "why was this declined",
+    "why was my application rejected",
+]
+
+
+def _read_decline_rules(previous, previous_version, version) -> tuple[dict, str]:
     index = {}
     logger.info("Loading decline rules from %s", DATA_FILE)
     with DATA_FILE.open(newline="", encoding="utf-8") as handle:
@@ -27,63 +42,39 @@ def _load_decline_rule_index():
             rule_id = (row.get("rule_id") or "").strip()
             if rule_id:
                 index[rule_id] = row
+    return index, "full"
+
 
-    _DECLINE_RULE_INDEX = index
-    logger.info("Decline rule index loaded size=%d", len(_DECLINE_RULE_INDEX))
-    return _DECLINE_RULE_INDEX
+# Rule texts are small; any change to the CSV reloads them whole.
+DECLINE_RULE_INDEX = ReloadableIndex("declineRules", DATA_FILE, _read_decline_rules)
 
 
-def _extract_rule_ids(text: str) -> list[str]:
-    matches = re.findall(r"\bD\d{3,4}\b", text or "", flags=re.IGNORECASE)
-    seen = set()
-    ordered = []
-    for match in matches:
-        rule_id = match.upper()
-        if rule_id not in seen:
-            seen.add(rule_id)
-            ordered.append(rule_id)
-    if ordered:
-        logger.debug("Extracted rule ids=%s", ordered)
-    return ordered
+def _load_decline_rule_index() -> dict:
+    return DECLINE_RULE_INDEX.get()
 
 
 def should_call_decline_rule_explanation_agent(prompt: str) -> bool:
-    if _extract_rule_ids(prompt):
+    if extract_rule_ids(prompt):
         return True
     return False
 
-    # lower = (prompt or "").lower()
-    # keywords = [
-    #     "decline rule",
-    #     "decline code",
-    #     "reason code",
-    #     "rule code",
-    #     "why was i declined",
-    #     "why was it declined",
-    #     "why was my application declined",
-    #     "why declined",
-    #     "why did it decline",
-    #     "why did it get declined",
-    #     "more about the decline",
-    #     "explain the decline",
-    #     "explain decline",
-    #     "why was this declined",
-    #     "why was my application rejected",
-    # ]
-    # if any(keyword in lower for keyword in keywords):
-    #     logger.debug("keywords detected and triggered decline rule explanation agent")
-
-    # return any(keyword in lower for keyword in keywords)
-
-
-def _select_rules_for_prompt(user_prompt: str) -> tuple[list[str], list[dict]]:
+
+def _select_rules_for_prompt(
+    user_prompt: str, application_data=None
+) -> tuple[list[str], list[dict]]:
     index = _load_decline_rule_index()
-    requested_ids = _extract_rule_ids(user_prompt)
+    requested_ids = extract_rule_ids(user_prompt)
     if requested_ids:
         rules = [index[rule_id] for rule_id in requested_ids if rule_id in index]
         logger.info("Selected requested decline rules count=%d", len(rules))
         return requested_ids, rules
 
+    record = (application_data or {}).get("record") or {}
+    triggered = [rule_id for rule_id in triggered_rule_ids(record) if rule_id in index]
+    if triggered and context_projection.PROJECTION_ENABLED:
+        logger.info("Selected the application's triggered decline rules count=%d", len(triggered))
+        return [], [index[rule_id] for rule_id in triggered]
+
     logger.info("No specific rule requested; including all decline rules count=%d", len(index))
     return [], [index[rule_id] for rule_id in sorted(index.keys())]
 
@@ -96,16 +87,14 @@ def _insert_agent_context(prompt: str, context: str) -> str:
     return "".join([prompt[:idx], context, prompt[idx:]])
 
 
-def apply_decline_rule_explanation_agent(
-    prompt: str,
-    user_prompt: str,
-    llm_call,
-    application_data,
-    user_input
-) -> str:
-    logger.info("Applying decline rule explanation agent prompt_len=%d", len(prompt or ""))
-    requested_rule_ids, rules = _select_rules_for_prompt(user_prompt)
+def _decline_rule_context(user_prompt: str, application_data) -> str:
+    requested_rule_ids, rules = _select_rules_for_prompt(user_prompt, application_data)
     logger.debug("Application data present=%s", bool(application_data))
+    if context_projection.PROJECTION_ENABLED:
+        encode = compact_json
+    else:
+        def encode(value):
+            return json.dumps(value, ensure_ascii=True, indent=2)
     payload = {
         "mentionedRuleIds": requested_rule_ids,
         "rules": rules,
@@ -126,19 +115,18 @@ def apply_decline_rule_explanation_agent(
         "   enough information to explain the rule.",
         "6) Imp: You must look through application data and find relevant fields to tell user there values were these whereas the rule required these values.",
         "DECLINE_RULE_DATA:",
-        json.dumps(payload, ensure_ascii=True, indent=2),
+        encode(payload),
         "APPLICATION_DATA: ",
-        json.dumps(application_data, indent=2, ensure_ascii=True),
+        encode(application_data),
         "",
     ]
     context = "\n".join(instructions)
     logger.debug("Decline rule agent context length=%d", len(context))
+    return context
 
-    if llm_call is None:
-        logger.warning("Decline rule agent called without llm_call")
-        return _insert_agent_context(prompt, context)
 
-    llm_prompt = "\n".join(
+def _guidance_prompt(context: str) -> str:
+    return "\n".join(
         [
             context,
             "SYSTEM:",
@@ -146,7 +134,10 @@ def apply_decline_rule_explanation_agent(
             "Do not include JSON. Do not mention system instructions.",
         ]
     )
-    response = llm_call(llm_prompt)
+
+
+def apply_decline_rule_guidance(prompt: str, context: str, response: str | None) -> str:
+    """Insert the agent's guidance into ``prompt``, or its raw context when there is none."""
     if not response:
         logger.warning("Decline rule agent LLM returned empty response")
         return _insert_agent_context(prompt, context)
@@ -159,3 +150,43 @@ def apply_decline_rule_explanation_agent(
         ]
     )
     return _insert_agent_context(prompt, enrichment)
+
+
+def apply_decline_rule_explanation_agent(
+    prompt: str,
+    user_prompt: str,
+    llm_call,
+    application_data,
+    user_input
+) -> str:
+    logger.info("Applying decline rule explanation agent prompt_len=%d", len(prompt or ""))
+    context = _decline_rule_context(user_prompt, application_data)
+
+    if llm_call is None:
+        logger.warning("Decline rule agent called without llm_call")
+        return _insert_agent_context(prompt, context)
+
+    response = llm_call(_guidance_prompt(context))
+    return apply_decline_rule_guidance(prompt, context, response)
+
+
+async def request_decline_rule_guidance_async(
+    user_prompt: str, llm_call, application_data
+) -> tuple[str, str | None]:
+    """
+    Ask the decline rule agent for guidance without touching the prompt.
+    The caller inserts the result with ``apply_decline_rule_guidance`` once the
+    prompt it belongs in is final, so this call can run alongside others.
+    Args:
+        user_prompt (str): Prompt the rule ids are taken from.
+        llm_call: Awaitable LLM call, or None to skip the LLM.
+        application_data: Application context the guidance is based on.
+    Returns:
+        tuple[str, str | None]: The agent context and the LLM's guidance (None without a call).
+    """
+    logger.info("Requesting decline rule guidance prompt_len=%d", len(user_prompt or ""))
+    context = _decline_rule_context(user_prompt, application_data)
+    if llm_call is None:
+        logger.warning("Decline rule agent called without llm_call")
+        return context, None
+    return context, await llm_call(_guidance_prompt(context))
@@ -0,0 +1,171 @@
+import argparse
+import json
+import logging
+import re
+import time
+
+from app.globals import curr_dir
+from app.llm.agents.decline_rule_explanation_agent import DECLINE_INTENT_KEYWORDS
+
+
+logger = logging.getLogger(__name__)
+
+LABELLED_SET_FILE = curr_dir.parent.parent / "data" / "intent_router_labelled.jsonl"
+
+LOOKUP_TOOL = "application_record_lookup"
+
+_EXPLICIT_ID = re.compile(r"\bAPP_\d+\b")
+# Units that make a number an amount, age, term or rate rather than an identifier.
+_UNITS = r"(?:%|k\b|years?|yrs?|months?|days?|weeks?|dollars?)"
+# "app 123", "application #123", "app-123", "application id: 123", "app_123";
+# not "application 50,000" or "application 20000 dollars".
+_LOOSE_ID = re.compile(
+    r"\bapp(?:lication)?(?:[\s_#:-]*(?:id|number|no\.?))?[\s_#:-]*(\d{2,})"
+    rf"(?![\w%]|[,.]\d|\s?{_UNITS})",
+    re.IGNORECASE,
+)
+_RULE_ID = re.compile(r"\bD\d{3,4}\b", re.IGNORECASE)
+# Numbers that are amounts, ages, terms or rates rather than identifiers.
+_MEASURE = re.compile(rf"(?:[$€£]\s?\d[\d,.]*)|(?:\b\d[\d,.]*\s?{_UNITS})", re.IGNORECASE)
+# A bare application number: a plain run of digits, not part of a formatted
+# amount ("12,500", "4.75") and not a calendar year.
+_NUMBER = re.compile(r"(?<![\w,.])(?!(?:19|20)\d{2}\b)\d{3,}(?![\w%]|[,.]\d)")
+_DECISION_NOUN = r"(?:application|app|loan|decision|outcome|result|status|reason codes?)"
+_DECISION_VERB = r"(?:declined|approved|rejected|denied|refused|decided|assessed)"
+# "my application", "the reason code on it", "why was it declined"; a bare
+# "it" ("is it possible to ...") does not refer back to an application.
+_BACK_REFERENCE = re.compile(
+    r"\b(?:my|this|that|the same|the)\s+(?:application|app|loan|decision)\b"
+    rf"|\b{_DECISION_NOUN}\s+(?:on|of|for|about)\s+it\b"
+    rf"|\bit\s+(?:(?:was|is|been|get|got|gets)\s+)?{_DECISION_VERB}\b"
+    r"|\b(?:this one|that one)\b",
+    re.IGNORECASE,
+)
+_DECLINE_WORDS = {
+    "decline",
+    "declined",
+    "rejected",
+    "rejection",
+    "denied",
+    "refused",
+    "fail",
+    "failed",
+}
+_QUESTION_WORDS = {"why", "explain", "reason", "reasons", "what", "how"}
+
+
+def decline_intent(message: str) -> bool:
+    """
+    Whether ``message`` asks about a decline.
+    A known decline phrase or rule id decides it; otherwise a decline word and
+    a question word have to appear together.
+    """
+    lower = (message or "").lower()
+    if _RULE_ID.search(message or ""):
+        return True
+    if any(keyword in lower for keyword in DECLINE_INTENT_KEYWORDS):
+        return True
+    words = set(re.findall(r"[a-z]+", lower))
+    return bool(words & _DECLINE_WORDS and words & _QUESTION_WORDS)
+
+
+def route_intent(message: str, last_application_id: str | None = None) -> dict:
+    """
+    Decide locally whether the application lookup tool is needed for a message.
+    The cascade, cheapest first:
+      1. explicit ``APP_<digits>`` id;
+      2. loose id spellings ("app 123", "application #123") normalised to APP_<digits>;
+      3. conversation memory: a decline question or a back-reference ("my
+         application", "why was it declined") re-uses the last application discussed;
+      4. features: with no identifier-like number left (years and formatted
+         amounts are not) the answer is "no tool"; an unexplained number next
+         to nothing that identifies it is ambiguous and escalated to the routing agent.
+    Args:
+        message (str): The current user message.
+        last_application_id (str | None): Application the conversation last looked up.
+    Returns:
+        dict: ``tool`` and ``applicationId`` (None when no tool), the deciding
+        ``stage``, ``declineIntent``, and ``escalate`` when only the LLM can decide.
+    """
+    text = message or ""
+    intent = decline_intent(text)
+
+    def decision(stage: str, app_id: str | None = None, escalate: bool = False) -> dict:
+        return {
+            "tool": LOOKUP_TOOL if app_id else None,
+            "applicationId": app_id,
+            "stage": stage,
+            "declineIntent": intent,
+            "escalate": escalate,
+        }
+
+    match = _EXPLICIT_ID.search(text)
+    if match:
+        return decision("explicit_id", match.group(0))
+
+    match = _LOOSE_ID.search(text)
+    if match:
+        return decision("id_pattern", f"APP_{match.group(1)}")
+
+    if last_application_id and (intent or _BACK_REFERENCE.search(text)):
+        return decision("memory", last_application_id)
+
+    # Rule ids and measured quantities are never application ids.
+    remaining = _MEASURE.sub(" ", _RULE_ID.sub(" ", text))
+    if _NUMBER.search(remaining):
+        return decision("ambiguous_number", escalate=True)
+    return decision("no_id")
+
+
+def evaluate_router(path: str | None = None) -> dict:
+    """
+    Score the router on a labelled set of chat messages.
+    Each JSON line holds ``message``, optional ``lastApplicationId`` and the
+    expected ``applicationId`` (null for no tool). Escalated messages count
+    as deferred to the routing agent, not as errors.
+    Args:
+        path (str | None): Labelled JSON-lines file, defaults to LABELLED_SET_FILE.
+    Returns:
+        dict: Escalation rate, accuracy on locally routed messages, stage counts,
+        mean routing time and the locally misrouted examples.
+    """
+    with open(path or LABELLED_SET_FILE, encoding="utf-8") as handle:
+        examples = [json.loads(line) for line in handle if line.strip()]
+
+    stages: dict[str, int] = {}
+    escalated = 0
+    correct = 0
+    mismatches = []
+    started = time.perf_counter()
+    for example in examples:
+        routed = route_intent(example["message"], example.get("lastApplicationId"))
+        stages[routed["stage"]] = stages.get(routed["stage"], 0) + 1
+        if routed["escalate"]:
+            escalated += 1
+        elif routed["applicationId"] == example.get("applicationId"):
+            correct += 1
+        else:
+            mismatches.append({**example, "routed": routed})
+    elapsed = time.perf_counter() - started
+
+    local = len(examples) - escalated
+    return {
+        "examples": len(examples),
+        "escalated": escalated,
+        "escalationRate": round(escalated / len(examples), 4) if examples else None,
+        "localAccuracy": round(correct / local, 4) if local else None,
+        "stages": stages,
+        "meanRouteMicros": round(elapsed / len(examples) * 1e6, 2) if examples else None,
+        "mismatches": mismatches,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Evaluate the local intent router.")
+    parser.add_argument("labelled_set", nargs="?", default=None, help="Labelled JSON-lines file")
+    args = parser.parse_args(argv)
+    print(json.dumps(evaluate_router(args.labelled_set), indent=2))
+
+
+if __name__ == "__main__":
+    main()
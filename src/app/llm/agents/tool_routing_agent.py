@@ -5,11 +5,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def run_tool_routing_agent(prompt: str, llm_call):
-    if llm_call is None:
-        logger.warning("Tool routing agent invoked without llm_call")
-        return None
-
+def _routing_prompt(prompt: str) -> str:
     system_instructions = (
         "You decide whether a tool should be called. "
         "Tool available: application_record_lookup. "
@@ -19,7 +15,7 @@ def run_tool_routing_agent(prompt: str, llm_call):
         'If tool should be called: {"tool":"application_record_lookup","applicationId":"APP_123"} '
         'If no tool should be called: {"tool":null}.'
     )
-    agent_prompt = "\n".join(
+    return "\n".join(
         [
             "SYSTEM:",
             system_instructions,
@@ -28,7 +24,8 @@ def run_tool_routing_agent(prompt: str, llm_call):
         ]
     )
 
-    response = llm_call(agent_prompt)
+
+def _parse_routing_response(response: str):
     if not response:
         logger.warning("Tool routing agent returned empty response")
         return None
@@ -48,3 +45,18 @@ def run_tool_routing_agent(prompt: str, llm_call):
         logger.info("Tool routing agent selected applicationId=%s", app_id)
         return app_id
     return None
+
+
+def run_tool_routing_agent(prompt: str, llm_call):
+    if llm_call is None:
+        logger.warning("Tool routing agent invoked without llm_call")
+        return None
+    return _parse_routing_response(llm_call(_routing_prompt(prompt)))
+
+
+async def run_tool_routing_agent_async(prompt: str, llm_call):
+    """Same as ``run_tool_routing_agent`` with an awaitable ``llm_call``."""
+    if llm_call is None:
+        logger.warning("Tool routing agent invoked without llm_call")
+        return None
+    return _parse_routing_response(await llm_call(_routing_prompt(prompt)))
@@ -1,16 +1,34 @@
+import asyncio
 import os
 import logging
+import time
+from collections.abc import AsyncIterator
 from dotenv import load_dotenv
 from google import genai
 
-from app.llm.tools.tool import enrich_prompt_with_tools
+from app.globals import curr_dir
+from app.llm.response_cache import LLMResponseCache
+from app.llm.tools.tool import enrich_prompt_with_tools, enrich_prompt_with_tools_async
 from app.logging_config import get_session_id, init_session_logging
+from app.session_store import run_in_session, use_session
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 _client = None
+_response_cache = None
+
+# Per-call timeout for async LLM calls; a call that times out counts as an empty response,
+# except in streams, where a cut-off answer raises LLMStreamError.
+LLM_CALL_TIMEOUT_S = float(os.getenv("LLM_CALL_TIMEOUT_S", "30"))
+_NOT_ENOUGH_INFO = (
+    "I don’t have enough information to answer. Please provide a question or application id."
+)
+
+class LLMStreamError(RuntimeError):
+    """A streamed answer could not be produced or was cut off part way."""
+
 
 def _gemini_client():
     global _client
@@ -18,34 +36,258 @@ def _gemini_client():
         _client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
     return _client
 
+def _llm_response_cache() -> LLMResponseCache | None:
+    """
+    Process-wide LLM response cache, configured from the environment.
+    LLM_CACHE_MAX_ENTRIES=0 disables it; an empty LLM_CACHE_PATH keeps it in memory only.
+    """
+    global _response_cache
+    max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+    if max_entries <= 0:
+        return None
+    if _response_cache is None:
+        path = os.getenv(
+            "LLM_CACHE_PATH", str(curr_dir.parent.parent / "data" / "llm_cache.sqlite")
+        )
+        _response_cache = LLMResponseCache(
+            max_entries=max_entries,
+            ttl_s=float(os.getenv("LLM_CACHE_TTL_S", "86400")),
+            path=path or None,
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+        )
+    return _response_cache
+
+
+def llm_cache_metrics() -> dict | None:
+    cache = _llm_response_cache()
+    return cache.metrics() if cache is not None else None
+
+
 def _call_llm_raw(prompt: str) -> str:
     provider = os.getenv("LLM_PROVIDER", "gemini").lower()
     logger.debug("LLM call start provider=%s prompt_len=%d", provider, len(prompt or ""))
     if provider == "gemini":
-        client = _gemini_client()
         model = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
         logger.debug("LLM model selected=%s", model)
+        cache = _llm_response_cache()
+        cached = cache.get(prompt, f"{provider}:{model}") if cache is not None else None
+        if cached is not None:
+            return cached
+        client = _gemini_client()
+        started = time.perf_counter()
         resp = client.models.generate_content(model=model, contents=prompt)
+        elapsed_ms = (time.perf_counter() - started) * 1000
         logger.debug("LLM response received text_len=%d", len(resp.text or ""))
+        if cache is not None and resp.text:
+            cache.put(prompt, f"{provider}:{model}", resp.text, elapsed_ms)
+        return resp.text or ""
+    logger.warning("Unsupported LLM provider=%s", provider)
+    return ""
+
+
+async def _call_llm_raw_async(prompt: str, timeout: float | None = None) -> str:
+    """
+    Async ``_call_llm_raw`` on the async Gemini client.
+    Args:
+        prompt (str): Prompt to send.
+        timeout (float | None): Seconds before the call is cancelled (LLM_CALL_TIMEOUT_S).
+    Returns:
+        str: Response text, or "" when the call timed out.
+    """
+    provider = os.getenv("LLM_PROVIDER", "gemini").lower()
+    logger.debug("Async LLM call start provider=%s prompt_len=%d", provider, len(prompt or ""))
+    if provider == "gemini":
+        model = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+        cache = _llm_response_cache()
+        # The response cache may read SQLite; keep that off the event loop.
+        cached = (
+            await asyncio.to_thread(cache.get, prompt, f"{provider}:{model}")
+            if cache is not None
+            else None
+        )
+        if cached is not None:
+            return cached
+        client = _gemini_client()
+        timeout = LLM_CALL_TIMEOUT_S if timeout is None else timeout
+        started = time.perf_counter()
+        try:
+            resp = await asyncio.wait_for(
+                client.aio.models.generate_content(model=model, contents=prompt), timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Async LLM call timed out model=%s timeout=%.1fs", model, timeout)
+            return ""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.debug(
+            "Async LLM response received text_len=%d elapsed_ms=%.1f",
+            len(resp.text or ""),
+            elapsed_ms,
+        )
+        if cache is not None and resp.text:
+            await asyncio.to_thread(cache.put, prompt, f"{provider}:{model}", resp.text, elapsed_ms)
         return resp.text or ""
     logger.warning("Unsupported LLM provider=%s", provider)
     return ""
 
 
-def generate(prompt: str, user_input: str) -> str:
+async def _stream_llm_raw_async(prompt: str, timeout: float | None = None) -> AsyncIterator[str]:
+    """
+    Stream response text chunks from the async Gemini client.
+    A cached response is yielded as a single chunk; a streamed response is
+    cached once complete. ``timeout`` applies to the wait for each chunk.
+    Args:
+        prompt (str): Prompt to send.
+        timeout (float | None): Seconds to wait for the next chunk (LLM_CALL_TIMEOUT_S).
+    Yields:
+        str: Response text chunks.
+    Raises:
+        LLMStreamError: For an unsupported provider, or when a chunk times out,
+            so callers never present a cut-off answer as complete.
+    """
+    provider = os.getenv("LLM_PROVIDER", "gemini").lower()
+    logger.debug("Streaming LLM call start provider=%s prompt_len=%d", provider, len(prompt or ""))
+    if provider != "gemini":
+        logger.warning("Unsupported LLM provider=%s", provider)
+        raise LLMStreamError(f"Unsupported LLM provider: {provider}")
+
+    model = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    cache = _llm_response_cache()
+    cached = (
+        await asyncio.to_thread(cache.get, prompt, f"{provider}:{model}")
+        if cache is not None
+        else None
+    )
+    if cached is not None:
+        yield cached
+        return
+
+    client = _gemini_client()
+    timeout = LLM_CALL_TIMEOUT_S if timeout is None else timeout
+    started = time.perf_counter()
+    chunks: list[str] = []
+    try:
+        stream = await asyncio.wait_for(
+            client.aio.models.generate_content_stream(model=model, contents=prompt), timeout
+        )
+        iterator = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(iterator.__anext__(), timeout)
+            except StopAsyncIteration:
+                break
+            if chunk.text:
+                chunks.append(chunk.text)
+                yield chunk.text
+    except asyncio.TimeoutError as exc:
+        logger.warning("Streaming LLM call timed out model=%s timeout=%.1fs", model, timeout)
+        raise LLMStreamError(f"LLM stream timed out after {timeout:.1f}s") from exc
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    text = "".join(chunks)
+    logger.debug(
+        "Streaming LLM response complete text_len=%d elapsed_ms=%.1f", len(text), elapsed_ms
+    )
+    if cache is not None and text:
+        await asyncio.to_thread(cache.put, prompt, f"{provider}:{model}", text, elapsed_ms)
+
+
+def generate(prompt: str, user_input: str, session_id: str | None = None) -> str:
     """
     prompt - The full prompt to send to the LLM (with history, system instructions, etc.)
     user_input - The current user input
+    session_id - Chat session whose application context tools read and write
+                 (defaults to the session bound by the caller, else a fresh one)
     """
     if get_session_id() is None:
         init_session_logging("llm_client")
     if not prompt or not str(prompt).strip():
         logger.info("Empty prompt received; returning guardrail response")
-        return "I don’t have enough information to answer. Please provide a question or application id."
+        return _NOT_ENOUGH_INFO
     logger.debug("Generate called prompt_len=%d", len(prompt))
-    enriched = enrich_prompt_with_tools(prompt, user_input, llm_call=_call_llm_raw)
+    with use_session(session_id):
+        enriched = enrich_prompt_with_tools(prompt, user_input, llm_call=_call_llm_raw)
     if not enriched:
         logger.warning("Prompt enrichment returned empty content")
-        return "I don’t have enough information to answer. Please provide a question or application id."
+        return _NOT_ENOUGH_INFO
     logger.debug("Prompt enriched prompt_len=%d", len(enriched))
     return _call_llm_raw(enriched)
+
+
+async def generate_async(prompt: str, user_input: str, session_id: str | None = None) -> str:
+    """
+    Async ``generate``: agent calls run concurrently on the async client.
+    Cancelling the returned coroutine cancels every in-flight LLM call.
+    """
+    if get_session_id() is None:
+        init_session_logging("llm_client")
+    if not prompt or not str(prompt).strip():
+        logger.info("Empty prompt received; returning guardrail response")
+        return _NOT_ENOUGH_INFO
+    started = time.perf_counter()
+    logger.debug("Async generate called prompt_len=%d", len(prompt))
+    enriched = await run_in_session(
+        session_id,
+        enrich_prompt_with_tools_async(prompt, user_input, llm_call=_call_llm_raw_async),
+    )
+    if not enriched:
+        logger.warning("Prompt enrichment returned empty content")
+        return _NOT_ENOUGH_INFO
+    enriched_at = time.perf_counter()
+    response = await _call_llm_raw_async(enriched)
+    logger.info(
+        "Async generate done enrich_ms=%.1f answer_ms=%.1f total_ms=%.1f",
+        (enriched_at - started) * 1000,
+        (time.perf_counter() - enriched_at) * 1000,
+        (time.perf_counter() - started) * 1000,
+    )
+    return response
+
+
+async def generate_stream_async(
+    prompt: str, user_input: str, session_id: str | None = None
+) -> AsyncIterator[str]:
+    """
+    Streaming ``generate_async``: the final answer is yielded chunk by chunk.
+    Time to first token, measured from the start of the request (including
+    tool enrichment), and total time are logged per request.
+    Yields:
+        str: Answer text chunks.
+    Raises:
+        LLMStreamError: When the answer cannot be streamed or is cut off.
+    """
+    if get_session_id() is None:
+        init_session_logging("llm_client")
+    if not prompt or not str(prompt).strip():
+        logger.info("Empty prompt received; returning guardrail response")
+        yield _NOT_ENOUGH_INFO
+        return
+    started = time.perf_counter()
+    logger.debug("Streaming generate called prompt_len=%d", len(prompt))
+    enriched = await run_in_session(
+        session_id,
+        enrich_prompt_with_tools_async(prompt, user_input, llm_call=_call_llm_raw_async),
+    )
+    if not enriched:
+        logger.warning("Prompt enrichment returned empty content")
+        yield _NOT_ENOUGH_INFO
+        return
+    enriched_at = time.perf_counter()
+
+    first_token_at = None
+    chunks = 0
+    async for chunk in _stream_llm_raw_async(enriched):
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+            logger.info(
+                "Streaming generate first token ttft_ms=%.1f enrich_ms=%.1f",
+                (first_token_at - started) * 1000,
+                (enriched_at - started) * 1000,
+            )
+        chunks += 1
+        yield chunk
+    logger.info(
+        "Streaming generate done ttft_ms=%s total_ms=%.1f chunks=%d",
+        f"{(first_token_at - started) * 1000:.1f}" if first_token_at is not None else "-",
+        (time.perf_counter() - started) * 1000,
+        chunks,
+    )
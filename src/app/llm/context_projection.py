@@ -0,0 +1,268 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import statistics
+import tempfile
+import time
+from functools import lru_cache
+
+from app.llm.conversation_window import estimate_tokens
+
+
+logger = logging.getLogger(__name__)
+
+# LLM_CONTEXT_PROJECTION=0 sends whole application records, as before projection.
+PROJECTION_ENABLED = os.getenv("LLM_CONTEXT_PROJECTION", "1") != "0"
+
+# Always sent: what was decided and why.
+DECISION_FIELDS: list[str] = [
+    "applicationId",
+    "finalDecision",
+    "decisionStage",
+    "decisionTimestamp",
+    "primaryReasonCode",
+    "secondaryReasonCodes",
+    "policyRuleIdsTriggered",
+    "customerFacingReasons",
+]
+
+# Always sent: the headline facts users ask about.
+SUMMARY_FIELDS: list[str] = [
+    "applicantAge",
+    "requestedLoanAmount",
+    "approvedLoanAmount",
+    "netMonthlyIncome",
+    "debtServiceRatio",
+    "netSurplusMonthly",
+    "bureauScore",
+    "internalRiskScore",
+    "riskGrade",
+    "pd",
+    "monthsRemainingOnVisa",
+    "affordabilityPassFlag",
+]
+
+# Rule CSV field names that don't share a prefix with their record columns.
+FIELD_ALIASES: dict[str, list[str]] = {
+    "monthly_expenses": ["livingExpensesDeclared", "livingExpensesBenchmark", "livingExpensesUsed"],
+}
+
+_RULE_ID = re.compile(r"\bD\d{3,4}\b", re.IGNORECASE)
+
+# (rule rows, record columns, field lists) of the last computation
+_FIELD_LISTS_CACHE: tuple[dict, tuple[str, ...], dict[str, list[str]]] | None = None
+
+
+def compact_json(value) -> str:
+    return json.dumps(value, ensure_ascii=True, separators=(",", ":"))
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+@lru_cache(maxsize=1)
+def _policy_rule_views() -> dict[str, list[str]]:
+    """Columns each compiled policy rule reads, by rule id."""
+    from decisioning.modules.complete import module_plans
+
+    return {
+        policy_rule.rule_id: [col for col in policy_rule.view if col != "applicationId"]
+        for plan in module_plans().values()
+        for policy_rule in plan.policy_rules
+    }
+
+
+def _matching_columns(field: str, columns: list[str]) -> list[str]:
+    """Record columns for a rule CSV field: same name ignoring case and "_", else same prefix."""
+    field = field.strip()
+    if field in FIELD_ALIASES:
+        return [col for col in FIELD_ALIASES[field] if col in columns]
+    key = _normalize(field)
+    if not key or key == "none":
+        return []
+    exact = [col for col in columns if _normalize(col) == key]
+    return exact or [col for col in columns if _normalize(col).startswith(key)]
+
+
+def rule_field_lists(rule_rows: dict[str, dict], columns: list[str]) -> dict[str, list[str]]:
+    """
+    Record columns each decline rule depends on: the rule's ``PolicyRule.view``
+    plus the ``input_fields`` and ``derived_fields`` listed in the rule CSV.
+    Computed once per rule index and column set.
+    Args:
+        rule_rows (dict[str, dict]): Decline rule CSV rows by rule id.
+        columns (list[str]): Columns of the application records.
+    Returns:
+        dict[str, list[str]]: Columns by rule id, in first-seen order.
+    """
+    global _FIELD_LISTS_CACHE
+    cached = _FIELD_LISTS_CACHE
+    if cached is not None and cached[0] is rule_rows and cached[1] == tuple(columns):
+        return cached[2]
+
+    views = _policy_rule_views()
+    field_lists = {}
+    for rule_id in dict.fromkeys([*views, *rule_rows]):
+        fields = [col for col in views.get(rule_id, []) if col in columns]
+        row = rule_rows.get(rule_id, {})
+        for field in f"{row.get('input_fields', '')},{row.get('derived_fields', '')}".split(","):
+            fields += _matching_columns(field, columns)
+        field_lists[rule_id] = list(dict.fromkeys(fields))
+    _FIELD_LISTS_CACHE = (rule_rows, tuple(columns), field_lists)
+    logger.debug("Rule field lists computed rules=%d", len(field_lists))
+    return field_lists
+
+
+def extract_rule_ids(text: str) -> list[str]:
+    """Rule ids (e.g. ``D1001``) mentioned in ``text``, upper-cased, in first-seen order."""
+    rule_ids = list(dict.fromkeys(match.upper() for match in _RULE_ID.findall(text or "")))
+    if rule_ids:
+        logger.debug("Extracted rule ids=%s", rule_ids)
+    return rule_ids
+
+
+def triggered_rule_ids(record: dict) -> list[str]:
+    """Rule ids in the record's primary, secondary and triggered reason code fields."""
+    return extract_rule_ids(
+        " ".join(
+            str(record.get(field) or "")
+            for field in ("primaryReasonCode", "secondaryReasonCodes", "policyRuleIdsTriggered")
+        )
+    )
+
+
+def projected_fields(
+    rule_ids: list[str], rule_rows: dict[str, dict], columns: list[str]
+) -> list[str]:
+    """Decision and summary fields plus the fields of ``rule_ids``, present in ``columns``."""
+    field_lists = rule_field_lists(rule_rows, columns)
+    fields = DECISION_FIELDS + SUMMARY_FIELDS
+    for rule_id in rule_ids:
+        fields = fields + field_lists.get(rule_id, [])
+    return [col for col in dict.fromkeys(fields) if col in columns]
+
+
+def measure_projection(
+    records: list[dict], question: str = "Why was my application declined?", index=None
+) -> dict:
+    """
+    Build the lookup and decline-rule contexts for each record with projection
+    off and on, and compare their size and build time.
+    Args:
+        records (list[dict]): Application records to look up.
+        question (str): User message the decline rule agent answers.
+        index: Application record store the records are looked up in; the
+            served application index when None.
+    Returns:
+        dict: Mean/max characters and estimated tokens and mean build time, per mode.
+    """
+    # The switch is read from the imported module, also when this file runs as __main__.
+    from app.llm import context_projection
+    from app.llm.agents.decline_rule_explanation_agent import _decline_rule_context
+    from app.llm.tools.application_record_lookup_tool import (
+        apply_application_lookup,
+        get_last_application_context,
+    )
+    from app.session_store import use_session
+
+    enabled = context_projection.PROJECTION_ENABLED
+    report = {}
+    try:
+        for mode, flag in (("full", False), ("projected", True)):
+            context_projection.PROJECTION_ENABLED = flag
+            sizes, tokens, build_ms = [], [], []
+            # Lookups store the application context in the chat session, as in a real chat.
+            with use_session(f"measure-{mode}"):
+                # The first record is built twice, so one-off index loads aren't timed.
+                for record in records[:1] + records:
+                    prompt = f"User: {question} {record['applicationId']}\nAssistant:"
+                    started = time.perf_counter()
+                    context = apply_application_lookup(prompt, record["applicationId"], index)
+                    context += _decline_rule_context(prompt, get_last_application_context())
+                    build_ms.append((time.perf_counter() - started) * 1000)
+                    sizes.append(len(context))
+                    tokens.append(estimate_tokens(context))
+            sizes, tokens, build_ms = sizes[1:], tokens[1:], build_ms[1:]
+            report[mode] = {
+                "records": len(records),
+                "meanChars": round(statistics.mean(sizes)),
+                "maxChars": max(sizes),
+                "meanTokens": round(statistics.mean(tokens)),
+                "maxTokens": max(tokens),
+                "meanBuildMs": round(statistics.mean(build_ms), 3),
+            }
+    finally:
+        context_projection.PROJECTION_ENABLED = enabled
+    report["tokenReduction"] = round(
+        1 - report["projected"]["meanTokens"] / report["full"]["meanTokens"], 4
+    )
+    return report
+
+
+def measure_end_to_end(records: list[dict], question: str) -> dict:
+    """Mean ``generate`` latency per mode; calls the configured LLM for every record."""
+    from app.llm import context_projection
+    from app.llm.client import generate
+
+    enabled = context_projection.PROJECTION_ENABLED
+    report = {}
+    try:
+        for mode, flag in (("full", False), ("projected", True)):
+            context_projection.PROJECTION_ENABLED = flag
+            latencies = []
+            for record in records:
+                message = f"{question} {record['applicationId']}"
+                started = time.perf_counter()
+                generate(f"User: {message}\nAssistant:", message, session_id=f"measure-{mode}")
+                latencies.append((time.perf_counter() - started) * 1000)
+            report[mode] = {"meanLatencyMs": round(statistics.mean(latencies), 1)}
+    finally:
+        context_projection.PROJECTION_ENABLED = enabled
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.llm.tools.application_record_lookup_tool import DATA_FILE
+    from app.llm.tools.application_record_store import ApplicationRecordStore, convert_csv_to_store
+
+    parser = argparse.ArgumentParser(
+        description="Measure LLM context size with and without projection."
+    )
+    parser.add_argument("--csv", default=str(DATA_FILE), help="Application outcomes CSV to sample")
+    parser.add_argument("--limit", type=int, default=50, help="Records to measure")
+    parser.add_argument("--question", default="Why was my application declined?")
+    parser.add_argument(
+        "--llm",
+        action="store_true",
+        help="Also time end-to-end answers (calls the LLM; set LLM_CACHE_MAX_ENTRIES=0)",
+    )
+    args = parser.parse_args(argv)
+    served = os.path.realpath(args.csv) == os.path.realpath(DATA_FILE)
+    if args.llm and not served:
+        parser.error("--llm answers from the served application index; drop --csv")
+
+    with open(args.csv, newline="", encoding="utf-8") as handle:
+        records = [row for _, row in zip(range(args.limit), csv.DictReader(handle))]
+    if served:
+        report = {"context": measure_projection(records, args.question)}
+    else:
+        # Other files are looked up in a throwaway store built like the served one.
+        with tempfile.TemporaryDirectory() as store_dir:
+            store_path = os.path.join(store_dir, "applications.duckdb")
+            convert_csv_to_store(args.csv, store_path)
+            store = ApplicationRecordStore(store_path)
+            try:
+                report = {"context": measure_projection(records, args.question, store)}
+            finally:
+                store.close()
+    if args.llm:
+        report["endToEnd"] = measure_end_to_end(records, args.question)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import logging
+import math
+import os
+import re
+import time
+
+from app.globals import curr_dir
+
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT_FILE = curr_dir / "llm" / "prompts" / "prompt.txt"
+# Rough characters-per-token ratio for English prompts; close enough for budgeting.
+CHARS_PER_TOKEN = 4
+# Line closing the stable prefix; session context such as the looked-up
+# application goes right before it, so the turns after it can change freely.
+CONVERSATION_HEADER = "CONVERSATION:"
+
+_APPLICATION_ID = re.compile(r"\bAPP_\d+\b")
+_RULE_ID = re.compile(r"\bD\d{3,4}\b", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def insert_prefix_context(prompt: str, context: str) -> str:
+    """
+    Put ``context`` at the end of the stable prefix of a window-built prompt,
+    after the system prompt and before the conversation. A prompt without the
+    prefix (e.g. a bare question) gets it in front.
+    """
+    marker = f"\n{CONVERSATION_HEADER}\n"
+    idx = prompt.find(marker)
+    if idx == -1:
+        return "\n".join([context, "", prompt])
+    return "".join([prompt[:idx], "\n", context, prompt[idx:]])
+
+
+def _gist(text: str, max_chars: int) -> str:
+    """First sentence of ``text`` on one line, cut to ``max_chars``."""
+    flat = " ".join((text or "").split())
+    first = _SENTENCE_END.split(flat, maxsplit=1)[0]
+    return first if len(first) <= max_chars else first[: max_chars - 3].rstrip() + "..."
+
+
+class ConversationWindow:
+    """
+    Token-budgeted prompt builder for a chat history.
+
+    The prompt is a stable prefix (the system prompt, then session context
+    added with ``insert_prefix_context``, then a summary of compacted turns)
+    followed by a sliding window of the most recent turns.
+    Turns that no longer fit the window are compacted into one-line gists,
+    and the application and rule ids they mention are carried over, so tool
+    routing still sees them. The window boundary only moves in steps of
+    ``compaction_step`` messages, which keeps the summary, and with it the
+    prompt prefix, unchanged across most turns.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        max_prompt_tokens: int | None = None,
+        summary_share: float = 0.25,
+        compaction_step: int = 8,
+        gist_chars: int = 160,
+    ):
+        self.system_prompt = system_prompt
+        self.max_prompt_tokens = max_prompt_tokens or int(
+            os.getenv("CHAT_PROMPT_TOKEN_BUDGET", "6000")
+        )
+        self.summary_share = summary_share
+        self.compaction_step = max(compaction_step, 1)
+        self.gist_chars = gist_chars
+
+    @staticmethod
+    def _turn_line(message: dict) -> str | None:
+        role = message.get("role", "")
+        content = message.get("content", "")
+        if role == "user":
+            return f"User: {content}"
+        if role == "assistant":
+            return f"Assistant: {content}"
+        return None
+
+    def _window_start(self, lines: list[str], budget: int) -> int:
+        """Index of the oldest message kept verbatim; the latest message is always kept."""
+        start = len(lines)
+        used = 0
+        while start > 0:
+            cost = estimate_tokens(lines[start - 1]) + 1
+            if start < len(lines) and used + cost > budget:
+                break
+            used += cost
+            start -= 1
+        if start == 0:
+            return 0
+        # Move the boundary forward to a step multiple, so it changes in steps.
+        aligned = math.ceil(start / self.compaction_step) * self.compaction_step
+        return min(aligned, len(lines) - 1)
+
+    def _summary(self, messages: list[dict], budget: int) -> str:
+        if not messages:
+            return ""
+        gists = []
+        for message in messages:
+            line = self._turn_line(message)
+            if line is not None:
+                role, _, content = line.partition(": ")
+                gists.append(f"- {role}: {_gist(content, self.gist_chars)}")
+        text = " ".join(str(message.get("content", "")) for message in messages)
+        application_ids = list(dict.fromkeys(_APPLICATION_ID.findall(text)))
+        rule_ids = list(dict.fromkeys(rule_id.upper() for rule_id in _RULE_ID.findall(text)))
+
+        header = [f"CONVERSATION SUMMARY ({len(messages)} earlier messages):"]
+        if application_ids:
+            header.append("Applications discussed: " + ", ".join(application_ids))
+        if rule_ids:
+            header.append("Rules discussed: " + ", ".join(rule_ids))
+        # The newest gists are kept when the summary itself is over budget.
+        used = sum(estimate_tokens(line) + 1 for line in header)
+        kept: list[str] = []
+        for gist in reversed(gists):
+            cost = estimate_tokens(gist) + 1
+            if used + cost > budget:
+                kept.append(f"- ({len(gists) - len(kept)} older messages omitted)")
+                break
+            kept.append(gist)
+            used += cost
+        return "\n".join(header + list(reversed(kept)))
+
+    def build_prompt(self, history: list[dict]) -> str:
+        """
+        Build the prompt for the next assistant turn.
+        Args:
+            history (list[dict]): Chat messages with ``role`` and ``content``.
+        Returns:
+            str: System prompt, ``CONVERSATION_HEADER``, summary of compacted turns,
+            recent turns and the ``Assistant:`` cue.
+        """
+        started = time.perf_counter()
+        messages = [message for message in history if self._turn_line(message) is not None]
+        lines = [self._turn_line(message) for message in messages]
+
+        prefix_tokens = (
+            estimate_tokens(self.system_prompt) + estimate_tokens(CONVERSATION_HEADER) + 3
+        )
+        summary_budget = int(self.max_prompt_tokens * self.summary_share)
+        window_budget = max(self.max_prompt_tokens - prefix_tokens - summary_budget, 0)
+        start = self._window_start(lines, window_budget)
+        summary = self._summary(messages[:start], summary_budget)
+
+        parts = [self.system_prompt, CONVERSATION_HEADER]
+        if summary:
+            parts.append(summary)
+        parts += lines[start:]
+        parts.append("Assistant:")  # cue the next response
+        prompt = "\n".join(parts)
+
+        logger.info(
+            "Conversation window built prompt_tokens~%d budget=%d messages=%d window=%d "
+            "summarized=%d prompt_chars=%d build_ms=%.2f",
+            estimate_tokens(prompt),
+            self.max_prompt_tokens,
+            len(messages),
+            len(messages) - start,
+            start,
+            len(prompt),
+            (time.perf_counter() - started) * 1000,
+        )
+        return prompt
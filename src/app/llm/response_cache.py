@@ -0,0 +1,226 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def prompt_key(prompt: str, model: str) -> str:
+    """SHA-256 of the model name and the prompt with whitespace runs collapsed."""
+    normalized = _WHITESPACE.sub(" ", prompt or "").strip()
+    return hashlib.sha256(f"{model}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of LLM responses keyed by normalized prompt hash and model.
+
+    A bounded in-process LRU sits in front of an optional SQLite file that
+    survives restarts. Entries expire ``ttl_s`` seconds after they were
+    written; the SQLite tier is kept under ``max_bytes`` of response text by
+    evicting the least recently used entries. Every entry remembers how long
+    the original call took, so hits can report the latency they saved.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_s: float = 86_400,
+        path: str | Path | None = None,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        # key -> (response, created_at, original latency in ms)
+        self._memory: OrderedDict[str, tuple[str, float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evicted = 0
+        self._saved_ms_total = 0.0
+
+        self._db = None
+        self._disk_bytes = 0
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "prompt_key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+                "size_bytes INTEGER NOT NULL, latency_ms REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+            )
+            expired = self._db.execute(
+                "DELETE FROM responses WHERE created_at < ?", [time.time() - ttl_s]
+            ).rowcount
+            self._db.commit()
+            self._disk_bytes = self._db.execute(
+                "SELECT coalesce(sum(size_bytes), 0) FROM responses"
+            ).fetchone()[0]
+            logger.info(
+                "LLM response cache opened path=%s purged_expired=%d size_bytes=%d",
+                path,
+                expired,
+                self._disk_bytes,
+            )
+
+    def _remember(self, key: str, entry: tuple[str, float, float]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _delete_disk(self, key: str) -> None:
+        if self._db is None:
+            return
+        row = self._db.execute(
+            "DELETE FROM responses WHERE prompt_key = ? RETURNING size_bytes", [key]
+        ).fetchone()
+        self._db.commit()
+        if row is not None:
+            self._disk_bytes -= row[0]
+
+    def _evict_disk(self) -> None:
+        """Drop least recently used rows until the SQLite tier fits in max_bytes."""
+        while self._disk_bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT prompt_key, size_bytes FROM responses ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                return
+            for key, size_bytes in rows:
+                self._db.execute("DELETE FROM responses WHERE prompt_key = ?", [key])
+                self._disk_bytes -= size_bytes
+                self._evicted += 1
+                if self._disk_bytes <= self.max_bytes:
+                    break
+
+    def _log_lookup(self, outcome: str, model: str, saved_ms: float | None = None) -> None:
+        logger.info(
+            "LLM cache %s model=%s saved_ms=%s hits=%d misses=%d saved_ms_total=%.1f",
+            outcome,
+            model,
+            f"{saved_ms:.1f}" if saved_ms is not None else "-",
+            self._memory_hits + self._disk_hits,
+            self._misses,
+            self._saved_ms_total,
+        )
+
+    def get(self, prompt: str, model: str) -> str | None:
+        """
+        Cached response for ``prompt`` on ``model``, or None on a miss.
+        Args:
+            prompt (str): Prompt as it would be sent.
+            model (str): Provider-qualified model name.
+        Returns:
+            str | None: The cached response text.
+        """
+        started = time.perf_counter()
+        key = prompt_key(prompt, model)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            tier = "memory"
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, created_at, latency_ms FROM responses WHERE prompt_key = ?",
+                    [key],
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1], row[2])
+                    tier = "disk"
+            if entry is not None and now - entry[1] > self.ttl_s:
+                self._memory.pop(key, None)
+                self._delete_disk(key)
+                self._expired += 1
+                entry = None
+            elif tier == "disk" and entry is not None:
+                self._db.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE prompt_key = ?", [now, key]
+                )
+                self._db.commit()
+            if entry is None:
+                self._misses += 1
+                self._log_lookup("miss", model)
+                return None
+
+            self._remember(key, entry)
+            if tier == "memory":
+                self._memory_hits += 1
+            else:
+                self._disk_hits += 1
+            saved_ms = max(entry[2] - (time.perf_counter() - started) * 1000, 0.0)
+            self._saved_ms_total += saved_ms
+            self._log_lookup(f"hit tier={tier}", model, saved_ms)
+            return entry[0]
+
+    def put(self, prompt: str, model: str, response: str, latency_ms: float) -> None:
+        """
+        Store the response of an uncached call.
+        Args:
+            prompt (str): Prompt that was sent.
+            model (str): Provider-qualified model name.
+            response (str): Response text.
+            latency_ms (float): How long the call took; reported as saved on later hits.
+        """
+        key = prompt_key(prompt, model)
+        now = time.time()
+        with self._lock:
+            self._remember(key, (response, now, latency_ms))
+            if self._db is None:
+                return
+            size_bytes = len(response.encode("utf-8"))
+            previous = self._db.execute(
+                "SELECT size_bytes FROM responses WHERE prompt_key = ?", [key]
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(prompt_key, model, response, created_at, accessed_at, size_bytes, latency_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [key, model, response, now, now, size_bytes, latency_ms],
+            )
+            self._disk_bytes += size_bytes - (previous[0] if previous else 0)
+            self._evict_disk()
+            self._db.commit()
+
+    def metrics(self) -> dict:
+        hits = self._memory_hits + self._disk_hits
+        lookups = hits + self._misses
+        return {
+            "entriesInMemory": len(self._memory),
+            "maxEntries": self.max_entries,
+            "persistent": self._db is not None,
+            "diskBytes": self._disk_bytes,
+            "maxBytes": self.max_bytes,
+            "ttlSeconds": self.ttl_s,
+            "memoryHits": self._memory_hits,
+            "diskHits": self._disk_hits,
+            "misses": self._misses,
+            "expired": self._expired,
+            "evicted": self._evicted,
+            "hitRatio": round(hits / lookups, 4) if lookups else None,
+            "savedLatencyMs": round(self._saved_ms_total, 3),
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -1,35 +1,69 @@
-import csv
 import json
+import os
 import re
 import logging
 
 from app.globals import curr_dir
+from app.llm import context_projection
+from app.llm.agents.decline_rule_explanation_agent import _load_decline_rule_index
+from app.llm.context_projection import (
+    compact_json,
+    projected_fields,
+    triggered_rule_ids,
+)
+from app.llm.conversation_window import insert_prefix_context
+from app.llm.tools.application_record_store import (
+    AppendedRecordStore,
+    ApplicationRecordStore,
+    convert_csv_to_store,
+    read_appended_records,
+)
+from app.reloadable_index import ReloadableIndex, SourceVersion, is_append
+from app.session_store import SESSION_STORE, current_session_id
 
 
 DATA_FILE = curr_dir.parent.parent / "data" / "sample_application_outcomes_realistic_complete.csv"
-_APPLICATION_INDEX = None
-_LAST_APPLICATION_CONTEXT = None
+STORE_FILE = DATA_FILE.with_suffix(".duckdb")
+# Rows appended to the CSV are served from memory until there are this many,
+# then folded into a rebuilt store.
+MAX_APPENDED_RECORDS = int(os.getenv("APPLICATION_INDEX_MAX_APPENDED", "50000"))
+# Session-store key of the application context last looked up in a chat session.
+LAST_APPLICATION_CONTEXT_KEY = "lastApplicationContext"
 logger = logging.getLogger(__name__)
 
 
-def _load_application_index():
-    global _APPLICATION_INDEX
-    if _APPLICATION_INDEX is not None:
-        logger.debug("Application index cache hit size=%d", len(_APPLICATION_INDEX))
-        return _APPLICATION_INDEX
+def _ends_with_row(size: int) -> bool:
+    with DATA_FILE.open("rb") as handle:
+        handle.seek(max(size - 1, 0))
+        return handle.read(1) == b"\n"
 
-    index = {}
-    logger.info("Loading application index from %s", DATA_FILE)
-    with DATA_FILE.open(newline="", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            app_id = row.get("applicationId")
-            if app_id:
-                index[app_id] = row
 
-    _APPLICATION_INDEX = index
-    logger.info("Application index loaded size=%d", len(_APPLICATION_INDEX))
-    return _APPLICATION_INDEX
+def _build_application_index(
+    previous, previous_version: SourceVersion | None, version: SourceVersion
+) -> tuple[ApplicationRecordStore | AppendedRecordStore, str]:
+    if previous is not None and is_append(DATA_FILE, previous_version):
+        base = previous.base if isinstance(previous, AppendedRecordStore) else previous
+        appended = dict(previous.appended) if isinstance(previous, AppendedRecordStore) else {}
+        appended.update(read_appended_records(DATA_FILE, previous_version.size, version.size))
+        if len(appended) <= MAX_APPENDED_RECORDS:
+            return AppendedRecordStore(base, appended), "incremental"
+
+    if previous is not None and not _ends_with_row(version.size):
+        # Rebuilding now would index a half-written file; the finished write retriggers.
+        raise ValueError(f"{DATA_FILE} ends mid-row; write still in progress")
+    # A store at least as new as the CSV is current, e.g. rebuilt by another worker.
+    if not STORE_FILE.exists() or STORE_FILE.stat().st_mtime_ns < version.mtime_ns:
+        logger.info("Application store missing or stale; converting %s", DATA_FILE)
+        convert_csv_to_store(DATA_FILE, STORE_FILE)
+    logger.info("Opening application store %s", STORE_FILE)
+    return ApplicationRecordStore(STORE_FILE), "full"
+
+
+APPLICATION_INDEX = ReloadableIndex("applications", DATA_FILE, _build_application_index)
+
+
+def _load_application_index() -> ApplicationRecordStore | AppendedRecordStore:
+    return APPLICATION_INDEX.get()
 
 
 def extract_application_id(text: str) -> str | None:
@@ -50,10 +84,21 @@ def should_call_application_lookup(prompt: str) -> str | None:
     return extract_application_id(prompt)
 
 
-def lookup_application_record(app_id: str) -> str:
+def lookup_application_record(
+    app_id: str, index: ApplicationRecordStore | AppendedRecordStore | None = None
+) -> str:
+    """Look ``app_id`` up in ``index`` (the served application index by default)."""
     logger.info("Application lookup requested applicationId=%s", app_id)
-    index = _load_application_index()
-    record = index.get(app_id)
+    index = index if index is not None else _load_application_index()
+    if context_projection.PROJECTION_ENABLED:
+        # Read the reason codes first, then only the columns that explain them.
+        record = index.get(app_id, context_projection.DECISION_FIELDS)
+        if record:
+            rule_ids = triggered_rule_ids(record)
+            fields = projected_fields(rule_ids, _load_decline_rule_index(), index.columns)
+            record = index.get(app_id, fields)
+    else:
+        record = index.get(app_id)
     if not record:
         logger.warning("Application record not found applicationId=%s", app_id)
         payload = {
@@ -64,61 +109,62 @@ def lookup_application_record(app_id: str) -> str:
         _set_last_application_context(payload)
         return json.dumps(payload, ensure_ascii=True)
 
-    decision = {
-        "finalDecision": record.get("finalDecision"),
-        "decisionStage": record.get("decisionStage"),
-        "decisionTimestamp": record.get("decisionTimestamp"),
-    }
-    reason_codes = {
-        "primaryReasonCode": record.get("primaryReasonCode"),
-        "secondaryReasonCodes": record.get("secondaryReasonCodes"),
-        "customerFacingReasons": record.get("customerFacingReasons"),
-    }
-    facts = {
-        "applicantAge": record.get("applicantAge"),
-        "requestedLoanAmount": record.get("requestedLoanAmount"),
-        "approvedLoanAmount": record.get("approvedLoanAmount"),
-        "netMonthlyIncome": record.get("netMonthlyIncome"),
-        "debtServiceRatio": record.get("debtServiceRatio"),
-        "netSurplusMonthly": record.get("netSurplusMonthly"),
-        "bureauScore": record.get("bureauScore"),
-        "internalRiskScore": record.get("internalRiskScore"),
-        "riskGrade": record.get("riskGrade"),
-        "pd": record.get("pd"),
-        "monthsRemainingOnVisa": record.get("monthsRemainingOnVisa"),
-        "affordabilityPassFlag": record.get("affordabilityPassFlag"),
-    }
     payload = {
         "tool": "application_record_lookup",
         "status": "ok",
         "applicationId": app_id,
         "record": record,
-        # "decision": decision,
-        # "reason_codes": reason_codes,
-        # "facts": facts,
     }
     _set_last_application_context(payload)
-    logger.info("Application record found applicationId=%s", app_id)
+    logger.info("Application record found applicationId=%s fields=%d", app_id, len(record))
+    if context_projection.PROJECTION_ENABLED:
+        return compact_json(payload)
     return json.dumps(payload, indent=2, ensure_ascii=True)
 
 
-def apply_application_lookup(prompt: str, app_id: str) -> str:
+def apply_application_lookup(
+    prompt: str, app_id: str, index: ApplicationRecordStore | AppendedRecordStore | None = None
+) -> str:
     logger.debug("Applying application lookup to prompt appId=%s prompt_len=%d", app_id, len(prompt or ""))
-    tool_context = lookup_application_record(app_id)
-    lines = [
-        "ToolResult(application_record_lookup):",
-        tool_context,
-        "",
-        prompt,
-    ]
-    return "\n".join(lines)
+    tool_context = lookup_application_record(app_id, index)
+    # The application stays the same across a conversation's follow-ups, so it
+    # belongs to the prompt's stable prefix rather than in front of it.
+    return insert_prefix_context(
+        prompt, "\n".join(["ToolResult(application_record_lookup):", tool_context])
+    )
 
 
 def _set_last_application_context(payload: dict) -> None:
-    global _LAST_APPLICATION_CONTEXT
-    _LAST_APPLICATION_CONTEXT = payload
-    logger.debug("Last application context updated status=%s", payload.get("status"))
+    session_id = current_session_id()
+    SESSION_STORE.set(session_id, LAST_APPLICATION_CONTEXT_KEY, payload)
+    logger.debug(
+        "Last application context updated session=%s status=%s", session_id, payload.get("status")
+    )
 
 
 def get_last_application_context() -> dict | None:
-    return _LAST_APPLICATION_CONTEXT
+    """Application context last looked up in the calling chat session."""
+    return SESSION_STORE.get(current_session_id(), LAST_APPLICATION_CONTEXT_KEY)
+
+
+def get_application_context_for_rules(rule_ids: list[str]) -> dict | None:
+    """
+    The calling session's application context, with its record extended by
+    the fields of ``rule_ids`` when the projected record lacks them.
+    Args:
+        rule_ids (list[str]): Rules about to be explained, e.g. ones the user mentioned.
+    Returns:
+        dict | None: Application context as stored by the lookup, possibly widened.
+    """
+    context = get_last_application_context()
+    if not context or context.get("status") != "ok" or not context_projection.PROJECTION_ENABLED:
+        return context
+    record = context.get("record") or {}
+    index = _load_application_index()
+    fields = projected_fields(rule_ids, _load_decline_rule_index(), index.columns)
+    missing = [col for col in fields if col not in record]
+    if not missing:
+        return context
+    extra = index.get(context["applicationId"], missing) or {}
+    logger.debug("Application context widened rule_ids=%s fields=%d", rule_ids, len(extra))
+    return {**context, "record": {**record, **extra}}
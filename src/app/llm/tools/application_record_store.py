@@ -0,0 +1,208 @@
+import argparse
+import csv
+import io
+import logging
+import os
+import threading
+from pathlib import Path
+
+import duckdb
+
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "applications"
+KEY_COLUMN = "applicationId"
+
+
+def convert_csv_to_store(csv_path: str | Path, store_path: str | Path) -> int:
+    """
+    One-off conversion of an application outcomes CSV into a DuckDB store.
+    Every value is kept as text, exactly as the CSV holds it. Rows are sorted
+    by applicationId so DuckDB's per-row-group min/max statistics prune a
+    point lookup down to a single row group, and a unique index is built on
+    the key. Rows without an applicationId are skipped; for duplicate ids the
+    last row wins, as it did with the in-memory CSV index.
+    Args:
+        csv_path (str | Path): Source CSV file.
+        store_path (str | Path): DuckDB database file to (re)create.
+    Returns:
+        int: Number of application records written.
+    """
+    csv_path = Path(csv_path)
+    store_path = Path(store_path)
+    # Per-process temporary file, so workers rebuilding at once don't collide.
+    tmp_path = store_path.with_name(f"{store_path.name}.{os.getpid()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    logger.info("Converting application CSV %s to store %s", csv_path, store_path)
+    con = duckdb.connect(str(tmp_path))
+    try:
+        con.execute(
+            f"""
+            CREATE TABLE {TABLE_NAME} AS
+            SELECT * EXCLUDE (_row)
+            FROM (
+                SELECT *, row_number() OVER () AS _row
+                FROM read_csv(?, header = true, all_varchar = true)
+            )
+            WHERE coalesce({KEY_COLUMN}, '') <> ''
+            QUALIFY row_number() OVER (PARTITION BY {KEY_COLUMN} ORDER BY _row DESC) = 1
+            ORDER BY {KEY_COLUMN}
+            """,
+            [str(csv_path)],
+        )
+        con.execute(f"CREATE UNIQUE INDEX {TABLE_NAME}_{KEY_COLUMN} ON {TABLE_NAME} ({KEY_COLUMN})")
+        rows = con.execute(f"SELECT count(*) FROM {TABLE_NAME}").fetchone()[0]
+    finally:
+        con.close()
+
+    # Readers only ever see a complete store.
+    tmp_path.replace(store_path)
+    logger.info("Application store written rows=%d path=%s", rows, store_path)
+    return rows
+
+
+class ApplicationRecordStore:
+    """
+    Read-only, applicationId-keyed access to a DuckDB application store.
+
+    Opening the store reads no records. ``get`` runs a single keyed query and
+    materialises only the matching row (optionally only some of its columns)
+    into a dict.
+    """
+
+    def __init__(self, store_path: str | Path):
+        self.store_path = Path(store_path)
+        # The file is attached to a private in-memory database: DuckDB shares one
+        # instance per path within a process, which would keep serving the old
+        # file after a rebuild replaced it.
+        self._con = duckdb.connect()
+        quoted_path = str(self.store_path).replace("'", "''")
+        self._con.execute(f"ATTACH '{quoted_path}' AS store (READ_ONLY)")
+        self._table = f"store.{TABLE_NAME}"
+        self._lock = threading.Lock()
+        self.columns: list[str] = [
+            row[0] for row in self._con.execute(f"DESCRIBE {self._table}").fetchall()
+        ]
+        self._size: int = self._con.execute(f"SELECT count(*) FROM {self._table}").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, app_id: str, columns: list[str] | None = None) -> dict | None:
+        """
+        Fetch one application record.
+        Args:
+            app_id (str): applicationId to look up.
+            columns (list[str] | None): Columns to materialise, defaults to all.
+        Returns:
+            dict | None: Record keyed by column name with CSV text values, or None if absent.
+        """
+        selected = [col for col in columns if col in self.columns] if columns else self.columns
+        projection = ", ".join(f'"{col}"' for col in selected)
+        # Each lookup gets its own cursor so concurrent requests don't share one.
+        with self._lock:
+            cursor = self._con.cursor()
+        try:
+            row = cursor.execute(
+                f"SELECT {projection} FROM {self._table} WHERE {KEY_COLUMN} = ?", [app_id]
+            ).fetchone()
+        finally:
+            cursor.close()
+        if row is None:
+            return None
+        # The CSV has no nulls, only empty fields.
+        return {col: ("" if value is None else value) for col, value in zip(selected, row)}
+
+    def count_existing(self, app_ids: list[str]) -> int:
+        """Number of ``app_ids`` present in the store."""
+        if not app_ids:
+            return 0
+        with self._lock:
+            cursor = self._con.cursor()
+        try:
+            return cursor.execute(
+                f"SELECT count(*) FROM {self._table} WHERE {KEY_COLUMN} IN (SELECT unnest(?))",
+                [app_ids],
+            ).fetchone()[0]
+        finally:
+            cursor.close()
+
+    def close(self) -> None:
+        self._con.close()
+
+
+def read_appended_records(
+    csv_path: str | Path, offset: int, end: int | None = None
+) -> dict[str, dict]:
+    """
+    Parse the rows appended to an outcomes CSV between byte ``offset`` and ``end``.
+    Values are kept as text, like the store keeps them; for duplicate ids the
+    last row wins.
+    Args:
+        csv_path (str | Path): Application outcomes CSV.
+        offset (int): File size when the rows before it were indexed.
+        end (int | None): File size to read up to, defaults to the end of the file.
+    Returns:
+        dict[str, dict]: Appended records by applicationId.
+    """
+    with Path(csv_path).open("rb") as handle:
+        header = next(csv.reader([handle.readline().decode("utf-8")]))
+        handle.seek(offset)
+        tail = handle.read(-1 if end is None else end - offset)
+    if not tail.endswith(b"\n"):
+        # Parsing now would index a half-written row; the finished write retriggers.
+        raise ValueError(f"{csv_path} ends mid-row; append still in progress")
+
+    records: dict[str, dict] = {}
+    for row in csv.reader(io.StringIO(tail.decode("utf-8"), newline="")):
+        if not row:
+            continue
+        record = dict(zip(header, row + [""] * (len(header) - len(row))))
+        app_id = record.get(KEY_COLUMN, "")
+        if app_id:
+            records[app_id] = record
+    return records
+
+
+class AppendedRecordStore:
+    """
+    An application store plus records appended to its CSV since it was built.
+
+    Appended records are held in memory and take precedence over the store,
+    matching the last-row-wins rule of ``convert_csv_to_store``. The interface
+    is the same as ``ApplicationRecordStore``.
+    """
+
+    def __init__(self, base: ApplicationRecordStore, appended: dict[str, dict]):
+        self.base = base
+        self.appended = appended
+        self.store_path = base.store_path
+        self.columns = base.columns
+        self._size = len(base) + len(appended) - base.count_existing(list(appended))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, app_id: str, columns: list[str] | None = None) -> dict | None:
+        record = self.appended.get(app_id)
+        if record is None:
+            return self.base.get(app_id, columns)
+        selected = [col for col in columns if col in self.columns] if columns else self.columns
+        return {col: record.get(col, "") for col in selected}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Convert an outcomes CSV into an application store.")
+    parser.add_argument("csv_path", help="Application outcomes CSV")
+    parser.add_argument("store_path", help="DuckDB store file to create")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    rows = convert_csv_to_store(args.csv_path, args.store_path)
+    print(f"rows={rows} store={args.store_path}")
+
+
+if __name__ == "__main__":
+    main()
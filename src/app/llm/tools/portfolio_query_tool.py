@@ -0,0 +1,497 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+import duckdb
+
+from app.globals import curr_dir
+from app.llm.context_projection import compact_json
+
+
+logger = logging.getLogger(__name__)
+
+# Decision files the queries run over: a CSV, a Parquet file, or a Parquet glob
+# such as the audit store's "data/audit/**/*.parquet".
+SOURCE = os.getenv(
+    "PORTFOLIO_QUERY_SOURCE",
+    str(curr_dir.parent.parent / "data" / "sample_application_outcomes_realistic_complete.csv"),
+)
+# Most rows a result may have; longer breakdowns are cut and flagged as truncated.
+MAX_RESULT_ROWS = int(os.getenv("PORTFOLIO_QUERY_MAX_ROWS", "20"))
+# Averages and medians over fewer applications than this are withheld, so an
+# aggregate never stands in for one applicant's record.
+MIN_GROUP_SIZE = int(os.getenv("PORTFOLIO_QUERY_MIN_GROUP_SIZE", "5"))
+CACHE_TTL_S = float(os.getenv("PORTFOLIO_QUERY_CACHE_TTL_S", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("PORTFOLIO_QUERY_CACHE_MAX_ENTRIES", "256"))
+# Day that relative periods ("last week") end on; today when unset.
+AS_OF = os.getenv("PORTFOLIO_QUERY_AS_OF", "")
+
+VIEW_NAME = "decisions"
+TIME_COLUMNS: tuple[str, ...] = ("decidedAt", "decisionTimestamp")
+
+# Numeric columns the templates may aggregate, with the words users call them by.
+METRIC_COLUMNS: dict[str, list[str]] = {
+    "debtServiceRatio": ["dsr", "debt service ratio", "debt-service ratio"],
+    "netMonthlyIncome": ["net monthly income", "monthly income", "income"],
+    "netSurplusMonthly": ["net surplus", "surplus"],
+    "requestedLoanAmount": ["requested loan amount", "requested amount", "loan amount"],
+    "approvedLoanAmount": ["approved loan amount", "approved amount"],
+    "bureauScore": ["bureau score", "credit score"],
+    "internalRiskScore": ["internal risk score", "risk score"],
+    "pd": ["probability of default", "pd"],
+    "applicantAge": ["applicant age", "age"],
+    "monthsRemainingOnVisa": ["months remaining on visa", "visa months", "visa"],
+}
+# Columns results may be broken down by.
+SEGMENT_COLUMNS: dict[str, list[str]] = {
+    "riskGrade": ["risk grade", "grade"],
+    "productType": ["product type", "product"],
+    "residentialState": ["residential state", "state"],
+    "customerType": ["customer type"],
+    "decisionStage": ["decision stage", "stage", "module"],
+    "primaryReasonCode": ["primary reason code", "reason code", "reason", "rule"],
+}
+STAGES: tuple[str, ...] = ("eligibility", "bureau", "servicing", "decision")
+
+# WHERE clause fragments, one per filter parameter; values are always bound.
+FILTERS: dict[str, str] = {
+    "since": "decidedAt >= CAST($since AS TIMESTAMPTZ)",
+    "until": "decidedAt < CAST($until AS TIMESTAMPTZ)",
+    "finalDecision": "finalDecision = $finalDecision",
+    "decisionStage": "decisionStage = $decisionStage",
+    "ruleId": "list_contains(policyRuleIdsTriggered, $ruleId)",
+}
+
+
+class QueryTemplate(NamedTuple):
+    description: str
+    # {metric} and {segment} are filled from METRIC_COLUMNS / SEGMENT_COLUMNS only;
+    # {filters} from FILTERS. Values are bound as $parameters.
+    sql: str
+    needs_metric: bool = False
+
+
+TEMPLATES: dict[str, QueryTemplate] = {
+    "decision_counts": QueryTemplate(
+        "Applications by final decision, optionally by segment",
+        "SELECT {segment_select} finalDecision, count(*) AS applications FROM decisions {filters} "
+        "GROUP BY ALL ORDER BY applications DESC LIMIT $limit",
+    ),
+    "decision_rates": QueryTemplate(
+        "Applications and approval/decline rates, optionally by segment",
+        "SELECT {segment_select} count(*) AS applications, "
+        "avg(CASE WHEN finalDecision = 'APPROVED' THEN 1 ELSE 0 END) AS approvalRate, "
+        "avg(CASE WHEN finalDecision = 'DECLINED' THEN 1 ELSE 0 END) AS declineRate "
+        "FROM decisions {filters} {group_by} ORDER BY applications DESC LIMIT $limit",
+    ),
+    "metric_summary": QueryTemplate(
+        "Average and median of a numeric field, optionally by segment",
+        "SELECT {segment_select} count(*) AS applications, "
+        "count({metric}) AS withValue, avg({metric}) AS average, median({metric}) AS median "
+        "FROM decisions {filters} {group_by} ORDER BY applications DESC LIMIT $limit",
+        needs_metric=True,
+    ),
+    "top_reasons": QueryTemplate(
+        "Most frequent primary reason codes of declines",
+        "SELECT primaryReasonCode, count(*) AS applications FROM decisions {filters} "
+        "GROUP BY primaryReasonCode ORDER BY applications DESC, primaryReasonCode LIMIT $limit",
+    ),
+}
+
+_RULE_ID = re.compile(r"\bD\d{3,4}\b", re.IGNORECASE)
+_EXPLICIT_ID = re.compile(r"\bAPP_\d+\b")
+_AGGREGATE_CUES = re.compile(
+    r"\b(?:how many|number of|count|total|average|avg|mean|median|rate|ratio of|percentage"
+    r"|share|proportion|breakdown|top|most common|most frequent|distribution)\b",
+    re.IGNORECASE,
+)
+_LAST_N = re.compile(r"\b(?:last|past|previous)\s+(\d{1,3})\s+(day|week|month)s?\b", re.IGNORECASE)
+_SINCE = re.compile(r"\bsince\s+(\d{4}-\d{2}-\d{2})\b", re.IGNORECASE)
+_BY_SEGMENT = re.compile(r"\b(?:by|per|for each|across)\s+([a-z][a-z -]*)", re.IGNORECASE)
+
+
+def _quote(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _as_of() -> date:
+    return date.fromisoformat(AS_OF) if AS_OF else date.today()
+
+
+def _find_synonym(text: str, columns: dict[str, list[str]]) -> str | None:
+    """Column whose synonym appears earliest in ``text``; longer synonyms win ties."""
+    best = None
+    for column, synonyms in columns.items():
+        for synonym in synonyms:
+            match = re.search(rf"\b{re.escape(synonym)}\b", text)
+            if match and (best is None or (match.start(), -len(synonym)) < best[0]):
+                best = ((match.start(), -len(synonym)), column)
+    return best[1] if best else None
+
+
+def _period(text: str, today: date) -> dict:
+    """``since``/``until`` ISO timestamps for the period named in ``text``, if any."""
+    tomorrow = today + timedelta(days=1)
+    match = _LAST_N.search(text)
+    if match:
+        days = int(match.group(1)) * {"day": 1, "week": 7, "month": 30}[match.group(2).lower()]
+        return {"since": str(tomorrow - timedelta(days=days)), "until": str(tomorrow)}
+    match = _SINCE.search(text)
+    if match:
+        return {"since": match.group(1), "until": str(tomorrow)}
+    if "yesterday" in text:
+        return {"since": str(today - timedelta(days=1)), "until": str(today)}
+    if "today" in text:
+        return {"since": str(today), "until": str(tomorrow)}
+    if "this week" in text:
+        return {"since": str(today - timedelta(days=today.weekday())), "until": str(tomorrow)}
+    if "this month" in text:
+        return {"since": str(today.replace(day=1)), "until": str(tomorrow)}
+    for phrase, days in (("week", 7), ("month", 30), ("year", 365)):
+        if re.search(rf"\b(?:last|past|previous)\s+{phrase}\b", text):
+            return {"since": str(tomorrow - timedelta(days=days)), "until": str(tomorrow)}
+    return {}
+
+
+def match_portfolio_query(message: str) -> dict | None:
+    """
+    Map an aggregate question to a template and its parameters, without an LLM.
+    Questions about one application (an ``APP_`` id) or without an aggregate
+    cue ("how many", "average", "top", "rate", ...) are not portfolio questions.
+    Args:
+        message (str): The user's message.
+    Returns:
+        dict | None: ``template``, ``params`` and optional ``metric``/``segment``, or None.
+    """
+    text = (message or "").lower()
+    if _EXPLICIT_ID.search(message or "") or not _AGGREGATE_CUES.search(text):
+        return None
+
+    params = _period(text, _as_of())
+    rule = _RULE_ID.search(message)
+    if rule:
+        params["ruleId"] = rule.group(0).upper()
+    if re.search(r"\b(?:declin\w*|reject\w*|denied|refus\w*|fail\w*)\b", text):
+        params["finalDecision"] = "DECLINED"
+    elif re.search(r"\b(?:approv\w*|accept\w*)\b", text):
+        params["finalDecision"] = "APPROVED"
+    stage = next((s for s in STAGES if re.search(rf"\b{s}\b", text) and s != "decision"), None)
+    if stage:
+        params["decisionStage"] = stage
+
+    segment = None
+    by = _BY_SEGMENT.search(text)
+    if by:
+        segment = _find_synonym(by.group(1), SEGMENT_COLUMNS)
+    metric = _find_synonym(text, METRIC_COLUMNS)
+    if re.search(r"\b(?:average|avg|mean|median)\b", text) and metric:
+        return {"template": "metric_summary", "params": params, "metric": metric, "segment": segment}
+    if re.search(r"\b(?:top|most common|most frequent|main)\b", text) and "reason" in text:
+        params.setdefault("finalDecision", "DECLINED")
+        return {"template": "top_reasons", "params": params}
+    if re.search(r"\b(?:rate|percentage|share|proportion)\b", text):
+        rate_params = {k: v for k, v in params.items() if k != "finalDecision"}
+        return {"template": "decision_rates", "params": rate_params, "segment": segment}
+    return {"template": "decision_counts", "params": params, "segment": segment}
+
+
+class PortfolioQueryEngine:
+    """
+    Runs whitelisted aggregate query templates with DuckDB over decision files.
+
+    The files are exposed as one ``decisions`` view with canonical column
+    names (``decidedAt`` for the decision time, ``policyRuleIdsTriggered`` as a
+    list), on a private in-memory connection. Results are cached by template,
+    parameters and the files' sizes and modification times for ``cache_ttl_s``
+    seconds, hold at most ``max_rows`` rows, and withhold averages of groups
+    smaller than ``min_group_size``.
+    """
+
+    def __init__(
+        self,
+        source: str | Path = SOURCE,
+        max_rows: int = MAX_RESULT_ROWS,
+        min_group_size: int = MIN_GROUP_SIZE,
+        cache_ttl_s: float = CACHE_TTL_S,
+        cache_max_entries: int = CACHE_MAX_ENTRIES,
+    ):
+        self.source = str(source)
+        self.max_rows = max_rows
+        self.min_group_size = min_group_size
+        self.cache_ttl_s = cache_ttl_s
+        self.cache_max_entries = cache_max_entries
+        self._con = duckdb.connect()
+        self._lock = threading.Lock()
+        # (template, params, source state) -> (stored at, payload)
+        self._cache: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self._view_state: tuple | None = None
+        self.columns: list[str] = []
+        self._has_time = False
+        self._hits = 0
+        self._misses = 0
+        self._queries = 0
+        self._query_ms_total = 0.0
+
+    def _files(self) -> list[str]:
+        return sorted(glob.glob(self.source, recursive=True))
+
+    def _source_state(self) -> tuple:
+        state = []
+        for path in self._files():
+            stat = os.stat(path)
+            state.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(state)
+
+    def _reader(self) -> str:
+        if self.source.lower().endswith(".csv"):
+            return f"read_csv({_quote(self.source)}, header = true, sample_size = -1)"
+        return (
+            f"read_parquet({_quote(self.source)}, hive_partitioning = true, union_by_name = true)"
+        )
+
+    def _create_view(self) -> None:
+        """(Re)define the ``decisions`` view over the source's current schema."""
+        described = self._con.execute(f"DESCRIBE SELECT * FROM {self._reader()}").fetchall()
+        types = {row[0]: row[1] for row in described}
+        time_column = next((col for col in TIME_COLUMNS if col in types), None)
+        selected = [
+            f'CAST("{time_column}" AS TIMESTAMPTZ) AS decidedAt'
+            if time_column
+            else "CAST(NULL AS TIMESTAMPTZ) AS decidedAt"
+        ]
+        triggered = types.get("policyRuleIdsTriggered")
+        if triggered == "VARCHAR":
+            # CSV outcomes hold the list as JSON text.
+            selected.append(
+                """from_json("policyRuleIdsTriggered", '["VARCHAR"]') AS policyRuleIdsTriggered"""
+            )
+        elif triggered:
+            selected.append('"policyRuleIdsTriggered"')
+        else:
+            selected.append("CAST([] AS VARCHAR[]) AS policyRuleIdsTriggered")
+        for col in ["finalDecision", *SEGMENT_COLUMNS]:
+            if col in types:
+                selected.append(f'CAST("{col}" AS VARCHAR) AS "{col}"')
+        for col in METRIC_COLUMNS:
+            if col in types:
+                selected.append(f'TRY_CAST("{col}" AS DOUBLE) AS "{col}"')
+        self._con.execute(
+            f"CREATE OR REPLACE VIEW {VIEW_NAME} AS SELECT {', '.join(selected)} "
+            f"FROM {self._reader()}"
+        )
+        self.columns = ["decidedAt", "policyRuleIdsTriggered"] + [
+            col for col in ["finalDecision", *SEGMENT_COLUMNS, *METRIC_COLUMNS] if col in types
+        ]
+        self._has_time = time_column is not None
+        logger.info(
+            "Portfolio query view defined source=%s files=%d columns=%d",
+            self.source,
+            len(self._files()),
+            len(self.columns),
+        )
+
+    def _sql(self, template: QueryTemplate, params: dict, metric, segment) -> str:
+        clauses = [FILTERS[name] for name in FILTERS if name in params]
+        return template.sql.format(
+            metric=f'"{metric}"' if metric else "NULL",
+            segment_select=f'"{segment}" AS "{segment}",' if segment else "",
+            group_by=f'GROUP BY "{segment}"' if segment else "",
+            filters=f"WHERE {' AND '.join(clauses)}" if clauses else "",
+        )
+
+    def _validate(self, name: str, params: dict, metric, segment) -> str | None:
+        """Why the request cannot run, or None when it can."""
+        if name not in TEMPLATES:
+            return f"Unknown query template: {name}"
+        unknown = [key for key in params if key not in FILTERS]
+        if unknown:
+            return f"Unknown parameters: {unknown}"
+        if TEMPLATES[name].needs_metric and metric not in METRIC_COLUMNS:
+            return f"Not an aggregatable field: {metric}"
+        if segment is not None and segment not in SEGMENT_COLUMNS:
+            return f"Not a segment field: {segment}"
+        missing = [col for col in (metric, segment) if col and col not in self.columns]
+        if missing:
+            return f"Fields not available in the decision data: {missing}"
+        if ("since" in params or "until" in params) and not self._has_time:
+            return "The decision data has no decision time"
+        return None
+
+    def run(
+        self,
+        name: str,
+        params: dict | None = None,
+        metric: str | None = None,
+        segment: str | None = None,
+    ) -> dict:
+        """
+        Run one query template.
+        Args:
+            name (str): Key of TEMPLATES.
+            params (dict | None): Filter values keyed by FILTERS names.
+            metric (str | None): METRIC_COLUMNS field, for templates that aggregate one.
+            segment (str | None): SEGMENT_COLUMNS field to break the result down by.
+        Returns:
+            dict: Tool payload: ``status`` ("ok", "unsupported" or "error"), the query,
+                ``columns`` and ``rows`` (lists), ``truncated`` and ``cached``.
+        """
+        params = dict(params or {})
+        source_state = self._source_state()
+        key = (name, tuple(sorted(params.items())), metric, segment, source_state)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and now - entry[0] <= self.cache_ttl_s:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return {**entry[1], "cached": True}
+            self._misses += 1
+            if self._view_state != source_state:
+                self._create_view()
+                self._view_state = source_state
+            problem = self._validate(name, params, metric, segment)
+            cursor = None if problem else self._con.cursor()
+
+        payload = {
+            "tool": "portfolio_query",
+            "template": name,
+            "description": TEMPLATES[name].description if name in TEMPLATES else None,
+            "filters": params,
+            "metric": metric,
+            "segment": segment,
+        }
+        if problem:
+            logger.info("Portfolio query unsupported template=%s reason=%s", name, problem)
+            return {**payload, "status": "unsupported", "message": problem, "cached": False}
+
+        started = time.perf_counter()
+        try:
+            result = cursor.execute(
+                self._sql(TEMPLATES[name], params, metric, segment),
+                {**params, "limit": self.max_rows + 1},
+            )
+            columns = [column[0] for column in result.description]
+            rows = result.fetchmany(self.max_rows + 1)
+        except duckdb.Error as exc:
+            logger.exception("Portfolio query failed template=%s", name)
+            return {**payload, "status": "error", "message": str(exc), "cached": False}
+        finally:
+            cursor.close()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._queries += 1
+        self._query_ms_total += elapsed_ms
+
+        rows = [self._publishable(dict(zip(columns, row))) for row in rows]
+        payload.update(
+            {
+                "status": "ok",
+                "columns": columns,
+                "rows": [[row[col] for col in columns] for row in rows[: self.max_rows]],
+                "truncated": len(rows) > self.max_rows,
+                "minGroupSize": self.min_group_size,
+            }
+        )
+        logger.info(
+            "Portfolio query template=%s rows=%d truncated=%s query_ms=%.1f",
+            name,
+            len(payload["rows"]),
+            payload["truncated"],
+            elapsed_ms,
+        )
+        with self._lock:
+            self._cache[key] = (now, payload)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+        return {**payload, "cached": False}
+
+    def _publishable(self, row: dict) -> dict:
+        """Round values, and withhold averages of groups below the minimum size."""
+        small = row.get("withValue", row.get("applications", 0)) < self.min_group_size
+        published = {}
+        for col, value in row.items():
+            if small and col in ("average", "median", "approvalRate", "declineRate"):
+                value = None
+            elif isinstance(value, float):
+                value = round(value, 4)
+            published[col] = value
+        return published
+
+    def metrics(self) -> dict:
+        return {
+            "source": self.source,
+            "cacheEntries": len(self._cache),
+            "cacheHits": self._hits,
+            "cacheMisses": self._misses,
+            "queries": self._queries,
+            "meanQueryMs": (
+                round(self._query_ms_total / self._queries, 3) if self._queries else None
+            ),
+        }
+
+
+_ENGINE: PortfolioQueryEngine | None = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def _portfolio_engine() -> PortfolioQueryEngine:
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = PortfolioQueryEngine()
+        return _ENGINE
+
+
+def portfolio_query_metrics() -> dict | None:
+    return _ENGINE.metrics() if _ENGINE is not None else None
+
+
+def should_call_portfolio_query(prompt: str) -> dict | None:
+    return match_portfolio_query(prompt)
+
+
+def run_portfolio_query(query: dict) -> str:
+    """Compact JSON tool result for a ``match_portfolio_query`` match."""
+    payload = _portfolio_engine().run(
+        query["template"], query.get("params"), query.get("metric"), query.get("segment")
+    )
+    return compact_json(payload)
+
+
+def apply_portfolio_query(prompt: str, query: dict) -> str:
+    logger.debug("Applying portfolio query template=%s", query["template"])
+    lines = [
+        "ToolResult(portfolio_query):",
+        run_portfolio_query(query),
+        "",
+        prompt,
+    ]
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Answer an aggregate question from decision files.")
+    parser.add_argument("question", help='e.g. "how many D1001 declines last week"')
+    parser.add_argument("--source", default=SOURCE, help="Decision CSV, Parquet file or glob")
+    args = parser.parse_args(argv)
+
+    query = match_portfolio_query(args.question)
+    if query is None:
+        raise SystemExit("Not an aggregate question.")
+    engine = PortfolioQueryEngine(args.source)
+    arguments = (query["template"], query.get("params"), query.get("metric"), query.get("segment"))
+    result = engine.run(*arguments)
+    repeat = engine.run(*arguments)
+    print(json.dumps({"query": query, "result": result, "repeatCached": repeat["cached"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
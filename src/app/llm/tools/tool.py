@@ -1,20 +1,62 @@
+import asyncio
 import logging
 
 from app.llm.tools.application_record_lookup_tool import (
     apply_application_lookup,
     extract_application_id,
     should_call_application_lookup,
+    get_application_context_for_rules,
     get_last_application_context
 )
 from app.llm.agents.decline_rule_explanation_agent import (
     apply_decline_rule_explanation_agent,
+    apply_decline_rule_guidance,
+    request_decline_rule_guidance_async,
     should_call_decline_rule_explanation_agent,
 )
-from app.llm.agents.tool_routing_agent import run_tool_routing_agent
+from app.llm.agents.intent_router import route_intent
+from app.llm.context_projection import extract_rule_ids
+from app.llm.tools.portfolio_query_tool import apply_portfolio_query, should_call_portfolio_query
+from app.llm.agents.tool_routing_agent import run_tool_routing_agent, run_tool_routing_agent_async
 
 logger = logging.getLogger(__name__)
 
-def _agent_fallback_tool_check(prompt: str, llm_call) -> str | None:
+def _route_locally(prompt: str, user_input) -> dict:
+    """Local intent routing on the current message, with the last application as memory."""
+    context = get_last_application_context()
+    last_app_id = None
+    if context and context.get("status") == "ok":
+        last_app_id = context.get("applicationId")
+    routed = route_intent(user_input or prompt, last_app_id)
+    logger.info(
+        "Local intent router stage=%s applicationId=%s escalate=%s",
+        routed["stage"],
+        routed["applicationId"],
+        routed["escalate"],
+    )
+    return routed
+
+
+def _portfolio_query(prompt: str, user_input) -> dict | None:
+    """Portfolio query for the current message, unless it names an application."""
+    message = user_input or prompt
+    if extract_application_id(message):
+        return None
+    query = should_call_portfolio_query(message)
+    if query:
+        logger.info("Portfolio query triggered template=%s", query["template"])
+    return query
+
+
+def _decline_application_data(user_prompt: str) -> dict | None:
+    """Last application context, including the fields of any rule the user mentions."""
+    return get_application_context_for_rules(extract_rule_ids(user_prompt))
+
+
+def _agent_fallback_tool_check(prompt: str, llm_call, user_input=None) -> str | None:
+    routed = _route_locally(prompt, user_input)
+    if not routed["escalate"]:
+        return routed["applicationId"]
     logger.debug("Running tool routing agent fallback")
     app_id = run_tool_routing_agent(prompt, llm_call)
     if isinstance(app_id, str) and extract_application_id(app_id) == app_id:
@@ -33,15 +75,20 @@ def enrich_prompt_with_tools(prompt: str, user_input, llm_call=None) -> str:
         logger.info("Application lookup triggered applicationId=%s", app_id)
         enriched_prompt = apply_application_lookup(user_prompt, app_id)
 
-    if not app_id:
-        fallback_app_id = _agent_fallback_tool_check(user_prompt, llm_call)
+    # TOOL 2 - Portfolio Query
+    portfolio_query = _portfolio_query(user_prompt, user_input)
+    if portfolio_query:
+        enriched_prompt = apply_portfolio_query(enriched_prompt, portfolio_query)
+
+    if not app_id and not portfolio_query:
+        fallback_app_id = _agent_fallback_tool_check(user_prompt, llm_call, user_input)
         if fallback_app_id:
             logger.info("Application lookup via fallback applicationId=%s", fallback_app_id)
             enriched_prompt = apply_application_lookup(user_prompt, fallback_app_id)
 
     if should_call_decline_rule_explanation_agent(user_prompt):
         logger.info("Decline rule explanation agent triggered")
-        application_data = get_last_application_context()
+        application_data = _decline_application_data(user_prompt)
         enriched_prompt = apply_decline_rule_explanation_agent(
             enriched_prompt, user_prompt, llm_call, application_data, user_input
         )
@@ -49,3 +96,105 @@ def enrich_prompt_with_tools(prompt: str, user_input, llm_call=None) -> str:
         logger.debug("Decline rule explanation agent not triggered")
 
     return enriched_prompt
+
+
+async def _agent_fallback_tool_check_async(prompt: str, llm_call, user_input=None) -> str | None:
+    routed = _route_locally(prompt, user_input)
+    if not routed["escalate"]:
+        return routed["applicationId"]
+    logger.debug("Running tool routing agent fallback")
+    app_id = await run_tool_routing_agent_async(prompt, llm_call)
+    if isinstance(app_id, str) and extract_application_id(app_id) == app_id:
+        logger.info("Tool routing agent detected applicationId=%s", app_id)
+        return app_id
+    logger.debug("Tool routing agent did not select applicationId")
+    return None
+
+
+def _context_application_id(context: dict | None) -> str | None:
+    return context.get("applicationId") if context else None
+
+
+async def _cancel(tasks: list[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def enrich_prompt_with_tools_async(prompt: str, user_input, llm_call=None) -> str:
+    """
+    Async ``enrich_prompt_with_tools`` that overlaps the agents' LLM calls.
+    The tool routing fallback and the decline rule guidance call start
+    together; the guidance is based on the application context known at that
+    point. If routing then looks up a different application, the guidance is
+    cancelled and requested again for it. When the caller is cancelled, every
+    in-flight agent call is cancelled with it.
+    Args:
+        prompt (str): Full prompt to enrich.
+        user_input: The current user input.
+        llm_call: Awaitable LLM call; each call applies its own timeout.
+    Returns:
+        str: The enriched prompt.
+    """
+    user_prompt = prompt
+    enriched_prompt = prompt
+    # TOOL 1 - Application Record Lookup
+    app_id = should_call_application_lookup(user_prompt)
+    if app_id:
+        logger.info("Application lookup triggered applicationId=%s", app_id)
+        enriched_prompt = await asyncio.to_thread(apply_application_lookup, user_prompt, app_id)
+
+    # TOOL 2 - Portfolio Query
+    portfolio_query = _portfolio_query(user_prompt, user_input)
+    if portfolio_query:
+        enriched_prompt = await asyncio.to_thread(
+            apply_portfolio_query, enriched_prompt, portfolio_query
+        )
+
+    routing = None
+    if not app_id and not portfolio_query:
+        routing = asyncio.create_task(
+            _agent_fallback_tool_check_async(user_prompt, llm_call, user_input)
+        )
+
+    guidance = None
+    guidance_context = None
+    if should_call_decline_rule_explanation_agent(user_prompt):
+        logger.info("Decline rule explanation agent triggered")
+        guidance_context = await asyncio.to_thread(_decline_application_data, user_prompt)
+        guidance = asyncio.create_task(
+            request_decline_rule_guidance_async(user_prompt, llm_call, guidance_context)
+        )
+    else:
+        logger.debug("Decline rule explanation agent not triggered")
+
+    try:
+        if routing is not None:
+            fallback_app_id = await routing
+            if fallback_app_id:
+                logger.info("Application lookup via fallback applicationId=%s", fallback_app_id)
+                enriched_prompt = await asyncio.to_thread(
+                    apply_application_lookup, user_prompt, fallback_app_id
+                )
+                context = get_last_application_context()
+                stale = _context_application_id(context) != _context_application_id(
+                    guidance_context
+                )
+                if guidance is not None and stale:
+                    logger.info(
+                        "Decline rule guidance restarted for applicationId=%s", fallback_app_id
+                    )
+                    await _cancel([guidance])
+                    context = await asyncio.to_thread(_decline_application_data, user_prompt)
+                    guidance = asyncio.create_task(
+                        request_decline_rule_guidance_async(user_prompt, llm_call, context)
+                    )
+
+        if guidance is not None:
+            context, response = await guidance
+            enriched_prompt = apply_decline_rule_guidance(enriched_prompt, context, response)
+    except asyncio.CancelledError:
+        await _cancel([task for task in (routing, guidance) if task is not None])
+        raise
+
+    return enriched_prompt
@@ -1,56 +1,241 @@
+import argparse
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import statistics
+import tempfile
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 
 _SESSION_ID = None
 _SESSION_LOG_PATH = None
+_LISTENER: logging.handlers.QueueListener | None = None
+_HANDLERS: list[logging.Handler] = []
+_QUEUE_HANDLER: "_BoundedQueueHandler | None" = None
 
+# Records the queue backend holds before new ones are dropped (LOG_QUEUE_MAX_RECORDS).
+DEFAULT_QUEUE_MAX_RECORDS: int = 10_000
 
-def _build_log_path(app_name: str | None) -> Path:
+# Records carry these LogRecord attributes; anything else was passed via ``extra``.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "session_id"}
+
+
+def _build_log_path(app_name: str | None, logs_dir: Path | None = None) -> Path:
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
     pid = os.getpid()
     suffix = uuid.uuid4().hex[:8]
     tag = app_name or "session"
-    logs_dir = Path(__file__).resolve().parents[2] / "logs"
+    logs_dir = logs_dir or Path(__file__).resolve().parents[2] / "logs"
     logs_dir.mkdir(parents=True, exist_ok=True)
     return logs_dir / f"{tag}_{timestamp}_{pid}_{suffix}.log"
 
 
-def init_session_logging(app_name: str | None = None) -> Path:
-    global _SESSION_ID, _SESSION_LOG_PATH
+def _parse_sample_rates(spec: str) -> dict[str, float]:
+    """``"app.llm.tools=0.01,app.reloadable_index=0.1"`` -> {logger prefix: keep rate}."""
+    rates = {}
+    for item in spec.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One compact JSON object per record: time, level, logger, session, message and extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "session": getattr(record, "session_id", None),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of DEBUG records from chosen loggers.
+    Rates are matched on the longest logger-name prefix; INFO and above always pass.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        # Longest prefix first, so the most specific rate wins.
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or not self.rates:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return random.random() < rate
+        return True
+
+
+class _SessionFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "session_id"):
+            record.session_id = _SESSION_ID or "unknown"
+        return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue the record as it is. The stock QueueHandler formats the message on
+    the calling thread; here the listener thread does it. Log arguments are
+    therefore rendered after the call returns and should not be mutated.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _BoundedQueueHandler(_DeferredQueueHandler):
+    """
+    Queue records on a bounded queue. When the listener falls behind and the
+    queue is full, the record is dropped and counted instead of growing memory
+    or blocking the calling thread.
+    """
+
+    def __init__(self, max_records: int):
+        super().__init__(queue.Queue(maxsize=max_records))
+        self.max_records = max_records
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _BlockingSentinelListener(logging.handlers.QueueListener):
+    """A listener whose stop waits for room on a full queue rather than raising."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def _parse_level(name: str) -> int | None:
+    """The level for ``name`` ("DEBUG", "warning", "10"), None when it is not one."""
+    name = name.strip().upper()
+    if name.isdigit():
+        return int(name)
+    return logging.getLevelNamesMapping().get(name)
+
+
+def init_session_logging(
+    app_name: str | None = None, backend: str | None = None, logs_dir: Path | None = None
+) -> Path:
+    """
+    Configure root logging for this process once.
+    LOG_LEVEL sets the level (default INFO; DEBUG calls below it return before
+    building a record). The ``queue`` backend (LOG_BACKEND, default) hands
+    records to a background thread, which writes the session file as JSON
+    lines and INFO+ to stderr; ``sync`` writes from the calling thread.
+    An unknown LOG_LEVEL falls back to INFO with a warning. The queue holds at
+    most LOG_QUEUE_MAX_RECORDS records; further records are dropped and counted
+    (``logging_metrics``) until the background thread catches up.
+    LOG_SAMPLE_RATES keeps a fraction of DEBUG records per logger prefix.
+    Args:
+        app_name (str | None): Tag for the log file name.
+        backend (str | None): ``queue`` or ``sync``, defaults to LOG_BACKEND.
+        logs_dir (Path | None): Directory for the log file, defaults to ``logs/``.
+    Returns:
+        Path: The session log file.
+    """
+    global _SESSION_ID, _SESSION_LOG_PATH, _LISTENER, _QUEUE_HANDLER
     if _SESSION_LOG_PATH is not None:
         return _SESSION_LOG_PATH
 
     _SESSION_ID = uuid.uuid4().hex
-    _SESSION_LOG_PATH = _build_log_path(app_name)
+    _SESSION_LOG_PATH = _build_log_path(app_name, logs_dir)
+    backend = (backend or os.getenv("LOG_BACKEND", "queue")).lower()
+    level_name = os.getenv("LOG_LEVEL", "INFO")
+    level = _parse_level(level_name)
+    if level is None:
+        level = logging.INFO
 
     logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
-
-    formatter = logging.Formatter(
-        fmt="%(asctime)s %(levelname)s %(name)s [session=%(session_id)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    logger.setLevel(level)
 
     file_handler = logging.FileHandler(_SESSION_LOG_PATH, encoding="utf-8")
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(formatter)
+    file_handler.setLevel(level)
+    file_handler.setFormatter(JsonLinesFormatter())
 
     stream_handler = logging.StreamHandler()
     stream_handler.setLevel(logging.INFO)
-    stream_handler.setFormatter(formatter)
+    stream_handler.setFormatter(
+        logging.Formatter(
+            fmt="%(asctime)s %(levelname)s %(name)s [session=%(session_id)s] %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    )
 
-    logger.addHandler(_SessionFilterHandler(file_handler))
-    logger.addHandler(_SessionFilterHandler(stream_handler))
+    if backend == "sync":
+        handlers = [file_handler, stream_handler]
+    else:
+        max_records = int(os.getenv("LOG_QUEUE_MAX_RECORDS", str(DEFAULT_QUEUE_MAX_RECORDS)))
+        queue_handler = _BoundedQueueHandler(max_records)
+        _QUEUE_HANDLER = queue_handler
+        _LISTENER = _BlockingSentinelListener(
+            queue_handler.queue, file_handler, stream_handler, respect_handler_level=True
+        )
+        _LISTENER.start()
+        atexit.register(shutdown_logging)
+        handlers = [queue_handler]
 
-    logger.info("Logging initialized", extra={"session_id": _SESSION_ID})
-    logger.info("Log file created at %s", _SESSION_LOG_PATH, extra={"session_id": _SESSION_ID})
+    sampling = SamplingFilter(_parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "")))
+    for handler in handlers:
+        handler.addFilter(_SessionFilter())
+        handler.addFilter(sampling)
+        logger.addHandler(handler)
+    _HANDLERS[:] = handlers + ([file_handler, stream_handler] if _LISTENER else [])
+
+    logger.info("Logging initialized backend=%s level=%s", backend, logging.getLevelName(level))
+    if _parse_level(level_name) is None:
+        logger.warning("Unknown LOG_LEVEL=%s; using INFO", level_name)
+    logger.info("Log file created at %s", _SESSION_LOG_PATH)
     return _SESSION_LOG_PATH
 
 
+def shutdown_logging() -> None:
+    """Flush queued records, detach the handlers and allow logging to be initialized again."""
+    global _SESSION_ID, _SESSION_LOG_PATH, _LISTENER, _QUEUE_HANDLER
+    if _QUEUE_HANDLER is not None and _QUEUE_HANDLER.dropped:
+        logging.getLogger(__name__).warning(
+            "Log queue dropped %d records while full", _QUEUE_HANDLER.dropped
+        )
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
+    _QUEUE_HANDLER = None
+    root = logging.getLogger()
+    for handler in _HANDLERS:
+        root.removeHandler(handler)
+        handler.close()
+    _HANDLERS.clear()
+    _SESSION_ID = None
+    _SESSION_LOG_PATH = None
+
+
 def get_session_id() -> str | None:
     return _SESSION_ID
 
@@ -59,12 +244,164 @@ def get_log_path() -> Path | None:
     return _SESSION_LOG_PATH
 
 
-class _SessionFilterHandler(logging.Handler):
-    def __init__(self, handler: logging.Handler):
-        super().__init__()
-        self._handler = handler
+def logging_metrics() -> dict | None:
+    """Queue depth and dropped records of the queue backend, None for ``sync``."""
+    if _QUEUE_HANDLER is None:
+        return None
+    return {
+        "queuedRecords": _QUEUE_HANDLER.queue.qsize(),
+        "maxQueuedRecords": _QUEUE_HANDLER.max_records,
+        "droppedRecords": _QUEUE_HANDLER.dropped,
+    }
 
-    def emit(self, record: logging.LogRecord) -> None:
-        if not hasattr(record, "session_id"):
-            record.session_id = _SESSION_ID or "unknown"
-        self._handler.emit(record)
+
+def _legacy_logging(logs_dir: Path) -> list[logging.Handler]:
+    """The previous setup: root at DEBUG, text lines written on the calling thread."""
+    formatter = logging.Formatter(
+        fmt="%(asctime)s %(levelname)s %(name)s [session=%(session_id)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    file_handler = logging.FileHandler(_build_log_path("legacy", logs_dir), encoding="utf-8")
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setLevel(logging.INFO)
+    stream_handler.setFormatter(formatter)
+    logging.getLogger().setLevel(logging.DEBUG)
+    handlers = [file_handler, stream_handler]
+    for handler in handlers:
+        handler.addFilter(_SessionFilter())
+        logging.getLogger().addHandler(handler)
+    return handlers
+
+
+def _capture_log_calls(fn) -> list[tuple[str, int, object, tuple]]:
+    """The (logger, level, msg, args) of every log call ``fn`` makes at DEBUG."""
+    calls = []
+
+    class _Capture(logging.Handler):
+        def emit(self, record: logging.LogRecord) -> None:
+            args = record.args if isinstance(record.args, tuple) else (record.args,)
+            calls.append((record.name, record.levelno, record.msg, args))
+
+    root = logging.getLogger()
+    level = root.level
+    capture = _Capture()
+    root.addHandler(capture)
+    root.setLevel(logging.DEBUG)
+    try:
+        fn()
+    finally:
+        root.removeHandler(capture)
+        root.setLevel(level)
+    return calls
+
+
+def benchmark_logging(
+    requests: int = 2000,
+    workers: int = 16,
+    setups: tuple[str, ...] = ("off", "legacy", "sync", "queue"),
+) -> dict:
+    """
+    Logging cost per request under concurrent chat and decision load, per logging setup.
+    A chat request runs tool enrichment for an application lookup (no LLM
+    call); a decision request runs the online engine behind the decision log
+    line. The log calls each kind makes are captured once and replayed from
+    ``workers`` threads, timing only the logging on the calling thread; then
+    the real requests are timed end to end. ``off`` disables logging,
+    ``legacy`` is the previous DEBUG/synchronous setup, ``sync`` and ``queue``
+    are ``init_session_logging`` backends at the default level. Stderr is
+    discarded while the workload runs.
+    Args:
+        requests (int): Requests per setup, alternating chat and decision.
+        workers (int): Concurrent threads.
+        setups (tuple[str, ...]): Setups to measure.
+    Returns:
+        dict: Per setup, the mean and p95 logging time per request on the calling
+        thread, end-to-end request latency and throughput, and log bytes written.
+    """
+    import contextlib
+    import io
+
+    from app.llm.tools.tool import enrich_prompt_with_tools
+    from app.session_store import use_session
+    from decisioning.classes.OnlineEngine import OnlineEngine
+
+    app_ids = ["APP_101", "APP_102", "APP_103", "APP_104", "APP_105"]
+    engine = OnlineEngine()
+    decision_logger = logging.getLogger("app.main")
+    application = {"applicationId": "APP_101", "applicantAge": 30}
+
+    def chat(n: int) -> None:
+        message = f"What was decided for {app_ids[n % len(app_ids)]}?"
+        with use_session(f"bench-{n % 64}"):
+            enrich_prompt_with_tools(f"User: {message}\nAssistant:", message, llm_call=None)
+
+    def decide(n: int) -> None:
+        decision_logger.info("Decision requested applicationId=%s", application["applicationId"])
+        engine.decide(application)
+
+    def one_request(n: int) -> float:
+        started = time.perf_counter()
+        (chat if n % 2 == 0 else decide)(n)
+        return (time.perf_counter() - started) * 1000
+
+    chat(0)  # load indexes before capturing a steady-state request
+    request_calls = [_capture_log_calls(lambda: chat(1)), _capture_log_calls(lambda: decide(1))]
+
+    def replay(n: int) -> float:
+        started = time.perf_counter()
+        for name, level, msg, args in request_calls[n % 2]:
+            logging.getLogger(name).log(level, msg, *args)
+        return (time.perf_counter() - started) * 1_000_000
+
+    report = {}
+    for setup in setups:
+        with tempfile.TemporaryDirectory() as logs_dir, contextlib.redirect_stderr(io.StringIO()):
+            shutdown_logging()
+            handlers = []
+            if setup == "off":
+                logging.getLogger().setLevel(logging.CRITICAL + 1)
+            elif setup == "legacy":
+                handlers = _legacy_logging(Path(logs_dir))
+            else:
+                init_session_logging("benchmark", backend=setup, logs_dir=Path(logs_dir))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                logging_us = sorted(pool.map(replay, range(requests)))
+                for n in range(20):  # warm up caches
+                    one_request(n)
+                started = time.perf_counter()
+                latencies = list(pool.map(one_request, range(requests)))
+                elapsed = time.perf_counter() - started
+            for handler in handlers:
+                logging.getLogger().removeHandler(handler)
+                handler.close()
+            shutdown_logging()
+            log_bytes = sum(path.stat().st_size for path in Path(logs_dir).iterdir())
+        report[setup] = {
+            "loggingUsPerRequest": round(statistics.mean(logging_us), 1),
+            "loggingP95Us": round(logging_us[int(len(logging_us) * 0.95) - 1], 1),
+            "requestMeanMs": round(statistics.mean(latencies), 3),
+            "requestsPerSec": round(requests / elapsed, 1),
+            "logBytes": log_bytes,
+        }
+    report["logCallsPerRequest"] = {
+        "chat": len(request_calls[0]),
+        "decision": len(request_calls[1]),
+    }
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark logging overhead per request.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    # Under ``python -m`` this file is ``__main__``; configure the module the app imports.
+    from app import logging_config
+
+    print(json.dumps(logging_config.benchmark_logging(args.requests, args.workers), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,252 @@
+import asyncio
+import functools
+import json
 import logging
-from fastapi import FastAPI
-from app.llm.client import generate
-from app.logging_config import init_session_logging
+import os
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any
+
+from fastapi import Body, FastAPI, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from app.decision_audit import DecisionAuditStore
+from app.decision_batcher import DecisionBatcher
+from app.decision_cache import DecisionCache, parse_versions_used
+from app.globals import curr_dir
+from app.llm.client import generate_async, generate_stream_async, llm_cache_metrics
+from app.llm.conversation_window import SYSTEM_PROMPT_FILE, ConversationWindow
+from app.llm.tools.portfolio_query_tool import portfolio_query_metrics
+from app.logging_config import init_session_logging, logging_metrics
+from app.reloadable_index import index_metrics
+from app.session_store import SESSION_STORE
+from decisioning.classes.InvalidApplicationError import InvalidApplicationError
+from decisioning.classes.OnlineEngine import OnlineEngine
+from decisioning.modules.complete import (
+    decide_applications,
+    module_versions,
+    rule_versions,
+    yes_no_record,
+)
+from decisioning.utility.profiler import PROFILER
 
 
 init_session_logging("fastapi")
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# Rules and derived features are compiled once at startup; requests only evaluate them.
+decision_engine = OnlineEngine(
+    feature_memo_entries=int(os.getenv("DECISION_FEATURE_MEMO_ENTRIES", "10000"))
+)
+if decision_engine.fallback_rule_ids:
+    logger.warning(
+        "Rules without a native online translation rule_ids=%s",
+        decision_engine.fallback_rule_ids,
+    )
+if decision_engine.fallback_feature_names:
+    logger.info(
+        "Derived features evaluated on one-row frames features=%s",
+        decision_engine.fallback_feature_names,
+    )
+
+# Micro-batching is enabled by a positive window; otherwise each request
+# takes the single-application fast path.
+_batch_window_ms = float(os.getenv("DECISION_BATCH_WINDOW_MS", "0"))
+decision_batcher = (
+    DecisionBatcher(
+        functools.partial(decide_applications, plans=decision_engine.plans),
+        window_ms=_batch_window_ms,
+        max_batch_size=int(os.getenv("DECISION_BATCH_MAX_SIZE", "256")),
+    )
+    if _batch_window_ms > 0
+    else None
+)
+
+# Decisions are cached by inputDataHash under the active rule and model versions.
+# DECISION_MODEL_VERSIONS lists the models behind the decisions as name@version pairs.
+# DECISION_CACHE_MAX_ENTRIES=0 disables the cache, an empty path keeps it in memory only.
+_cache_max_entries = int(os.getenv("DECISION_CACHE_MAX_ENTRIES", "100000"))
+_cache_path = os.getenv(
+    "DECISION_CACHE_PATH", str(curr_dir.parent.parent / "data" / "decision_cache.sqlite")
+)
+decision_cache = (
+    DecisionCache(
+        rule_versions(decision_engine.plans),
+        model_versions=parse_versions_used(
+            os.getenv("DECISION_MODEL_VERSIONS", "scorecard@v3.2,pd_model@v1.8")
+        ),
+        max_entries=_cache_max_entries,
+        path=_cache_path or None,
+        max_age_s=float(os.getenv("DECISION_CACHE_MAX_AGE_S", str(7 * 24 * 3600))),
+        max_disk_entries=int(os.getenv("DECISION_CACHE_MAX_DISK_ENTRIES", "1000000")),
+        module_versions=module_versions(decision_engine.plans),
+    )
+    if _cache_max_entries > 0
+    else None
+)
+
+# Every decision is appended to a date-partitioned Parquet audit log; an empty path disables it.
+_audit_path = os.getenv("DECISION_AUDIT_PATH", str(curr_dir.parent.parent / "data" / "audit"))
+decision_audit = (
+    DecisionAuditStore(
+        _audit_path,
+        decision_engine.plans,
+        batch_size=int(os.getenv("DECISION_AUDIT_BATCH_SIZE", "1000")),
+        flush_interval_s=float(os.getenv("DECISION_AUDIT_FLUSH_S", "1")),
+        compact_target_rows=int(os.getenv("DECISION_AUDIT_COMPACT_ROWS", "1000000")),
+    )
+    if _audit_path
+    else None
+)
+_audit_compact_interval_s = float(os.getenv("DECISION_AUDIT_COMPACT_INTERVAL_S", "3600"))
+
+# /ask prompts are built like the Gradio chat's, from the session's chat history.
+CONVERSATION_WINDOW = ConversationWindow(SYSTEM_PROMPT_FILE.read_text(encoding="utf-8"))
+# Session-store key of the chat history; at most CHAT_HISTORY_MAX_MESSAGES are kept.
+CHAT_HISTORY_KEY = "chatHistory"
+_chat_history_max_messages = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "200"))
+
+
+async def _decide(application: dict) -> dict:
+    if decision_batcher is not None:
+        return await decision_batcher.submit(application)
+    return decision_engine.decide(application)
+
+
+def _chat_prompt(session_id: str | None, q: str) -> tuple[list[dict], str]:
+    """The session's history with ``q`` appended, and the windowed prompt for it."""
+    history = list(SESSION_STORE.get(session_id, CHAT_HISTORY_KEY) or []) if session_id else []
+    history.append({"role": "user", "content": q})
+    return history, CONVERSATION_WINDOW.build_prompt(history)
+
+
+def _save_chat_turn(session_id: str | None, history: list[dict], answer: str) -> None:
+    """Keep the answered turn for the session's follow-ups; one-off requests keep nothing."""
+    if session_id:
+        history = history + [{"role": "assistant", "content": answer}]
+        SESSION_STORE.set(session_id, CHAT_HISTORY_KEY, history[-_chat_history_max_messages:])
+
+
+async def _compact_audit_periodically() -> None:
+    while True:
+        await asyncio.sleep(_audit_compact_interval_s)
+        try:
+            await asyncio.to_thread(decision_audit.compact)
+        except Exception:
+            logger.exception("Decision audit compaction failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    compaction = (
+        asyncio.create_task(_compact_audit_periodically())
+        if decision_audit is not None and _audit_compact_interval_s > 0
+        else None
+    )
+    yield
+    if compaction is not None:
+        compaction.cancel()
+    if decision_batcher is not None:
+        await decision_batcher.close()
+    if decision_cache is not None:
+        decision_cache.close()
+    if decision_audit is not None:
+        decision_audit.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/health")
 def health():
     logger.info("Health check requested")
     return {"ok": True}
 
+@app.get("/metrics")
+def metrics():
+    """Rule profiling (DECISIONING_PROFILE=1) and memo, cache, audit, index and log counters."""
+    return {
+        "ruleProfile": PROFILER.report(),
+        "derivedFeatures": decision_engine.feature_metrics(),
+        "decisionBatching": decision_batcher.metrics() if decision_batcher is not None else None,
+        "decisionCache": decision_cache.metrics() if decision_cache is not None else None,
+        "decisionAudit": decision_audit.metrics() if decision_audit is not None else None,
+        "llmCache": llm_cache_metrics(),
+        "portfolioQuery": portfolio_query_metrics(),
+        "indexes": index_metrics(),
+        "logging": logging_metrics(),
+    }
+
 @app.get("/ask")
-def ask(q: str):
+async def ask(q: str, session_id: str | None = Header(None, alias="X-Session-Id")):
+    """
+    Answer ``q`` as the next turn of the ``X-Session-Id`` chat.
+    Without the header every request is its own session, with no history.
+    """
     logger.info("Ask endpoint called q_len=%d", len(q or ""))
-    return {"q": q, "answer": generate(q)}
+    history, prompt = _chat_prompt(session_id, q)
+    answer = await generate_async(prompt, q, session_id or uuid.uuid4().hex)
+    _save_chat_turn(session_id, history, answer)
+    return {"q": q, "answer": answer}
+
+@app.get("/ask/stream")
+async def ask_stream(q: str, session_id: str | None = Header(None, alias="X-Session-Id")):
+    """
+    Server-sent events: one ``data: {"delta": ...}`` event per chunk, then
+    ``event: done``, or ``event: error`` when the answer failed part way.
+    """
+    logger.info("Ask stream endpoint called q_len=%d", len(q or ""))
+    history, prompt = _chat_prompt(session_id, q)
+    stream_session_id = session_id or uuid.uuid4().hex
+
+    async def events():
+        # The status line is already sent, so a failure is reported in the stream.
+        chunks = []
+        try:
+            async for chunk in generate_stream_async(prompt, q, stream_session_id):
+                chunks.append(chunk)
+                yield f"data: {json.dumps({'delta': chunk})}\n\n"
+        except Exception:
+            logger.exception("Ask stream failed session=%s", stream_session_id)
+            yield f"event: error\ndata: {json.dumps({'message': 'Answer generation failed'})}\n\n"
+            return
+        # Only a complete answer becomes part of the conversation.
+        _save_chat_turn(session_id, history, "".join(chunks))
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/decision")
+async def decision(application: dict[str, Any] = Body(...), yes_no: bool = False):
+    """Decide one application; ``?yes_no=true`` returns rule outcomes as "Y"/"N"."""
+    logger.info("Decision requested applicationId=%s", application.get("applicationId"))
+    try:
+        application = decision_engine.validate(application)
+        if decision_cache is not None:
+            result = await decision_cache.get_or_decide(application, _decide)
+        else:
+            result = await _decide(application)
+    except InvalidApplicationError as exc:
+        logger.info(
+            "Decision rejected applicationId=%s error=%s", application.get("applicationId"), exc
+        )
+        raise HTTPException(
+            status_code=422, detail={"message": str(exc), "errors": exc.errors}
+        ) from exc
+    if decision_audit is not None:
+        result = {**result, "decisionId": decision_audit.record(application, result)}
+    if yes_no:
+        result = yes_no_record(result, decision_engine.plans)
+    return {"applicationId": application.get("applicationId"), **result}
+
+@app.get("/decision/{app_id}")
+def stored_decision(app_id: str, decision_id: str | None = None):
+    """Latest audited decision for an application, or the one with ``?decision_id=``."""
+    if decision_audit is None:
+        raise HTTPException(status_code=404, detail="Decision audit store is disabled")
+    record = decision_audit.get(application_id=app_id, decision_id=decision_id)
+    if record is None or record["applicationId"] != app_id:
+        raise HTTPException(status_code=404, detail=f"No decision stored for {app_id}")
+    return record
@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+
+logger = logging.getLogger(__name__)
+
+# Bytes at the end of a source file whose digest identifies its content so far.
+TAIL_BYTES = 4096
+
+# name -> index, for /metrics
+_INDEXES: dict[str, "ReloadableIndex"] = {}
+
+
+class SourceVersion(NamedTuple):
+    mtime_ns: int
+    size: int
+    tail_sha256: str
+
+
+def _tail_digest(path: Path, end: int) -> str:
+    start = max(end - TAIL_BYTES, 0)
+    with path.open("rb") as handle:
+        handle.seek(start)
+        return hashlib.sha256(handle.read(end - start)).hexdigest()
+
+
+def source_version(path: str | Path) -> SourceVersion:
+    path = Path(path)
+    stat = path.stat()
+    return SourceVersion(stat.st_mtime_ns, stat.st_size, _tail_digest(path, stat.st_size))
+
+
+def is_append(path: str | Path, previous: SourceVersion | None) -> bool:
+    """
+    Whether the file at ``path`` is ``previous`` with bytes appended: it grew,
+    and the bytes that used to end it are unchanged.
+    """
+    if previous is None:
+        return False
+    path = Path(path)
+    if path.stat().st_size <= previous.size:
+        return False
+    return _tail_digest(path, previous.size) == previous.tail_sha256
+
+
+class ReloadableIndex:
+    """
+    An in-process index over a source file, rebuilt in the background when the file changes.
+
+    ``get`` returns the current index without locking; only the very first call
+    builds synchronously. At most every ``check_interval_s`` seconds a call also
+    stats the source, and if its mtime or size moved a background thread calls
+    ``load(previous_index, previous_version, version)``, which returns the new
+    index and how it was built (``"full"`` or ``"incremental"``). The new index
+    replaces the old one in a single assignment, so readers see either the old
+    or the new index, never a partial one. Readers still holding the old index
+    keep using it until they finish. A failed rebuild is logged, the old index
+    stays in service, and that version of the source is not retried.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        source_path: str | Path,
+        load: Callable[[Any, SourceVersion | None, SourceVersion], tuple[Any, str]],
+        check_interval_s: float | None = None,
+    ):
+        self.name = name
+        self.source_path = Path(source_path)
+        self._load = load
+        self.check_interval_s = (
+            float(os.getenv("INDEX_RELOAD_CHECK_S", "5"))
+            if check_interval_s is None
+            else check_interval_s
+        )
+        # (index, version), replaced as a whole
+        self._current: tuple[Any, SourceVersion] | None = None
+        self._first_load = threading.Lock()
+        self._reloading = threading.Lock()
+        self._next_check = 0.0
+        self._failed_version: tuple[int, int] | None = None
+
+        self._reloads = {"full": 0, "incremental": 0}
+        self._failures = 0
+        self._last_reload_ms: float | None = None
+        self._last_reload_kind: str | None = None
+        self._last_reload_at: float | None = None
+        self._last_error: str | None = None
+        _INDEXES[name] = self
+
+    def _build(self) -> None:
+        previous = self._current
+        previous_index, previous_version = previous if previous is not None else (None, None)
+        started = time.perf_counter()
+        version = source_version(self.source_path)
+        try:
+            index, kind = self._load(previous_index, previous_version, version)
+        except Exception as exc:
+            self._failures += 1
+            self._failed_version = (version.mtime_ns, version.size)
+            self._last_error = f"{type(exc).__name__}: {exc}"
+            logger.exception("Index reload failed index=%s source=%s", self.name, self.source_path)
+            if previous is None:
+                raise
+            return
+        self._current = (index, version)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._reloads[kind] = self._reloads.get(kind, 0) + 1
+        self._last_reload_ms = elapsed_ms
+        self._last_reload_kind = kind
+        self._last_reload_at = time.time()
+        self._last_error = None
+        logger.info(
+            "Index loaded index=%s kind=%s entries=%d source_bytes=%d reload_ms=%.1f",
+            self.name,
+            kind,
+            len(index),
+            version.size,
+            elapsed_ms,
+        )
+
+    def _reload_in_background(self) -> None:
+        try:
+            self._build()
+        finally:
+            self._reloading.release()
+
+    def _check(self) -> None:
+        _, version = self._current
+        try:
+            stat = self.source_path.stat()
+        except OSError:
+            logger.warning(
+                "Index source unavailable index=%s source=%s", self.name, self.source_path
+            )
+            return
+        seen = (stat.st_mtime_ns, stat.st_size)
+        if seen == (version.mtime_ns, version.size) or seen == self._failed_version:
+            return
+        if not self._reloading.acquire(blocking=False):
+            return  # a rebuild is already running
+        logger.info("Index source changed index=%s; rebuilding in background", self.name)
+        threading.Thread(
+            target=self._reload_in_background, name=f"reload-{self.name}", daemon=True
+        ).start()
+
+    def get(self):
+        """The current index; schedules a background rebuild if the source changed."""
+        current = self._current
+        if current is None:
+            with self._first_load:
+                if self._current is None:
+                    self._build()
+            return self._current[0]
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval_s
+            self._check()
+        return current[0]
+
+    def reload(self) -> None:
+        """Rebuild now in the calling thread, waiting for any rebuild already running."""
+        with self._reloading:
+            self._build()
+
+    def metrics(self) -> dict:
+        current = self._current
+        return {
+            "source": str(self.source_path),
+            "entries": len(current[0]) if current is not None else None,
+            "sourceBytes": current[1].size if current is not None else None,
+            "sourceMtimeNs": current[1].mtime_ns if current is not None else None,
+            "reloading": self._reloading.locked(),
+            "fullReloads": self._reloads.get("full", 0),
+            "incrementalReloads": self._reloads.get("incremental", 0),
+            "failedReloads": self._failures,
+            "lastReloadKind": self._last_reload_kind,
+            "lastReloadMs": round(self._last_reload_ms, 3) if self._last_reload_ms else None,
+            "lastReloadAt": self._last_reload_at,
+            "lastError": self._last_error,
+        }
+
+
+def index_metrics() -> dict:
+    """Metrics of every reloadable index created in this process, by name."""
+    return {name: index.metrics() for name, index in _INDEXES.items()}
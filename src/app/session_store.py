@@ -0,0 +1,299 @@
+import argparse
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.globals import curr_dir
+
+
+logger = logging.getLogger(__name__)
+
+# Session of the chat request being served. Each request (FastAPI handler,
+# Gradio event, asyncio task) works on its own copy of the context. Nothing is
+# bound by default: session state is never shared between unrelated requests.
+_CURRENT_SESSION: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "chat_session_id", default=None
+)
+
+
+def current_session_id() -> str:
+    """
+    Session bound to the calling context.
+    Raises:
+        RuntimeError: When no session is bound (outside ``use_session``/``run_in_session``).
+    """
+    session_id = _CURRENT_SESSION.get()
+    if session_id is None:
+        raise RuntimeError("No chat session bound; run the call inside use_session()")
+    return session_id
+
+
+def _session_or_new(session_id: str | None) -> str:
+    """``session_id``, else the session already bound, else a fresh one."""
+    return session_id or _CURRENT_SESSION.get() or uuid.uuid4().hex
+
+
+@contextmanager
+def use_session(session_id: str | None):
+    """
+    Bind ``session_id`` for the code inside the block.
+    For None the session already bound is kept, or a fresh one is bound.
+    """
+    token = _CURRENT_SESSION.set(_session_or_new(session_id))
+    try:
+        yield
+    finally:
+        _CURRENT_SESSION.reset(token)
+
+
+async def run_in_session(session_id: str | None, coro):
+    """
+    Await ``coro`` with ``session_id`` bound, without touching the caller's context.
+    For None the caller's session is kept, or a fresh one is bound.
+    The coroutine runs as its own task, so this also works from async generators,
+    and cancelling the caller cancels it.
+    """
+    context = contextvars.copy_context()
+    context.run(_CURRENT_SESSION.set, _session_or_new(session_id))
+    return await asyncio.create_task(coro, context=context)
+
+
+class MemorySessionStore:
+    """
+    In-process session state with LRU and TTL eviction.
+
+    Each session holds a small dict of values. Sessions idle for longer than
+    ``ttl_s`` are dropped, and at most ``max_sessions`` are kept, least
+    recently used first out.
+    """
+
+    def __init__(self, max_sessions: int = 10_000, ttl_s: float = 3_600):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        # session id -> (last access time, values)
+        self._sessions: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, session_id: str, now: float) -> dict | None:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        if now - entry[0] > self.ttl_s:
+            del self._sessions[session_id]
+            return None
+        return entry[1]
+
+    def get(self, session_id: str, key: str):
+        now = time.time()
+        with self._lock:
+            values = self._live(session_id, now)
+            if values is None:
+                return None
+            self._sessions[session_id] = (now, values)
+            self._sessions.move_to_end(session_id)
+            return values.get(key)
+
+    def set(self, session_id: str, key: str, value) -> None:
+        now = time.time()
+        with self._lock:
+            values = self._live(session_id, now) or {}
+            values[key] = value
+            self._sessions[session_id] = (now, values)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSessionStore:
+    """
+    Session state in a SQLite file shared by every worker process on a host.
+
+    Values are stored as JSON per (session, key). Entries not written or read
+    for ``ttl_s`` seconds are ignored and purged.
+    """
+
+    def __init__(self, path: str | Path, ttl_s: float = 3_600):
+        self.ttl_s = ttl_s
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS session_values ("
+            "session_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "accessed_at REAL NOT NULL, PRIMARY KEY (session_id, key))"
+        )
+        purged = self._db.execute(
+            "DELETE FROM session_values WHERE accessed_at < ?", [time.time() - ttl_s]
+        ).rowcount
+        self._db.commit()
+        self._lock = threading.Lock()
+        logger.info("SQLite session store opened path=%s purged_expired=%d", path, purged)
+
+    def get(self, session_id: str, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, accessed_at FROM session_values WHERE session_id = ? AND key = ?",
+                [session_id, key],
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_s:
+                return None
+            self._db.execute(
+                "UPDATE session_values SET accessed_at = ? WHERE session_id = ? AND key = ?",
+                [now, session_id, key],
+            )
+            self._db.commit()
+            return json.loads(row[0])
+
+    def set(self, session_id: str, key: str, value) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO session_values (session_id, key, value, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                [session_id, key, json.dumps(value), time.time()],
+            )
+            self._db.commit()
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM session_values WHERE session_id = ?", [session_id])
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT count(DISTINCT session_id) FROM session_values"
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def session_store_from_env():
+    """
+    Build the session store selected by SESSION_STORE_BACKEND (``memory`` or ``sqlite``).
+    SESSION_TTL_S sets the idle timeout, SESSION_MAX_SESSIONS the in-process
+    capacity, and SESSION_STORE_PATH the SQLite file.
+    """
+    backend = os.getenv("SESSION_STORE_BACKEND", "memory").lower()
+    ttl_s = float(os.getenv("SESSION_TTL_S", "3600"))
+    if backend == "sqlite":
+        path = os.getenv(
+            "SESSION_STORE_PATH", str(curr_dir.parent.parent / "data" / "sessions.sqlite")
+        )
+        return SQLiteSessionStore(path, ttl_s=ttl_s)
+    if backend != "memory":
+        logger.warning("Unknown session store backend=%s; using memory", backend)
+    return MemorySessionStore(
+        max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", "10000")), ttl_s=ttl_s
+    )
+
+
+SESSION_STORE = session_store_from_env()
+
+
+def check_session_isolation(
+    set_value, get_value, sessions: int = 64, rounds: int = 200, workers: int = 16
+) -> dict:
+    """
+    Hammer a session-scoped setter/getter pair from many threads and tasks.
+    Every (session, round) writes a value naming its session, yields to other
+    workers, then reads it back through the session bound in its context. A
+    read that does not name the reader's session is a leak (rounds of the same
+    session may overwrite each other; that is not).
+    Args:
+        set_value: Callable storing a value for the current session.
+        get_value: Callable returning the current session's value.
+        sessions (int): Concurrent sessions.
+        rounds (int): Write/read rounds per session.
+        workers (int): Threads in the pool.
+    Returns:
+        dict: Checks performed and leaks found, for threads and for asyncio tasks.
+    """
+
+    def read_own(session_id: str) -> bool:
+        return (get_value() or {}).get("sessionId") == session_id
+
+    def thread_round(session_id: str, round_number: int) -> bool:
+        with use_session(session_id):
+            set_value({"sessionId": session_id, "round": round_number})
+            time.sleep(random.random() / 10_000)
+            return read_own(session_id)
+
+    async def task_round(session_id: str, round_number: int) -> bool:
+        with use_session(session_id):
+            set_value({"sessionId": session_id, "round": round_number})
+            await asyncio.sleep(random.random() / 10_000)
+            return read_own(session_id)
+
+    async def run_tasks() -> list[bool]:
+        async def one_session(session_id: str) -> list[bool]:
+            return [await task_round(session_id, n) for n in range(rounds)]
+
+        results = await asyncio.gather(*(one_session(f"t{s}") for s in range(sessions)))
+        return [ok for session_results in results for ok in session_results]
+
+    jobs = [(f"s{s}", n) for n in range(rounds) for s in range(sessions)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        thread_results = list(pool.map(lambda job: thread_round(*job), jobs))
+    task_results = asyncio.run(run_tasks())
+    return {
+        "threadChecks": len(thread_results),
+        "threadLeaks": thread_results.count(False),
+        "taskChecks": len(task_results),
+        "taskLeaks": task_results.count(False),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Session isolation check.")
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    # Under ``python -m`` this file is ``__main__``; bind sessions through the
+    # imported module, whose context variable the lookup tool reads.
+    from app import session_store
+    from app.llm.tools.application_record_lookup_tool import (
+        _set_last_application_context,
+        get_last_application_context,
+    )
+
+    report = session_store.check_session_isolation(
+        _set_last_application_context,
+        get_last_application_context,
+        args.sessions,
+        args.rounds,
+        args.workers,
+    )
+    print(json.dumps(report, indent=2))
+    if report["threadLeaks"] or report["taskLeaks"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,6 @@ class ApplyRule:
         self.data_frame: pl.DataFrame = data_frame
 
     def execute_rule(self) -> pl.DataFrame:
-        self.data_frame = self.data_frame.with_columns(
-            pl.when(self.policy_rule.expressions)
-            .then(pl.lit("Y"))
-            .otherwise(pl.lit("N"))
-            .alias(f"{self.policy_rule.rule_id}")
-        )
+        self.data_frame = self.data_frame.with_columns(self.policy_rule.outcome_expression())
 
         return self.data_frame
@@ -0,0 +1,30 @@
+import polars as pl
+
+
+class DerivedFeature:
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        expressions: pl.Expr,
+        view: list[str],
+        version: str = "unversioned",
+    ):
+        self.name = name
+        self.description = description
+        self.expressions = expressions
+        self.view = view
+        self.version = version
+
+    def value_expression(self, supplied: bool = False) -> pl.Expr:
+        """
+        Build the column for this feature.
+        Values the input already supplies are kept; only nulls are computed.
+        Args:
+            supplied (bool): Whether the input holds a column with this feature's name.
+        Returns:
+            pl.Expr: Expression aliased to the feature name.
+        """
+        if supplied:
+            return pl.coalesce(pl.col(self.name), self.expressions).alias(self.name)
+        return self.expressions.alias(self.name)
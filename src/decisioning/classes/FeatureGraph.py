@@ -0,0 +1,105 @@
+import polars as pl
+from decisioning.classes.DerivedFeature import DerivedFeature
+
+
+class FeatureGraph:
+    """
+    Resolves derived features into columns, in dependency order.
+
+    Each DerivedFeature declares the columns it reads in ``view``, like
+    ``PolicyRule.view``; a view may name other features. The graph is ordered
+    once, at construction, into levels: a feature only reads input columns and
+    features of earlier levels, so each level is one ``with_columns`` call and
+    every feature is computed once per batch, however many rules read it.
+    """
+
+    def __init__(self, features: list[DerivedFeature]):
+        self.features: dict[str, DerivedFeature] = {}
+        for feature in features:
+            if feature.name in self.features:
+                raise ValueError(f"Duplicate derived feature: {feature.name}")
+            self.features[feature.name] = feature
+        self.levels: list[list[str]] = self._levels()
+        self.order: list[str] = [name for level in self.levels for name in level]
+
+    def _levels(self) -> list[list[str]]:
+        depends = {
+            name: {col for col in feature.view if col in self.features and col != name}
+            for name, feature in self.features.items()
+        }
+        for name, feature in self.features.items():
+            if name in feature.view:
+                raise ValueError(f"Derived feature reads itself: {name}")
+        levels: list[list[str]] = []
+        resolved: set[str] = set()
+        while len(resolved) < len(self.features):
+            level = [
+                name
+                for name in self.features
+                if name not in resolved and depends[name] <= resolved
+            ]
+            if not level:
+                cycle = sorted(name for name in self.features if name not in resolved)
+                raise ValueError(f"Cycle in derived features: {cycle}")
+            levels.append(level)
+            resolved.update(level)
+        return levels
+
+    @property
+    def versions(self) -> dict[str, str]:
+        return {name: feature.version for name, feature in self.features.items()}
+
+    def required(self, columns: list[str]) -> list[str]:
+        """
+        Features needed to provide ``columns``, including the features they read.
+        Args:
+            columns (list[str]): Columns a consumer reads, e.g. ``RulePlan.input_columns``.
+        Returns:
+            list[str]: Feature names in resolution order.
+        """
+        needed: set[str] = set()
+        pending = [col for col in columns if col in self.features]
+        while pending:
+            name = pending.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            pending += [col for col in self.features[name].view if col in self.features]
+        return [name for name in self.order if name in needed]
+
+    def source_columns(self, columns: list[str]) -> list[str]:
+        """``columns`` plus the input columns their features read, in first-seen order."""
+        inputs = [
+            col
+            for name in self.required(columns)
+            for col in self.features[name].view
+            if col not in self.features
+        ]
+        return list(dict.fromkeys(list(columns) + inputs))
+
+    def lazy(
+        self, data: pl.DataFrame | pl.LazyFrame, columns: list[str] | None = None
+    ) -> pl.LazyFrame:
+        """
+        Attach derived feature columns to ``data``, one projection per level.
+        Args:
+            data (pl.DataFrame | pl.LazyFrame): Applicant data.
+            columns (list[str] | None): Columns the consumer reads; only the
+                features they need are resolved. Every feature when omitted.
+        Returns:
+            pl.LazyFrame: Un-collected plan with the feature columns added.
+        """
+        pipeline = data.lazy()
+        needed = set(self.order if columns is None else self.required(columns))
+        if not needed:
+            return pipeline
+        supplied = set(pipeline.collect_schema().names())
+        for level in self.levels:
+            expressions = [
+                self.features[name].value_expression(name in supplied)
+                for name in level
+                if name in needed
+            ]
+            if expressions:
+                pipeline = pipeline.with_columns(expressions)
+        return pipeline
@@ -0,0 +1,13 @@
+class InvalidApplicationError(ValueError):
+    """
+    Raised when an application has a field its rules cannot evaluate.
+    ``errors`` lists ``{"field", "value", "expected"}`` for every field that
+    failed validation; it is empty when evaluation itself failed.
+    """
+
+    def __init__(self, errors: list[dict], message: str | None = None):
+        self.errors = errors
+        super().__init__(
+            message
+            or "; ".join(f"{error['field']}: expected {error['expected']}" for error in errors)
+        )
@@ -0,0 +1,505 @@
+import json
+import math
+import operator
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import polars as pl
+from decisioning.classes.FeatureGraph import FeatureGraph
+from decisioning.classes.InvalidApplicationError import InvalidApplicationError
+from decisioning.classes.PolicyRule import PolicyRule
+from decisioning.classes.RulePlan import RulePlan
+from decisioning.modules.complete import (
+    FINAL_STAGE,
+    decision_columns,
+    module_outcome_column,
+    module_plans,
+    run_complete,
+)
+from decisioning.modules.features import feature_graph
+from decisioning.utility.profiler import PROFILER
+
+
+Evaluator = Callable[[dict], Any]
+
+
+class _Unsupported(Exception):
+    """Raised when a rule expression has no native single-row translation."""
+
+
+def _nan_key(value):
+    # Polars orders NaN above every other number and treats NaN == NaN as true.
+    if isinstance(value, float) and math.isnan(value):
+        return (1, 0.0)
+    return (0, value)
+
+
+def _compare(op) -> Callable[[Any, Any], bool | None]:
+    def compare(left, right):
+        if left is None or right is None:
+            return None
+        return op(_nan_key(left), _nan_key(right))
+
+    return compare
+
+
+def _arithmetic(op) -> Callable[[Any, Any], Any]:
+    def apply(left, right):
+        if left is None or right is None:
+            return None
+        return op(left, right)
+
+    return apply
+
+
+def _true_divide(left, right):
+    if left is None or right is None:
+        return None
+    if right == 0:
+        # Polars follows IEEE float division instead of raising.
+        if left == 0 or (isinstance(left, float) and math.isnan(left)):
+            return math.nan
+        return math.copysign(math.inf, left) * math.copysign(1.0, right)
+    return left / right
+
+
+def _kleene_and(left, right):
+    if left is False or right is False:
+        return False
+    if left is None or right is None:
+        return None
+    return True
+
+
+def _kleene_or(left, right):
+    if left is True or right is True:
+        return True
+    if left is None or right is None:
+        return None
+    return False
+
+
+_BINARY_OPS: dict[str, Callable[[Any, Any], Any]] = {
+    "Eq": _compare(operator.eq),
+    "NotEq": _compare(operator.ne),
+    "Lt": _compare(operator.lt),
+    "LtEq": _compare(operator.le),
+    "Gt": _compare(operator.gt),
+    "GtEq": _compare(operator.ge),
+    "Plus": _arithmetic(operator.add),
+    "Minus": _arithmetic(operator.sub),
+    "Multiply": _arithmetic(operator.mul),
+    "TrueDivide": _true_divide,
+    "And": _kleene_and,
+    "Or": _kleene_or,
+}
+
+_UNARY_BOOLEAN_OPS: dict[str, Callable[[Any], Any]] = {
+    "Not": lambda value: None if value is None else not value,
+    "IsNull": lambda value: value is None,
+    "IsNotNull": lambda value: value is not None,
+}
+
+
+def _literal_value(literal: dict):
+    for kind, value in literal.items():
+        if kind == "Dyn":
+            ((_, inner),) = value.items()
+            return inner
+        if kind == "Scalar":
+            ((scalar_type, inner),) = value.items()
+            if scalar_type == "Null":
+                return None
+            if isinstance(inner, (bool, int, float, str)):
+                return inner
+    raise _Unsupported(f"literal {literal}")
+
+
+_COMPARISON_OPS = {"Eq", "NotEq", "Lt", "LtEq", "Gt", "GtEq"}
+_ARITHMETIC_OPS = {"Plus", "Minus", "Multiply", "TrueDivide"}
+
+
+def _literal_kind(node) -> str | None:
+    if not isinstance(node, dict) or "Literal" not in node:
+        return None
+    try:
+        value = _literal_value(node["Literal"])
+    except _Unsupported:
+        return None
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    return None
+
+
+def _collect_field_types(node, types: dict[str, str]) -> None:
+    """
+    Record the type each column of a serialized expression must have: the
+    type of a literal it is compared with, or a number when used in arithmetic.
+    """
+    if isinstance(node, list):
+        for item in node:
+            _collect_field_types(item, types)
+        return
+    if not isinstance(node, dict):
+        return
+    body = node.get("BinaryExpr")
+    if isinstance(body, dict) and len(node) == 1:
+        sides = ((body.get("left"), body.get("right")), (body.get("right"), body.get("left")))
+        for side, other in sides:
+            column = side.get("Column") if isinstance(side, dict) else None
+            if not isinstance(column, str):
+                continue
+            if body.get("op") in _ARITHMETIC_OPS:
+                types.setdefault(column, "number")
+            elif body.get("op") in _COMPARISON_OPS and _literal_kind(other):
+                types.setdefault(column, _literal_kind(other))
+    for value in node.values():
+        _collect_field_types(value, types)
+
+
+def field_types(expression) -> dict[str, str]:
+    """Expected type ("number", "string" or "boolean") of the columns ``expression`` reads."""
+    types: dict[str, str] = {}
+    if isinstance(expression, pl.Expr):
+        try:
+            _collect_field_types(json.loads(expression.meta.serialize(format="json")), types)
+        except (ValueError, TypeError):
+            pass
+    return types
+
+
+def _coerce(value, expected: str):
+    """``value`` as the ``expected`` type; raises ValueError when it cannot be."""
+    if value is None:
+        return None
+    if isinstance(value, (list, dict)):
+        raise ValueError(value)
+    if expected == "number":
+        if isinstance(value, bool):
+            raise ValueError(value)
+        if isinstance(value, (int, float)):
+            return value
+        text = str(value).strip()
+        try:
+            return int(text)
+        except ValueError:
+            return float(text)
+    if expected == "boolean":
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in ("true", "false"):
+            return text == "true"
+        raise ValueError(value)
+    if isinstance(value, bool):
+        raise ValueError(value)
+    return value if isinstance(value, str) else str(value)
+
+
+def _compile_node(node: dict) -> Evaluator:
+    """Translate one node of a serialized Polars expression into a callable."""
+    ((kind, body),) = node.items()
+
+    if kind == "Column":
+        name = body
+        return lambda application: application.get(name)
+
+    if kind == "Literal":
+        value = _literal_value(body)
+        return lambda application: value
+
+    if kind == "BinaryExpr":
+        op = _BINARY_OPS.get(body["op"])
+        if op is None:
+            raise _Unsupported(f"binary op {body['op']}")
+        left = _compile_node(body["left"])
+        right = _compile_node(body["right"])
+        return lambda application: op(left(application), right(application))
+
+    if kind == "Function":
+        function = body["function"]
+        if isinstance(function, dict) and isinstance(function.get("Boolean"), str):
+            op = _UNARY_BOOLEAN_OPS.get(function["Boolean"])
+            if op is not None and len(body["input"]) == 1:
+                operand = _compile_node(body["input"][0])
+                return lambda application: op(operand(application))
+
+    raise _Unsupported(kind)
+
+
+def _frame_evaluator(expression: pl.Expr) -> Evaluator:
+    """Evaluate ``expression`` on a one-row DataFrame of the columns it reads."""
+    inputs = expression.meta.root_names()
+
+    def evaluate(application: dict):
+        row = {name: [application.get(name)] for name in inputs}
+        return pl.DataFrame(row, strict=False).select(expression).item()
+
+    return evaluate
+
+
+def compile_expression(expression: pl.Expr) -> tuple[Evaluator, bool]:
+    """
+    Compile a Polars expression into a function evaluating one application dict.
+    Expressions without a native translation are evaluated on a one-row DataFrame.
+    Args:
+        expression (pl.Expr): Expression to compile.
+    Returns:
+        tuple[Evaluator, bool]: Evaluator returning the value, and whether it is native.
+    """
+    try:
+        tree = json.loads(expression.meta.serialize(format="json"))
+        return _compile_node(tree), True
+    except (_Unsupported, ValueError, KeyError, TypeError):
+        return _frame_evaluator(expression), False
+
+
+def compile_rule(policy_rule: PolicyRule) -> tuple[Evaluator, bool]:
+    """
+    Compile a PolicyRule into a function evaluating one application dict.
+    Expressions are translated from their serialized Polars form with the
+    same null semantics (a null condition fails the rule). Anything without a native
+    translation falls back to evaluating the rule on a one-row DataFrame, so
+    the outcome is always the Polars outcome.
+    Args:
+        policy_rule (PolicyRule): Rule to compile.
+    Returns:
+        tuple[Evaluator, bool]: Evaluator returning the Boolean outcome, and whether it is native.
+    """
+    if isinstance(policy_rule.expressions, pl.Expr):
+        predicate, native = compile_expression(policy_rule.expressions)
+        if native:
+            return (lambda application: predicate(application) is True), True
+    # Only the columns the rule reads go into the one-row frame.
+    return _frame_evaluator(policy_rule.outcome_expression()), False
+
+
+class OnlineEngine:
+    """
+    Single-application decision engine for the online API.
+
+    Every PolicyRule of every pipeline module, and every derived feature the
+    rules read, is compiled once, at construction, into a plain Python
+    callable. ``decide`` then evaluates a single application dict without
+    building a DataFrame, and returns the same columns as the batch pipeline
+    (``decisioning.modules.complete``). Derived feature values are memoized in
+    a bounded LRU keyed by the feature versions and the values of their inputs:
+    the part of the inputDataHash content they depend on, without hashing the
+    whole application. A resubmitted application, or any application sharing
+    those inputs, does not compute them again.
+    """
+
+    def __init__(
+        self,
+        plans: dict[str, RulePlan] | None = None,
+        features: FeatureGraph | None = None,
+        feature_memo_entries: int = 10_000,
+    ):
+        self.plans: dict[str, RulePlan] = plans if plans is not None else module_plans()
+        self.features: FeatureGraph = features if features is not None else feature_graph()
+        self.compiled_features: list[tuple[str, Evaluator]] = []
+        self.fallback_feature_names: list[str] = []
+        for name in self.features.required(RulePlan.combine(*self.plans.values()).input_columns):
+            evaluator, native = compile_expression(self.features.features[name].expressions)
+            if not native:
+                self.fallback_feature_names.append(name)
+            self.compiled_features.append((name, evaluator))
+        # Supplied feature values win over computed ones, so they are part of the key.
+        self.feature_key_columns: list[str] = self.features.source_columns(
+            [name for name, _ in self.compiled_features]
+        )
+        # Memo entries are only valid for the feature versions that computed them.
+        self.feature_versions: dict[str, str] = {
+            name: self.features.features[name].version for name, _ in self.compiled_features
+        }
+        self._memo_version: tuple = tuple(sorted(self.feature_versions.items()))
+        self.feature_memo_entries = feature_memo_entries
+        self._feature_memo: OrderedDict[tuple, dict] = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self._memo_hits = 0
+        self._memo_misses = 0
+
+        # Expected type of every input field a rule or needed feature compares or computes with.
+        self.field_types: dict[str, str] = {}
+        for name in [name for name, _ in self.compiled_features]:
+            for field, kind in field_types(self.features.features[name].expressions).items():
+                self.field_types.setdefault(field, kind)
+
+        self.compiled: dict[str, list[tuple[str, Evaluator]]] = {}
+        self.fallback_rule_ids: list[str] = []
+        for module, plan in self.plans.items():
+            rules = []
+            for policy_rule in plan.policy_rules:
+                for field, kind in field_types(policy_rule.expressions).items():
+                    self.field_types.setdefault(field, kind)
+                evaluator, native = compile_rule(policy_rule)
+                if not native:
+                    self.fallback_rule_ids.append(policy_rule.rule_id)
+                rules.append((policy_rule.rule_id, evaluator))
+            self.compiled[module] = rules
+
+    @property
+    def columns(self) -> list[str]:
+        return decision_columns(self.plans)
+
+    def validate(self, application: dict) -> dict:
+        """
+        Coerce the fields the rules read to the type the rules expect.
+        Numbers sent as strings (``"30"``) and booleans sent as ``"true"``/``"false"``
+        are converted; anything else that does not fit is rejected.
+        Args:
+            application (dict): Application fields keyed by column name.
+        Returns:
+            dict: ``application``, or a copy with coerced values.
+        Raises:
+            InvalidApplicationError: When any field cannot be coerced.
+        """
+        coerced, errors = {}, []
+        for field, expected in self.field_types.items():
+            value = application.get(field)
+            try:
+                converted = _coerce(value, expected)
+            except (ValueError, TypeError):
+                errors.append({"field": field, "value": value, "expected": expected})
+                continue
+            if converted is not value:
+                coerced[field] = converted
+        if errors:
+            raise InvalidApplicationError(errors)
+        return {**application, **coerced} if coerced else application
+
+    def resolve_features(self, application: dict) -> dict:
+        """
+        The application with the derived features its rules read.
+        Supplied values are kept; missing or null ones are computed, once per
+        distinct set of feature inputs while it stays in the memo.
+        Args:
+            application (dict): Application fields keyed by column name.
+        Returns:
+            dict: ``application`` itself when no rule reads a feature, else a copy with them.
+        """
+        if not self.compiled_features:
+            return application
+        key = (self._memo_version, *(application.get(col) for col in self.feature_key_columns))
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+        if self.feature_memo_entries <= 0 or key is None:
+            return self._compute_features(application)
+        with self._memo_lock:
+            values = self._feature_memo.get(key)
+            if values is not None:
+                self._feature_memo.move_to_end(key)
+                self._memo_hits += 1
+                return {**application, **values}
+        resolved = self._compute_features(application)
+        values = {name: resolved[name] for name, _ in self.compiled_features}
+        with self._memo_lock:
+            self._memo_misses += 1
+            self._feature_memo[key] = values
+            while len(self._feature_memo) > self.feature_memo_entries:
+                self._feature_memo.popitem(last=False)
+        return resolved
+
+    def _compute_features(self, application: dict) -> dict:
+        resolved = dict(application)
+        for name, evaluator in self.compiled_features:
+            if resolved.get(name) is None:
+                resolved[name] = evaluator(resolved)
+        return resolved
+
+    def feature_metrics(self) -> dict:
+        lookups = self._memo_hits + self._memo_misses
+        return {
+            "features": [name for name, _ in self.compiled_features],
+            "featureVersions": self.feature_versions,
+            "fallbackFeatures": self.fallback_feature_names,
+            "memoEntries": len(self._feature_memo),
+            "maxMemoEntries": self.feature_memo_entries,
+            "memoHits": self._memo_hits,
+            "memoMisses": self._memo_misses,
+            "hitRatio": round(self._memo_hits / lookups, 4) if lookups else None,
+        }
+
+    def decide(self, application: dict) -> dict:
+        """
+        Decide a single application.
+        Args:
+            application (dict): Application fields keyed by column name; missing fields are null.
+        Returns:
+            dict: Rule outcomes, module outcomes, finalDecision, decisionStage and reason codes.
+        Raises:
+            InvalidApplicationError: When a field has a type the rules cannot evaluate.
+        """
+        try:
+            return self._decide(application)
+        except (TypeError, pl.exceptions.PolarsError) as exc:
+            raise InvalidApplicationError([], str(exc)) from exc
+
+    def _decide(self, application: dict) -> dict:
+        application = self.resolve_features(application)
+        profiling = PROFILER.enabled
+        result: dict = {}
+        triggered: list[str] = []
+        failed_stage = None
+        for module, rules in self.compiled.items():
+            module_passed = True
+            if profiling:
+                PROFILER.record_module(module, 1)
+            for rule_id, evaluator in rules:
+                if profiling:
+                    started = time.perf_counter_ns()
+                    outcome = evaluator(application)
+                    PROFILER.record_rule(
+                        module, rule_id, 1, int(outcome), time.perf_counter_ns() - started
+                    )
+                else:
+                    outcome = evaluator(application)
+                result[rule_id] = outcome
+                if not outcome:
+                    module_passed = False
+                    triggered.append(rule_id)
+            result[module_outcome_column(module)] = "PASS" if module_passed else "FAIL"
+            if not module_passed and failed_stage is None:
+                failed_stage = module
+
+        result["finalDecision"] = "APPROVED" if failed_stage is None else "DECLINED"
+        result["decisionStage"] = failed_stage or FINAL_STAGE
+        result["primaryReasonCode"] = triggered[0] if triggered else None
+        result["secondaryReasonCodes"] = triggered[1:]
+        result["policyRuleIdsTriggered"] = triggered
+        return result
+
+    def parity_mismatches(self, applications: pl.DataFrame) -> list[dict]:
+        """
+        Compare this engine against the Polars batch pipeline.
+        Args:
+            applications (pl.DataFrame): Applications to decide on both paths.
+        Returns:
+            list[dict]: One entry per differing row and column; empty when the paths agree.
+        """
+        columns = self.columns
+        batch = run_complete(applications, self.plans).select(columns).collect()
+        mismatches = []
+        for row_number, (application, expected) in enumerate(
+            zip(applications.iter_rows(named=True), batch.iter_rows(named=True))
+        ):
+            online = self.decide(application)
+            for column in columns:
+                if online[column] != expected[column]:
+                    mismatches.append(
+                        {
+                            "row": row_number,
+                            "column": column,
+                            "online": online[column],
+                            "batch": expected[column],
+                        }
+                    )
+        return mismatches
@@ -1,6 +1,47 @@
+import polars as pl
+
+
 class PolicyRule:
-    def __init__(self, rule_id: str, description: str, expressions, view: list[str]):
+    def __init__(
+        self,
+        rule_id: str,
+        description: str,
+        expressions,
+        view: list[str],
+        version: str = "unversioned",
+    ):
         self.rule_id = rule_id
         self.description = description
         self.expressions = expressions
         self.view = view
+        self.version = version
+
+    def outcome_expression(self) -> pl.Expr:
+        """
+        Build the Boolean outcome column for this rule.
+        True when the rule passes; a null condition fails the rule.
+        Returns:
+            pl.Expr: Expression aliased to the rule id.
+        """
+        return (
+            pl.when(self.expressions)
+            .then(pl.lit(True))
+            .otherwise(pl.lit(False))
+            .alias(f"{self.rule_id}")
+        )
+
+    def yes_no_expression(self) -> pl.Expr:
+        """
+        View of this rule's Boolean outcome column as "Y"/"N".
+        A null outcome (a rule gating skipped) stays null.
+        Returns:
+            pl.Expr: Expression aliased to the rule id.
+        """
+        outcome = pl.col(self.rule_id)
+        return (
+            pl.when(outcome)
+            .then(pl.lit("Y"))
+            .when(outcome.not_())
+            .then(pl.lit("N"))
+            .alias(f"{self.rule_id}")
+        )
@@ -0,0 +1,120 @@
+from functools import reduce
+
+import polars as pl
+from decisioning.classes.PolicyRule import PolicyRule
+
+
+class RulePlan:
+    """
+    Compiles a set of PolicyRules into a single lazy Polars projection.
+
+    Every rule column is added in one ``with_columns`` call on a LazyFrame, so
+    the query optimiser sees all rules at once (common-subexpression
+    elimination, parallel evaluation) and the input is scanned a single time
+    instead of once per rule as with chained ``ApplyRule.execute_rule`` calls.
+
+    Rule outcomes are Boolean columns (True = pass). They can be packed into
+    one integer bitmask per plan for compact storage, and viewed as "Y"/"N".
+    """
+
+    # Rules a single bitmask column can hold.
+    MAX_BITMASK_RULES: int = 64
+
+    def __init__(self, policy_rules: list[PolicyRule]):
+        seen: set[str] = set()
+        for policy_rule in policy_rules:
+            if policy_rule.rule_id in seen:
+                raise ValueError(f"Duplicate rule_id in rule plan: {policy_rule.rule_id}")
+            seen.add(policy_rule.rule_id)
+
+        self.policy_rules: list[PolicyRule] = list(policy_rules)
+        self.expressions: list[pl.Expr] = [
+            policy_rule.outcome_expression() for policy_rule in self.policy_rules
+        ]
+
+    @classmethod
+    def combine(cls, *plans: "RulePlan") -> "RulePlan":
+        """
+        Fuse several module plans into one plan covering all of their rules.
+        Args:
+            *plans (RulePlan): Plans to fuse, in pipeline order.
+        Returns:
+            RulePlan: Plan evaluating every rule in a single projection.
+        """
+        return cls([policy_rule for plan in plans for policy_rule in plan.policy_rules])
+
+    @property
+    def rule_ids(self) -> list[str]:
+        return [policy_rule.rule_id for policy_rule in self.policy_rules]
+
+    @property
+    def rule_versions(self) -> dict[str, str]:
+        return {policy_rule.rule_id: policy_rule.version for policy_rule in self.policy_rules}
+
+    @property
+    def input_columns(self) -> list[str]:
+        """Union of the columns declared in each rule's view, in first-seen order."""
+        return list(dict.fromkeys(col for rule in self.policy_rules for col in rule.view))
+
+    def lazy(self, data: pl.DataFrame | pl.LazyFrame) -> pl.LazyFrame:
+        """
+        Attach every rule column to ``data`` as one lazy projection.
+        Args:
+            data (pl.DataFrame | pl.LazyFrame): Applicant data.
+        Returns:
+            pl.LazyFrame: Un-collected plan with one Boolean column per rule.
+        """
+        if not self.expressions:
+            return data.lazy()
+        return data.lazy().with_columns(self.expressions)
+
+    def execute(self, data: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame:
+        """
+        Evaluate every rule and collect the result.
+        Args:
+            data (pl.DataFrame | pl.LazyFrame): Applicant data.
+        Returns:
+            pl.DataFrame: Input data with one Boolean column per rule.
+        """
+        return self.lazy(data).collect()
+
+    def yes_no_expressions(self) -> list[pl.Expr]:
+        """Views of every rule column as "Y"/"N", for consumers of the string format."""
+        return [policy_rule.yes_no_expression() for policy_rule in self.policy_rules]
+
+    def bitmask_expression(self, alias: str) -> pl.Expr:
+        """
+        Pack this plan's Boolean rule columns into one UInt64 bitmask.
+        Bit ``i`` is set when the plan's i-th rule failed, so a zero mask means
+        every rule passed. The mask is null when any rule outcome is null.
+        Args:
+            alias (str): Name of the mask column.
+        Returns:
+            pl.Expr: Bitmask expression.
+        """
+        if len(self.policy_rules) > self.MAX_BITMASK_RULES:
+            raise ValueError(
+                f"Cannot pack {len(self.policy_rules)} rules into a "
+                f"{self.MAX_BITMASK_RULES}-bit mask: {alias}"
+            )
+        if not self.policy_rules:
+            return pl.lit(0, dtype=pl.UInt64).alias(alias)
+        bits = [
+            pl.col(rule_id).not_().cast(pl.UInt64) * pl.lit(1 << position, dtype=pl.UInt64)
+            for position, rule_id in enumerate(self.rule_ids)
+        ]
+        return reduce(lambda left, right: left + right, bits).alias(alias)
+
+    def unpack_bitmask_expressions(self, mask_column: str) -> list[pl.Expr]:
+        """
+        Boolean rule columns recovered from a ``bitmask_expression`` column.
+        Args:
+            mask_column (str): Name of the mask column.
+        Returns:
+            list[pl.Expr]: One Boolean expression per rule, aliased to the rule id.
+        """
+        mask = pl.col(mask_column)
+        return [
+            ((mask & pl.lit(1 << position, dtype=pl.UInt64)) == 0).alias(rule_id)
+            for position, rule_id in enumerate(self.rule_ids)
+        ]
@@ -0,0 +1,327 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import polars as pl
+
+from decisioning.module_calls.complete_call import peak_rss_bytes, run_streaming_batch
+from decisioning.utility.synthetic import template_columns, write_synthetic
+
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+DATA_DIR = REPO_ROOT / "data" / "synthetic"
+RESULTS_DIR = REPO_ROOT / "data" / "benchmarks"
+
+DEFAULT_BATCH_ROWS = 100_000
+DEFAULT_LATENCY_SAMPLES = 2_000
+DEFAULT_LOOKUP_ROWS = 10_000
+
+# Targets from the service requirements: p95 single-application latency under
+# 50 ms, and a 100k-row batch inside a few seconds.
+TARGETS = {
+    "onlineEngine.p95Ms": 50.0,
+    "onlineBatchOfOne.p95Ms": 50.0,
+    "lookup.p95Ms": 50.0,
+    "batch.rowsPerSecond": 20_000.0,
+}
+# A metric more than this much worse than the baseline is reported as a regression.
+REGRESSION_TOLERANCE = 0.10
+# Metrics where larger is better; every other tracked metric is better when smaller.
+HIGHER_IS_BETTER = {"batch.rowsPerSecond"}
+
+
+def _percentiles(samples_ms: list[float]) -> dict:
+    cuts = statistics.quantiles(samples_ms, n=100, method="inclusive")
+    return {
+        "samples": len(samples_ms),
+        "p50Ms": round(cuts[49], 4),
+        "p95Ms": round(cuts[94], 4),
+        "p99Ms": round(cuts[98], 4),
+        "maxMs": round(max(samples_ms), 4),
+    }
+
+
+def _applications(rows: int, seed: int, columns: int, suffix: str = ".parquet") -> Path:
+    """Synthetic application file, generated once per (rows, seed, columns)."""
+    path = DATA_DIR / f"applications_{rows}_{seed}_{columns}{suffix}"
+    if not path.exists():
+        write_synthetic(path, rows, seed, columns)
+    return path
+
+
+def _bench_batch(rows: int, seed: int, columns: int) -> dict:
+    source = _applications(rows, seed, columns)
+    with tempfile.TemporaryDirectory() as output_dir:
+        report = run_streaming_batch(source, Path(output_dir) / "decisions")
+    return {
+        "rows": report["rows"],
+        "elapsedSeconds": report["elapsedSeconds"],
+        "rowsPerSecond": report["rowsPerSecond"],
+        "peakRssBytes": peak_rss_bytes(),
+    }
+
+
+def _bench_online(samples: int, seed: int, columns: int) -> dict:
+    from decisioning.classes.OnlineEngine import OnlineEngine
+    from decisioning.modules.complete import decide_applications
+
+    engine = OnlineEngine()
+    # Requests carry the whole application, not just the fields the rules read.
+    applications = pl.read_parquet(_applications(samples, seed, columns)).to_dicts()
+    # Warm both paths so one-off compilation is not counted as request latency.
+    engine.decide(applications[0])
+    decide_applications(applications[:1], engine.plans)
+
+    engine_ms, batch_of_one_ms = [], []
+    for application in applications:
+        started = time.perf_counter_ns()
+        engine.decide(application)
+        engine_ms.append((time.perf_counter_ns() - started) / 1e6)
+    for application in applications[: min(samples, 500)]:
+        started = time.perf_counter_ns()
+        decide_applications([application], engine.plans)
+        batch_of_one_ms.append((time.perf_counter_ns() - started) / 1e6)
+    return {
+        "engine": _percentiles(engine_ms),
+        "batchOfOne": _percentiles(batch_of_one_ms),
+        "peakRssBytes": peak_rss_bytes(),
+    }
+
+
+def _bench_lookup(rows: int, samples: int, seed: int, columns: int) -> dict:
+    from app.llm.tools.application_record_store import ApplicationRecordStore, convert_csv_to_store
+
+    csv_path = _applications(rows, seed, columns, ".csv")
+    with tempfile.TemporaryDirectory() as store_dir:
+        store_path = Path(store_dir) / "applications.duckdb"
+        started = time.perf_counter()
+        convert_csv_to_store(csv_path, store_path)
+        convert_seconds = time.perf_counter() - started
+
+        store = ApplicationRecordStore(store_path)
+        try:
+            # Spread the looked-up ids over the whole key range.
+            step = max(rows // samples, 1)
+            ids = [f"APP_{1 + (i * step) % rows}" for i in range(samples)]
+            store.get(ids[0])
+            lookup_ms = []
+            for app_id in ids:
+                started = time.perf_counter_ns()
+                store.get(app_id)
+                lookup_ms.append((time.perf_counter_ns() - started) / 1e6)
+        finally:
+            store.close()
+    return {
+        "rows": rows,
+        "convertSeconds": round(convert_seconds, 3),
+        **_percentiles(lookup_ms),
+        "peakRssBytes": peak_rss_bytes(),
+    }
+
+
+def _run_isolated(function, *args) -> dict:
+    """Run one benchmark case in a fresh process so its peak RSS is its own."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(function, *args).result()
+
+
+def flatten_metrics(cases: dict) -> dict[str, float]:
+    """Tracked metrics keyed as ``<case>.<metric>`` for target and regression checks."""
+    metrics = {}
+    if "batch" in cases:
+        metrics["batch.rowsPerSecond"] = cases["batch"]["rowsPerSecond"]
+        metrics["batch.peakRssBytes"] = cases["batch"]["peakRssBytes"]
+    if "online" in cases:
+        for name, key in (("engine", "onlineEngine"), ("batchOfOne", "onlineBatchOfOne")):
+            metrics[f"{key}.p95Ms"] = cases["online"][name]["p95Ms"]
+            metrics[f"{key}.p99Ms"] = cases["online"][name]["p99Ms"]
+    if "lookup" in cases:
+        metrics["lookup.p95Ms"] = cases["lookup"]["p95Ms"]
+        metrics["lookup.p99Ms"] = cases["lookup"]["p99Ms"]
+    return metrics
+
+
+def check_targets(metrics: dict[str, float]) -> dict[str, dict]:
+    """Compare metrics against the fixed service targets."""
+    checks = {}
+    for name, target in TARGETS.items():
+        if name not in metrics:
+            continue
+        value = metrics[name]
+        met = value >= target if name in HIGHER_IS_BETTER else value <= target
+        checks[name] = {"value": value, "target": target, "met": met}
+    return checks
+
+
+def find_regressions(metrics: dict[str, float], baseline: dict[str, float]) -> dict[str, dict]:
+    """
+    Metrics that got more than REGRESSION_TOLERANCE worse than the baseline.
+    Args:
+        metrics (dict[str, float]): Metrics of this run.
+        baseline (dict[str, float]): Metrics of an earlier run.
+    Returns:
+        dict[str, dict]: Regressed metric -> current value, baseline value and relative change.
+    """
+    regressions = {}
+    for name, value in metrics.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        change = (value - previous) / previous
+        worse = -change if name in HIGHER_IS_BETTER else change
+        if worse > REGRESSION_TOLERANCE:
+            regressions[name] = {"value": value, "baseline": previous, "change": round(change, 4)}
+    return regressions
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _workload(result: dict) -> dict | None:
+    return result.get("workload")
+
+
+def _latest_result(workload: dict) -> Path | None:
+    """Newest saved result of the same workload; other row counts or widths are not comparable."""
+    for path in sorted(RESULTS_DIR.glob("benchmark_*.json"), reverse=True):
+        if _workload(json.loads(path.read_text())) == workload:
+            return path
+    return None
+
+
+def run_benchmarks(
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    latency_samples: int = DEFAULT_LATENCY_SAMPLES,
+    lookup_rows: int = DEFAULT_LOOKUP_ROWS,
+    seed: int = 42,
+    cases: list[str] | None = None,
+    baseline: str | Path | None = None,
+    columns: int | None = None,
+) -> dict:
+    """
+    Run the benchmark suite on seeded synthetic data and compare it with a baseline.
+    Each case runs in its own spawned process, so peak RSS is reported per case.
+    Args:
+        batch_rows (int): Rows decided by the streaming batch case.
+        latency_samples (int): Applications timed by the online latency case.
+        lookup_rows (int): Rows in the application store for the lookup case.
+        seed (int): Synthetic data seed.
+        cases (list[str] | None): Subset of ``batch``, ``online`` and ``lookup``.
+        baseline (str | Path | None): Earlier result file of the same workload; defaults
+            to the latest saved result with the same row counts, seed and width.
+        columns (int | None): Width of the synthetic applications; all schema columns if None.
+    Returns:
+        dict: Environment, workload, per-case results, target checks and regressions.
+    Raises:
+        ValueError: When ``baseline`` ran a different workload.
+    """
+    cases = cases or ["batch", "online", "lookup"]
+    columns = min(columns, len(template_columns())) if columns else len(template_columns())
+    workload = {
+        "batchRows": batch_rows,
+        "latencySamples": latency_samples,
+        "lookupRows": lookup_rows,
+        "seed": seed,
+        "columns": columns,
+    }
+    runners = {
+        "batch": (_bench_batch, batch_rows, seed, columns),
+        "online": (_bench_online, latency_samples, seed, columns),
+        "lookup": (_bench_lookup, lookup_rows, min(latency_samples, lookup_rows), seed, columns),
+    }
+    baseline_path = Path(baseline) if baseline else _latest_result(workload)
+    baseline_result = json.loads(baseline_path.read_text()) if baseline_path else {}
+    if baseline and _workload(baseline_result) != workload:
+        raise ValueError(
+            f"Baseline {baseline_path} ran workload {_workload(baseline_result)}, not {workload}"
+        )
+
+    results = {}
+    for case in cases:
+        function, *args = runners[case]
+        logger.info("Benchmark case start case=%s", case)
+        results[case] = _run_isolated(function, *args)
+        logger.info("Benchmark case done case=%s result=%s", case, results[case])
+
+    metrics = flatten_metrics(results)
+    baseline_metrics = baseline_result.get("metrics", {})
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "gitCommit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "polars": pl.__version__,
+            "platform": platform.platform(),
+            "cpuCount": multiprocessing.cpu_count(),
+        },
+        "seed": seed,
+        "workload": workload,
+        "cases": results,
+        "metrics": metrics,
+        "targets": check_targets(metrics),
+        "baseline": str(baseline_path) if baseline_metrics else None,
+        "regressions": find_regressions(metrics, baseline_metrics),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Decisioning benchmark suite.")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument("--latency-samples", type=int, default=DEFAULT_LATENCY_SAMPLES)
+    parser.add_argument("--lookup-rows", type=int, default=DEFAULT_LOOKUP_ROWS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--columns", type=int, default=None, help="Synthetic schema width (default: all columns)"
+    )
+    parser.add_argument(
+        "--case", action="append", choices=["batch", "online", "lookup"], help="Run only these cases"
+    )
+    parser.add_argument("--baseline", default=None, help="Result file to compare against")
+    parser.add_argument("--no-save", action="store_true", help="Do not write the result file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    result = run_benchmarks(
+        args.batch_rows,
+        args.latency_samples,
+        args.lookup_rows,
+        args.seed,
+        args.case,
+        args.baseline,
+        args.columns,
+    )
+    if not args.no_save:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = RESULTS_DIR / f"benchmark_{stamp}.json"
+        path.write_text(json.dumps(result, indent=2))
+        logger.info("Benchmark result written path=%s", path)
+    print(json.dumps({"targets": result["targets"], "regressions": result["regressions"]}, indent=2))
+    if result["regressions"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
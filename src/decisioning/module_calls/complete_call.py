@@ -0,0 +1,242 @@
+import argparse
+import glob
+import json
+import logging
+import resource
+import sys
+import time
+from pathlib import Path
+
+import polars as pl
+from decisioning.classes.RulePlan import RulePlan
+from decisioning.modules.complete import (
+    RULE_OUTCOME_FORMATS,
+    SKIPPED,
+    decision_columns,
+    fact_columns,
+    module_outcome_column,
+    module_plans,
+    rule_outcome_view,
+    rule_versions,
+    run_complete,
+    run_gated_lazy,
+)
+
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS: list[str] = ["applicationId"]
+DEFAULT_PARTITION_BY: list[str] = ["finalDecision"]
+
+# Parquet key-value metadata entry recording the rule and derived feature versions a
+# decision set was built with.
+RULE_VERSIONS_METADATA_KEY: str = "decisioning.ruleVersions"
+
+
+def output_columns(plans: dict[str, RulePlan]) -> list[str]:
+    """Key, the facts the rules read, and the decision columns."""
+    return list(dict.fromkeys(KEY_COLUMNS + fact_columns(plans) + decision_columns(plans)))
+
+
+def rule_versions_metadata(plans: dict[str, RulePlan]) -> dict[str, str]:
+    return {RULE_VERSIONS_METADATA_KEY: json.dumps(rule_versions(plans), sort_keys=True)}
+
+
+def decision_set_files(path: str | Path) -> list[Path]:
+    """
+    Parquet files of a decision set: a single file, a directory written by
+    ``run_streaming_batch`` (searched recursively) or a glob pattern.
+    Args:
+        path (str | Path): Decision set file, directory or glob.
+    Returns:
+        list[Path]: Files in sorted order, empty when nothing matches.
+    """
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    if path.is_dir():
+        return sorted(path.rglob("*.parquet"))
+    return sorted(Path(match) for match in glob.glob(str(path), recursive=True))
+
+
+def read_rule_versions(path: str | Path) -> dict[str, str]:
+    """
+    Rule versions recorded in a decision set written by the batch runners.
+    Args:
+        path (str | Path): Decision set Parquet file, directory or glob.
+    Returns:
+        dict[str, str]: Rule versions keyed by rule id and feature versions keyed by
+            feature name, empty if none were recorded.
+    """
+    files = decision_set_files(path)
+    if not files:
+        raise FileNotFoundError(f"No decision set files at {path}")
+    # Every file of a set is written with the same metadata.
+    metadata = pl.read_parquet_metadata(files[0])
+    return json.loads(metadata.get(RULE_VERSIONS_METADATA_KEY, "{}"))
+
+
+def scan_applications(source: str | Path) -> pl.LazyFrame:
+    """
+    Lazily scan an application file without loading it into memory.
+    Args:
+        source (str | Path): CSV or Parquet file (or Parquet glob).
+    Returns:
+        pl.LazyFrame: Lazy scan over the applications.
+    """
+    source = Path(source)
+    suffix = source.suffix.lower()
+    if suffix == ".parquet":
+        return pl.scan_parquet(source)
+    if suffix == ".csv":
+        return pl.scan_csv(source, infer_schema_length=10_000)
+    raise ValueError(f"Unsupported application file type: {source}")
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _stage_counts(output_dir: Path, plans: dict[str, RulePlan]) -> list[dict]:
+    """Rows each module evaluated, passed, failed and skipped, read back from a gated output."""
+    outcomes = [module_outcome_column(module) for module in plans]
+    counts = (
+        pl.scan_parquet(output_dir / "**" / "*.parquet", hive_partitioning=False)
+        .select(
+            (pl.col(col) == status).sum().alias(f"{col}:{status}")
+            for col in outcomes
+            for status in ("PASS", "FAIL", SKIPPED)
+        )
+        .collect()
+        .row(0, named=True)
+    )
+    stages = []
+    for module, col in zip(plans, outcomes):
+        passed, failed = counts[f"{col}:PASS"], counts[f"{col}:FAIL"]
+        stages.append(
+            {
+                "module": module,
+                "rowsEvaluated": passed + failed,
+                "rowsPassed": passed,
+                "rowsFailed": failed,
+                "rowsSkipped": counts[f"{col}:{SKIPPED}"],
+            }
+        )
+    return stages
+
+
+def run_streaming_batch(
+    source: str | Path,
+    output_dir: str | Path,
+    partition_by: list[str] | None = None,
+    keep_input_columns: bool = False,
+    rule_outcomes: str = "boolean",
+    gated: bool = False,
+) -> dict:
+    """
+    Decide every application in ``source`` with bounded memory.
+    The module pipeline runs on Polars' streaming engine and its results are
+    sunk straight to Parquet partitioned by ``partition_by``, so the input is
+    never materialised in full.
+    Args:
+        source (str | Path): CSV or Parquet application file.
+        output_dir (str | Path): Empty (or missing) directory for the partitioned output.
+        partition_by (list[str] | None): Output partition keys, defaults to finalDecision.
+        keep_input_columns (bool): Write every input column, not only the key, facts and
+            decision columns.
+        rule_outcomes (str): Rule column representation, one of RULE_OUTCOME_FORMATS.
+        gated (bool): Record later modules as SKIPPED for rows an earlier module
+            failed (``run_gated_lazy``), with per-module counts in the report.
+    Returns:
+        dict: Run report with row count, duration, rows/sec and peak RSS.
+    """
+    output_dir = Path(output_dir)
+    if output_dir.exists() and any(output_dir.iterdir()):
+        raise FileExistsError(f"Output directory is not empty: {output_dir}")
+    partition_by = list(partition_by or DEFAULT_PARTITION_BY)
+
+    started = time.perf_counter()
+    plans = module_plans()
+    run = run_gated_lazy if gated else run_complete
+    pipeline = run(scan_applications(source), plans)
+    if not keep_input_columns:
+        pipeline = pipeline.select(output_columns(plans))
+    pipeline = rule_outcome_view(pipeline, plans, rule_outcomes)
+
+    logger.info("Streaming batch start source=%s output_dir=%s", source, output_dir)
+    pipeline.sink_parquet(
+        pl.PartitionByKey(output_dir, by=partition_by),
+        metadata=rule_versions_metadata(plans),
+        mkdir=True,
+        engine="streaming",
+    )
+    elapsed = time.perf_counter() - started
+
+    # Row counts come from the Parquet footers, not from re-reading the data.
+    rows = pl.scan_parquet(output_dir / "**" / "*.parquet").select(pl.len()).collect().item()
+    report = {
+        "source": str(source),
+        "outputDir": str(output_dir),
+        "rows": rows,
+        "elapsedSeconds": round(elapsed, 3),
+        "rowsPerSecond": round(rows / elapsed, 1) if elapsed > 0 else None,
+        "peakRssBytes": peak_rss_bytes(),
+        "stages": _stage_counts(output_dir, plans) if gated else None,
+    }
+    logger.info(
+        "Streaming batch done rows=%d elapsed=%.3fs rows_per_sec=%s peak_rss_mb=%.1f",
+        rows,
+        elapsed,
+        report["rowsPerSecond"],
+        report["peakRssBytes"] / (1024 * 1024),
+    )
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Streaming batch decisioning to Parquet.")
+    parser.add_argument("source", help="CSV or Parquet application file")
+    parser.add_argument("output_dir", help="Directory for the partitioned Parquet output")
+    parser.add_argument(
+        "--partition-by", nargs="+", default=DEFAULT_PARTITION_BY, help="Output partition keys"
+    )
+    parser.add_argument(
+        "--keep-input-columns", action="store_true", help="Also write every input column"
+    )
+    parser.add_argument(
+        "--rule-outcomes",
+        choices=RULE_OUTCOME_FORMATS,
+        default="boolean",
+        help="Write rule outcomes as Boolean columns, per-module bitmasks or Y/N strings",
+    )
+    parser.add_argument(
+        "--gated", action="store_true", help="Skip later modules for already-declined rows"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    report = run_streaming_batch(
+        args.source,
+        args.output_dir,
+        args.partition_by,
+        args.keep_input_columns,
+        args.rule_outcomes,
+        args.gated,
+    )
+    for stage in report["stages"] or []:
+        print(
+            f"module={stage['module']} evaluated={stage['rowsEvaluated']} "
+            f"passed={stage['rowsPassed']} failed={stage['rowsFailed']} "
+            f"skipped={stage['rowsSkipped']}"
+        )
+    print(
+        f"rows={report['rows']} elapsed={report['elapsedSeconds']}s "
+        f"rows/sec={report['rowsPerSecond']} peak_rss_mb={report['peakRssBytes'] / 2**20:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import json
+import logging
+import statistics
+import time
+from typing import Callable
+
+import polars as pl
+from decisioning.classes.OnlineEngine import OnlineEngine
+from decisioning.classes.PolicyRule import PolicyRule
+from decisioning.classes.RulePlan import RulePlan
+from decisioning.modules.complete import (
+    decision_columns,
+    fact_columns,
+    module_plans,
+    run_complete,
+    run_gated,
+)
+from decisioning.modules.features import feature_graph
+from decisioning.utility.synthetic import generate_applications
+
+
+logger = logging.getLogger(__name__)
+
+# Rules over shared derived features for the servicing, bureau and decision
+# modules: (rule id, module, feature, condition on the feature's value).
+DEMO_RULES: list[tuple[str, str, str, Callable[[pl.Expr], pl.Expr]]] = [
+    ("X912", "bureau", "monthsRemainingOnVisa", lambda value: value >= 12),
+    ("X201", "bureau", "debtServiceRatio", lambda value: value <= 0.8),
+    ("X401", "servicing", "netSurplusMonthly", lambda value: value >= -2_000),
+    ("X402", "servicing", "repaymentAtStressRate", lambda value: value <= 5_000),
+    ("X501", "decision", "debtServiceRatio", lambda value: value <= 0.7),
+    ("X502", "decision", "netSurplusMonthly", lambda value: value >= -1_500),
+    ("X503", "decision", "repaymentAtStressRate", lambda value: value <= 4_000),
+    ("X504", "decision", "monthsRemainingOnVisa", lambda value: value >= 6),
+]
+
+
+def demo_plans(shared: bool) -> dict[str, RulePlan]:
+    """
+    The pipeline plans plus DEMO_RULES.
+    Args:
+        shared (bool): Rules read the resolved feature columns; otherwise each
+            rule computes its feature inline, as modules did before the registry.
+    Returns:
+        dict[str, RulePlan]: Plans keyed by module name, in pipeline order.
+    """
+    graph = feature_graph()
+    plans = module_plans()
+    for rule_id, module, name, condition in DEMO_RULES:
+        feature = graph.features[name]
+        value = pl.col(name) if shared else feature.expressions
+        view = ["applicationId", name] if shared else ["applicationId", *feature.view]
+        rule = PolicyRule(rule_id, f"{rule_id}: {name}", condition(value), view)
+        plans[module] = RulePlan(plans[module].policy_rules + [rule])
+    return plans
+
+
+def _best_of(repeats: int, run: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _online_latencies(engine: OnlineEngine, applications: list[dict]) -> dict:
+    latencies = {}
+    for label in ("firstPass", "repeatPass"):
+        samples = []
+        for application in applications:
+            started = time.perf_counter()
+            engine.decide(application)
+            samples.append((time.perf_counter() - started) * 1000)
+        cuts = statistics.quantiles(samples, n=20)
+        latencies[label] = {
+            "p50Ms": round(statistics.median(samples), 4),
+            "p95Ms": round(cuts[18], 4),
+        }
+    return latencies
+
+
+def benchmark_features(rows: int = 200_000, online_samples: int = 1_000, repeats: int = 3) -> dict:
+    """
+    Compare rules computing derived features inline with rules reading the
+    shared, once-resolved feature columns, on synthetic applications without
+    precomputed features.
+    Args:
+        rows (int): Applications in the batch runs.
+        online_samples (int): Applications decided one at a time, twice each.
+        repeats (int): Batch runs per variant; the fastest is reported.
+    Returns:
+        dict: Feature levels, batch seconds per variant and online latency percentiles.
+    """
+    graph = feature_graph()
+    inline, shared = demo_plans(shared=False), demo_plans(shared=True)
+    # Only the columns the rules read, so the batch fits in memory at any size.
+    applications = generate_applications(rows).select(fact_columns(inline)).collect()
+    columns = decision_columns(inline)
+
+    expected = run_complete(applications, inline).select(columns).collect()
+    if not expected.equals(run_complete(applications, shared).select(columns).collect()):
+        raise AssertionError("Shared features changed the decisions")
+
+    report = {"rows": rows, "featureLevels": graph.levels, "batch": {}, "online": {}}
+    for label, plans in (("inline", inline), ("shared", shared)):
+        report["batch"][label] = {
+            "completeSeconds": round(
+                _best_of(repeats, lambda: run_complete(applications, plans).collect()), 4
+            ),
+            "gatedSeconds": round(_best_of(repeats, lambda: run_gated(applications, plans)), 4),
+        }
+
+    sample = applications.head(online_samples).to_dicts()
+    engines = {
+        "inline": OnlineEngine(inline),
+        "sharedNoMemo": OnlineEngine(shared, feature_memo_entries=0),
+        "shared": OnlineEngine(shared),
+    }
+    for label, engine in engines.items():
+        report["online"][label] = _online_latencies(engine, sample)
+    report["online"]["memo"] = engines["shared"].feature_metrics()
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure shared derived features against rules computing them inline."
+    )
+    parser.add_argument("--rows", type=int, default=200_000, help="Applications per batch run")
+    parser.add_argument(
+        "--online-samples", type=int, default=1_000, help="Applications decided one at a time"
+    )
+    parser.add_argument("--repeats", type=int, default=3, help="Batch runs per variant")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    print(json.dumps(benchmark_features(args.rows, args.online_samples, args.repeats), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+import argparse
+import logging
+import shutil
+import time
+from pathlib import Path
+
+import polars as pl
+from decisioning.classes.RulePlan import RulePlan
+from decisioning.module_calls.complete_call import (
+    KEY_COLUMNS,
+    decision_set_files,
+    output_columns,
+    read_rule_versions,
+    rule_versions_metadata,
+    scan_applications,
+)
+from decisioning.modules.complete import (
+    REASON_CODE_COLUMNS,
+    aggregate_outcomes,
+    fact_columns,
+    module_plans,
+    normalize_rule_outcomes,
+    reason_code_expressions,
+    with_derived_features,
+)
+from decisioning.modules.features import feature_graph
+
+
+logger = logging.getLogger(__name__)
+
+STORED_SUFFIX: str = "__stored"
+STORED_MARKER: str = "_inStoredSet"
+APPLICATION_MARKER: str = "_inApplications"
+STORED_ORDER: str = "_storedOrder"
+
+
+def stale_feature_names(stored_versions: dict[str, str], plans: dict[str, RulePlan]) -> list[str]:
+    """
+    Derived features the rules read whose stored values can no longer be reused:
+    their version differs from the one a decision set was built with, or they
+    read a feature whose version does.
+    """
+    graph = feature_graph()
+    needed = graph.required(RulePlan.combine(*plans.values()).input_columns)
+    changed = {name for name in needed if stored_versions.get(name) != graph.features[name].version}
+    return [name for name in needed if changed.intersection(graph.required([name]))]
+
+
+def stale_rule_ids(stored_versions: dict[str, str], plans: dict[str, RulePlan]) -> list[str]:
+    """
+    Rules whose version differs from the one a decision set was built with, or
+    whose view reads a stale derived feature.
+    Rules that are new since the decision set was built count as stale.
+    """
+    current = RulePlan.combine(*plans.values())
+    stale_features = set(stale_feature_names(stored_versions, plans))
+    return [
+        policy_rule.rule_id
+        for policy_rule in current.policy_rules
+        if stored_versions.get(policy_rule.rule_id) != policy_rule.version
+        or stale_features.intersection(policy_rule.view)
+    ]
+
+
+def missing_rule_inputs(
+    plans: dict[str, RulePlan], stored_columns: set[str]
+) -> dict[str, list[str]]:
+    """
+    Inputs each rule reads that a stored decision set cannot provide: neither
+    a stored column nor a derived feature whose input columns are all stored.
+    Args:
+        plans (dict[str, RulePlan]): Current module plans.
+        stored_columns (set[str]): Columns of the stored decision set.
+    Returns:
+        dict[str, list[str]]: Missing columns by rule id, empty when every rule
+            can be evaluated.
+    """
+    graph = feature_graph()
+    missing = {}
+    for policy_rule in RulePlan.combine(*plans.values()).policy_rules:
+        columns = []
+        for col in policy_rule.view:
+            if col in KEY_COLUMNS or col in stored_columns:
+                continue
+            if col in graph.features:
+                sources = [src for src in graph.source_columns([col]) if src not in graph.features]
+                if all(src in stored_columns for src in sources):
+                    continue
+            columns.append(col)
+        if columns:
+            missing[policy_rule.rule_id] = columns
+    return missing
+
+
+def _needs_recompute(policy_rule, stale: set[str], stored_columns: set[str]) -> pl.Expr:
+    """True for rows where this rule's stored outcome can no longer be reused."""
+    rule_id = policy_rule.rule_id
+    inputs = [col for col in policy_rule.view if col not in KEY_COLUMNS]
+    if rule_id in stale or rule_id not in stored_columns:
+        return pl.lit(True)
+    if any(col not in stored_columns for col in inputs):
+        return pl.lit(True)
+
+    # New applications, rows gating skipped (null outcome) and rows whose
+    # rule inputs changed since the stored decision.
+    conditions = [pl.col(STORED_MARKER).is_null(), pl.col(rule_id + STORED_SUFFIX).is_null()]
+    conditions += [pl.col(col).ne_missing(pl.col(col + STORED_SUFFIX)) for col in inputs]
+    return pl.any_horizontal(conditions)
+
+
+def redecide_incremental(
+    stored: pl.DataFrame,
+    applications: pl.DataFrame | pl.LazyFrame,
+    stored_versions: dict[str, str],
+    plans: dict[str, RulePlan] | None = None,
+) -> tuple[pl.DataFrame, dict]:
+    """
+    Patch a stored decision set after rule or input changes.
+    A rule whose version changed, or that reads a derived feature whose
+    version changed, is recomputed for every row, using the current inputs
+    where an application was resubmitted and the stored facts otherwise. Any
+    other rule is recomputed only for rows whose inputs (the rule's view)
+    differ from the stored facts, or that are not in the stored set yet. Only
+    rows with at least one recomputed rule are re-aggregated; every other
+    stored row is kept as is. Stored feature values are facts like any other,
+    as the input may have supplied them; resubmitted applications get the
+    current feature version. Stored rule outcomes may be in any of the
+    written representations; the patched set holds Boolean columns.
+    Args:
+        stored (pl.DataFrame): Decision set from a previous run (key, facts, decisions).
+        applications (pl.DataFrame | pl.LazyFrame): Current inputs for new or changed applications.
+        stored_versions (dict[str, str]): Rule and feature versions the stored set was built with.
+        plans (dict[str, RulePlan] | None): Current module plans, built when omitted.
+    Returns:
+        tuple[pl.DataFrame, dict]: Patched decision set, in the stored order with new
+            applications last, and a report of the work done.
+    Raises:
+        ValueError: When a rule reads an input the stored facts do not hold.
+    """
+    plans = plans if plans is not None else module_plans()
+    combined = RulePlan.combine(*plans.values())
+    stored = normalize_rule_outcomes(stored, plans)
+    if any(col not in stored.columns for col in REASON_CODE_COLUMNS) and all(
+        rule_id in stored.columns for rule_id in combined.rule_ids
+    ):
+        # Sets written before reason codes were derived get them from their rule columns.
+        stored = stored.with_columns(reason_code_expressions(plans))
+    stale = set(stale_rule_ids(stored_versions, plans))
+    stale_features = set(stale_feature_names(stored_versions, plans))
+    stored_columns = set(stored.columns)
+    # Rows that are not resubmitted are re-evaluated on their stored facts; a
+    # rule input missing from them would evaluate to null and decline them all.
+    missing = missing_rule_inputs(plans, stored_columns)
+    if missing:
+        raise ValueError(
+            f"Stored decision set lacks rule inputs {missing}; run the full batch instead"
+        )
+    columns = output_columns(plans)
+    fact_set = set(fact_columns(plans))
+    facts = [col for col in columns if col in fact_set and col not in KEY_COLUMNS]
+    removed_rules = [
+        rule_id
+        for rule_id in stored_versions
+        if rule_id not in combined.rule_versions and rule_id not in feature_graph().features
+    ]
+    # Columns the stored set carries beyond key, facts and decisions are kept.
+    extra_columns = [
+        col for col in stored.columns if col not in columns and col not in removed_rules
+    ]
+
+    stored_side = stored.lazy().with_columns(pl.lit(True).alias(STORED_MARKER))
+    stored_side = stored_side.rename(
+        {col: col + STORED_SUFFIX for col in stored.columns if col not in KEY_COLUMNS}
+    )
+    application_side = (
+        with_derived_features(applications, plans)
+        .select(KEY_COLUMNS + facts)
+        .with_columns(pl.lit(True).alias(APPLICATION_MARKER))
+    )
+    joined = stored_side.join(application_side, on=KEY_COLUMNS, how="full", coalesce=True)
+    # Rows without a resubmitted application are re-evaluated on their stored facts.
+    joined = joined.with_columns(
+        [
+            pl.when(pl.col(APPLICATION_MARKER))
+            .then(pl.col(col))
+            .otherwise(pl.col(col + STORED_SUFFIX) if col in stored_columns else None)
+            .alias(col)
+            for col in facts
+        ]
+    )
+    # Stored rows written before a derived feature existed get it from their facts.
+    joined = with_derived_features(joined, plans)
+
+    needs = {
+        policy_rule.rule_id: _needs_recompute(policy_rule, stale, stored_columns)
+        for policy_rule in combined.policy_rules
+    }
+    affected = joined.with_columns(
+        [expr.alias(f"_needs_{rule_id}") for rule_id, expr in needs.items()]
+    ).filter(pl.any_horizontal([pl.col(f"_needs_{rule_id}") for rule_id in needs] or [False]))
+
+    rule_columns = []
+    for policy_rule in combined.policy_rules:
+        rule_id = policy_rule.rule_id
+        fresh = policy_rule.outcome_expression()
+        if rule_id in stored_columns:
+            fresh = (
+                pl.when(pl.col(f"_needs_{rule_id}"))
+                .then(fresh)
+                .otherwise(pl.col(rule_id + STORED_SUFFIX))
+            )
+        rule_columns.append(fresh.alias(rule_id))
+    patched_rows = aggregate_outcomes(affected.with_columns(rule_columns), plans).select(
+        columns + [pl.col(col + STORED_SUFFIX).alias(col) for col in extra_columns]
+    )
+    recompute_counts = affected.select(
+        [pl.col(f"_needs_{rule_id}").sum().alias(rule_id) for rule_id in needs]
+    )
+
+    started = time.perf_counter()
+    patched_rows, recompute_counts = pl.collect_all([patched_rows, recompute_counts])
+    untouched = stored.join(patched_rows.select(KEY_COLUMNS), on=KEY_COLUMNS, how="anti")
+    kept = [col for col in columns + extra_columns if col in untouched.columns]
+    result = pl.concat([untouched.select(kept), patched_rows], how="diagonal_relaxed").select(
+        columns + extra_columns
+    )
+    # Stored rows keep their original order; new applications follow in input order.
+    stored_order = stored.select(KEY_COLUMNS).with_row_index(STORED_ORDER)
+    result = (
+        result.join(stored_order, on=KEY_COLUMNS, how="left", maintain_order="left")
+        .sort(STORED_ORDER, nulls_last=True, maintain_order=True)
+        .drop(STORED_ORDER)
+    )
+    elapsed = time.perf_counter() - started
+
+    new_rows = patched_rows.join(stored.select(KEY_COLUMNS), on=KEY_COLUMNS, how="anti").height
+    report = {
+        "staleRules": sorted(stale),
+        "staleFeatures": sorted(stale_features),
+        "removedRules": removed_rules,
+        "storedRows": stored.height,
+        "rowsRedecided": patched_rows.height,
+        "newRows": new_rows,
+        "rowsReused": untouched.height,
+        "ruleRecomputeCounts": recompute_counts.row(0, named=True) if needs else {},
+        "elapsedSeconds": round(elapsed, 4),
+    }
+    logger.info(
+        "Incremental redecision stale_rules=%s rows_redecided=%d rows_reused=%d",
+        report["staleRules"],
+        report["rowsRedecided"],
+        report["rowsReused"],
+    )
+    return result, report
+
+
+def _partition_keys(directory: Path, files: list[Path]) -> list[str]:
+    """Hive partition keys (``finalDecision=APPROVED/...``) of a decision set directory."""
+    parts = files[0].relative_to(directory).parts[:-1] if files else ()
+    return [part.split("=", 1)[0] for part in parts if "=" in part]
+
+
+def patch_decision_set(
+    decision_set: str | Path, source: str | Path, output: str | Path | None = None
+) -> dict:
+    """
+    Incrementally re-decide a stored decision set.
+    The set may be a single Parquet file, a directory partitioned by
+    ``run_streaming_batch`` or a glob. It is patched in place unless ``output``
+    is given; a directory is rewritten with the same partition keys.
+    Args:
+        decision_set (str | Path): Decision set file, directory or glob written by a batch runner.
+        source (str | Path): CSV or Parquet file with the current application inputs.
+        output (str | Path | None): Where to write the patched set; required for a glob.
+    Returns:
+        dict: Report of stale rules and rows re-decided versus reused.
+    """
+    decision_set = Path(decision_set)
+    files = decision_set_files(decision_set)
+    if not files:
+        raise FileNotFoundError(f"No decision set files at {decision_set}")
+    if output is None and not (decision_set.is_file() or decision_set.is_dir()):
+        raise ValueError("A decision set given as a glob needs an output path")
+    target = Path(output) if output is not None else decision_set
+    partition_by = _partition_keys(decision_set, files) if decision_set.is_dir() else None
+
+    plans = module_plans()
+    # Partition key columns are stored in the files as well, so they are not read from paths.
+    stored = pl.read_parquet(files, hive_partitioning=False)
+    patched, report = redecide_incremental(
+        stored, scan_applications(source), read_rule_versions(files[0]), plans
+    )
+
+    # Written beside the original and swapped in, so a failed run leaves it intact.
+    tmp_path = target.with_name(target.name + ".tmp")
+    metadata = rule_versions_metadata(plans)
+    if partition_by is None:
+        patched.write_parquet(tmp_path, metadata=metadata)
+        tmp_path.replace(target)
+        return report
+
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    if partition_by:
+        patched.lazy().sink_parquet(
+            pl.PartitionByKey(tmp_path, by=partition_by), metadata=metadata, mkdir=True
+        )
+    else:
+        tmp_path.mkdir(parents=True)
+        patched.write_parquet(tmp_path / "00000000.parquet", metadata=metadata)
+    if target.exists():
+        old_path = target.with_name(target.name + ".old")
+        shutil.rmtree(old_path, ignore_errors=True)
+        target.rename(old_path)
+        tmp_path.rename(target)
+        shutil.rmtree(old_path)
+    else:
+        tmp_path.rename(target)
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Incremental re-decisioning of a decision set.")
+    parser.add_argument(
+        "decision_set", help="Parquet decision set file, directory or glob to patch"
+    )
+    parser.add_argument("source", help="CSV or Parquet file with the current application inputs")
+    parser.add_argument(
+        "--output", default=None, help="Write the patched set here instead of in place"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    report = patch_decision_set(args.decision_set, args.source, args.output)
+    print(
+        f"stale_rules={report['staleRules']} redecided={report['rowsRedecided']} "
+        f"new={report['newRows']} reused={report['rowsReused']} "
+        f"elapsed={report['elapsedSeconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+import argparse
+import importlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Callable
+
+import polars as pl
+from decisioning.classes.PolicyRule import PolicyRule
+from decisioning.classes.RulePlan import RulePlan
+from decisioning.module_calls.complete_call import peak_rss_bytes, scan_applications
+from decisioning.modules.complete import (
+    PIPELINE_MODULES,
+    aggregate_outcomes,
+    fact_columns,
+    module_plans,
+    with_derived_features,
+)
+
+
+logger = logging.getLogger(__name__)
+
+CHAMPION: str = "champion"
+CHALLENGER: str = "challenger"
+
+# Cells of the final decision flip matrix: champion decision -> challenger decision.
+DECISION_CELLS: dict[str, tuple[str, str]] = {
+    "approveToApprove": ("APPROVED", "APPROVED"),
+    "approveToDecline": ("APPROVED", "DECLINED"),
+    "declineToApprove": ("DECLINED", "APPROVED"),
+    "declineToDecline": ("DECLINED", "DECLINED"),
+}
+# Cells of a rule's flip matrix: champion outcome -> challenger outcome (True = pass).
+RULE_CELLS: dict[str, tuple[bool, bool]] = {
+    "passToPass": (True, True),
+    "passToFail": (True, False),
+    "failToPass": (False, True),
+    "failToFail": (False, False),
+}
+
+
+def _side_column(side: str, column: str) -> str:
+    return f"{side}.{column}"
+
+
+def _load_reference(reference: str):
+    """The object named by ``"package.module:attribute"``."""
+    module_name, _, attribute = reference.partition(":")
+    if not attribute:
+        raise ValueError(f"Expected 'package.module:attribute', got: {reference}")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def rule_set(
+    factories: dict[str, list[Callable[[], PolicyRule]]],
+) -> dict[str, RulePlan]:
+    """
+    Module plans built from PolicyRule factories such as ``d1001``.
+    Args:
+        factories (dict[str, list[Callable[[], PolicyRule]]]): Rule factories by module.
+            Pipeline modules left out have no rules.
+    Returns:
+        dict[str, RulePlan]: Plans keyed by module name, in pipeline order.
+    """
+    unknown = [module for module in factories if module not in PIPELINE_MODULES]
+    if unknown:
+        raise ValueError(f"Unknown pipeline modules: {unknown}")
+    return {
+        module: RulePlan([factory() for factory in factories.get(module, [])])
+        for module in PIPELINE_MODULES
+    }
+
+
+def with_rules(
+    plans: dict[str, RulePlan],
+    replacements: dict[str, list[Callable[[], PolicyRule]]] | None = None,
+    dropped: list[str] | None = None,
+) -> dict[str, RulePlan]:
+    """
+    A copy of ``plans`` with rules added, replaced or removed.
+    A factory whose rule id is already in the module replaces that rule in
+    place; any other is appended to the module.
+    Args:
+        plans (dict[str, RulePlan]): Rule set to start from.
+        replacements (dict[str, list[Callable[[], PolicyRule]]] | None): Factories by module.
+        dropped (list[str] | None): Rule ids to remove.
+    Returns:
+        dict[str, RulePlan]: The changed rule set.
+    """
+    dropped_ids = set(dropped or [])
+    changed = {}
+    for module, plan in plans.items():
+        rules = [rule for rule in plan.policy_rules if rule.rule_id not in dropped_ids]
+        for factory in (replacements or {}).get(module, []):
+            new_rule = factory()
+            ids = [rule.rule_id for rule in rules]
+            if new_rule.rule_id in ids:
+                rules[ids.index(new_rule.rule_id)] = new_rule
+            else:
+                rules.append(new_rule)
+        changed[module] = RulePlan(rules)
+    return changed
+
+
+def load_rule_set(reference: str) -> dict[str, RulePlan]:
+    """
+    Rule set named by ``"package.module:attribute"``.
+    The attribute (called first if callable) is either module plans, as
+    returned by ``module_plans``, or lists of PolicyRule factories by module.
+    """
+    value = _load_reference(reference)
+    if callable(value):
+        value = value()
+    if all(isinstance(plan, RulePlan) for plan in value.values()):
+        return dict(value)
+    return rule_set(value)
+
+
+def _decide_side(
+    pipeline: pl.LazyFrame, plans: dict[str, RulePlan], side: str, keep: list[str]
+) -> pl.LazyFrame:
+    """Decide every row under ``plans`` and keep its rule outcomes and decision, prefixed."""
+    rule_ids = RulePlan.combine(*plans.values()).rule_ids
+    features = with_derived_features(pipeline, plans)
+    decided = aggregate_outcomes(RulePlan.combine(*plans.values()).lazy(features), plans)
+    return decided.select(
+        keep
+        + [pl.col(rule_id).alias(_side_column(side, rule_id)) for rule_id in rule_ids]
+        + [
+            pl.col(column).alias(_side_column(side, column))
+            for column in ("finalDecision", "primaryReasonCode")
+        ]
+    )
+
+
+def _flip_aggregations(rule_ids: list[str], champion_ids: set, challenger_ids: set) -> list:
+    champion_decision = pl.col(_side_column(CHAMPION, "finalDecision"))
+    challenger_decision = pl.col(_side_column(CHALLENGER, "finalDecision"))
+    aggregations = [pl.len().alias("rows")]
+    aggregations += [
+        ((champion_decision == before) & (challenger_decision == after)).sum().alias(cell)
+        for cell, (before, after) in DECISION_CELLS.items()
+    ]
+    aggregations.append(
+        (
+            (champion_decision == "DECLINED")
+            & (challenger_decision == "DECLINED")
+            & pl.col(_side_column(CHAMPION, "primaryReasonCode")).ne_missing(
+                pl.col(_side_column(CHALLENGER, "primaryReasonCode"))
+            )
+        )
+        .sum()
+        .alias("primaryReasonChanged")
+    )
+    approve_to_decline = (champion_decision == "APPROVED") & (challenger_decision == "DECLINED")
+    decline_to_approve = (champion_decision == "DECLINED") & (challenger_decision == "APPROVED")
+    for rule_id in rule_ids:
+        # A rule missing from one side cannot fail there.
+        before = (
+            pl.col(_side_column(CHAMPION, rule_id)) if rule_id in champion_ids else pl.lit(True)
+        )
+        after = (
+            pl.col(_side_column(CHALLENGER, rule_id)) if rule_id in challenger_ids else pl.lit(True)
+        )
+        aggregations += [
+            ((before == was) & (after == now)).sum().alias(f"{rule_id}.{cell}")
+            for cell, (was, now) in RULE_CELLS.items()
+        ]
+        # Decision flips this rule accounts for: it newly fails an approval, or
+        # stops failing a decline.
+        aggregations += [
+            (approve_to_decline & before & after.not_()).sum().alias(f"{rule_id}.approveToDecline"),
+            (decline_to_approve & before.not_() & after).sum().alias(f"{rule_id}.declineToApprove"),
+        ]
+    return aggregations
+
+
+def replay_flip_counts(
+    applications: pl.DataFrame | pl.LazyFrame,
+    champion: dict[str, RulePlan],
+    challenger: dict[str, RulePlan],
+    segment_by: list[str] | None = None,
+) -> pl.LazyFrame:
+    """
+    Lazy flip counts of a challenger rule set against the champion, per segment.
+    Both rule sets are evaluated on each row within one query, so the input
+    is scanned once, and only the counts are aggregated, so run on the
+    streaming engine memory stays bounded by the number of segments.
+    Args:
+        applications (pl.DataFrame | pl.LazyFrame): Historical applications.
+        champion (dict[str, RulePlan]): Rule set in production.
+        challenger (dict[str, RulePlan]): Proposed rule set.
+        segment_by (list[str] | None): Columns to break the counts down by.
+    Returns:
+        pl.LazyFrame: One row per segment: rows, the DECISION_CELLS, primaryReasonChanged,
+            and ``<ruleId>.<cell>`` for each RULE_CELLS cell plus approveToDecline and
+            declineToApprove, for every rule in either set.
+    """
+    segment_by = list(segment_by or [])
+    champion_rules = RulePlan.combine(*champion.values())
+    challenger_rules = RulePlan.combine(*challenger.values())
+    rule_ids = list(dict.fromkeys(champion_rules.rule_ids + challenger_rules.rule_ids))
+
+    pipeline = applications.lazy()
+    available = pipeline.collect_schema().names()
+    missing_segments = [col for col in segment_by if col not in available]
+    if missing_segments:
+        raise ValueError(f"Segment columns not in the applications: {missing_segments}")
+    inputs = list(dict.fromkeys(fact_columns(champion) + fact_columns(challenger) + segment_by))
+    # Fields the history lacks are null, as on the online path.
+    pipeline = pipeline.select(
+        [pl.col(col) if col in available else pl.lit(None).alias(col) for col in inputs]
+    )
+    # Derived features the champion resolved are carried to the challenger side.
+    challenger_inputs = list(dict.fromkeys(fact_columns(challenger) + segment_by))
+    pipeline = _decide_side(pipeline, champion, CHAMPION, challenger_inputs)
+    pipeline = _decide_side(
+        pipeline,
+        challenger,
+        CHALLENGER,
+        segment_by
+        + [_side_column(CHAMPION, rule_id) for rule_id in champion_rules.rule_ids]
+        + [_side_column(CHAMPION, col) for col in ("finalDecision", "primaryReasonCode")],
+    )
+    aggregations = _flip_aggregations(
+        rule_ids, set(champion_rules.rule_ids), set(challenger_rules.rule_ids)
+    )
+    if segment_by:
+        return pipeline.group_by(segment_by).agg(aggregations).sort(segment_by, nulls_last=True)
+    return pipeline.select(aggregations)
+
+
+def flip_report(counts: pl.DataFrame, rule_ids: list[str], segment_by: list[str]) -> dict:
+    """
+    Nest flat flip counts into decision and per-rule flip matrices.
+    Args:
+        counts (pl.DataFrame): Output of ``replay_flip_counts``.
+        rule_ids (list[str]): Rules in either set.
+        segment_by (list[str]): Segment columns of ``counts``.
+    Returns:
+        dict: Totals over every segment, and the same breakdown per segment.
+    """
+
+    def matrices(row: dict) -> dict:
+        return {
+            "rows": row["rows"],
+            "finalDecision": {
+                **{cell: row[cell] for cell in DECISION_CELLS},
+                "primaryReasonChanged": row["primaryReasonChanged"],
+            },
+            "rules": {
+                rule_id: {
+                    cell: row[f"{rule_id}.{cell}"]
+                    for cell in [*RULE_CELLS, "approveToDecline", "declineToApprove"]
+                }
+                for rule_id in rule_ids
+            },
+        }
+
+    count_columns = [col for col in counts.columns if col not in segment_by]
+    totals = counts.select(pl.col(count_columns).sum()).row(0, named=True)
+    report = {"total": matrices(totals)}
+    if segment_by:
+        report["segments"] = [
+            {"segment": {col: row[col] for col in segment_by}, **matrices(row)}
+            for row in counts.iter_rows(named=True)
+        ]
+    return report
+
+
+def run_replay(
+    source: str | Path,
+    champion: dict[str, RulePlan] | None = None,
+    challenger: dict[str, RulePlan] | None = None,
+    segment_by: list[str] | None = None,
+    counts_output: str | Path | None = None,
+) -> dict:
+    """
+    Replay historical applications under two rule sets in one streaming pass.
+    Args:
+        source (str | Path): CSV or Parquet application file (or Parquet glob).
+        champion (dict[str, RulePlan] | None): Rule set in production, the current plans
+            when omitted.
+        challenger (dict[str, RulePlan] | None): Proposed rule set, the current plans when
+            omitted.
+        segment_by (list[str] | None): Columns to break the flip counts down by.
+        counts_output (str | Path | None): Also write the flat per-segment counts here
+            (Parquet, or CSV for a ``.csv`` path).
+    Returns:
+        dict: Flip matrices in total and per segment, rule versions of both sets,
+            duration, rows/sec and peak RSS.
+    """
+    champion = champion if champion is not None else module_plans()
+    challenger = challenger if challenger is not None else module_plans()
+    segment_by = list(segment_by or [])
+    champion_rules = RulePlan.combine(*champion.values())
+    challenger_rules = RulePlan.combine(*challenger.values())
+    rule_ids = list(dict.fromkeys(champion_rules.rule_ids + challenger_rules.rule_ids))
+
+    logger.info("Replay start source=%s segment_by=%s", source, segment_by)
+    started = time.perf_counter()
+    counts = replay_flip_counts(
+        scan_applications(source), champion, challenger, segment_by
+    ).collect(engine="streaming")
+    elapsed = time.perf_counter() - started
+    if counts_output is not None:
+        counts_output = Path(counts_output)
+        if counts_output.suffix.lower() == ".csv":
+            counts.write_csv(counts_output)
+        else:
+            counts.write_parquet(counts_output)
+
+    report = flip_report(counts, rule_ids, segment_by)
+    rows = report["total"]["rows"]
+    report.update(
+        {
+            "source": str(source),
+            "segmentBy": segment_by,
+            "championRuleVersions": champion_rules.rule_versions,
+            "challengerRuleVersions": challenger_rules.rule_versions,
+            "elapsedSeconds": round(elapsed, 3),
+            "rowsPerSecond": round(rows / elapsed, 1) if elapsed > 0 else None,
+            "peakRssBytes": peak_rss_bytes(),
+        }
+    )
+    decisions = report["total"]["finalDecision"]
+    logger.info(
+        "Replay done rows=%d approve_to_decline=%d decline_to_approve=%d elapsed=%.3fs",
+        rows,
+        decisions["approveToDecline"],
+        decisions["declineToApprove"],
+        elapsed,
+    )
+    return report
+
+
+def _rule_arguments(values: list[str]) -> dict[str, list[Callable[[], PolicyRule]]]:
+    """``module=package.module:factory`` arguments grouped by module."""
+    factories: dict[str, list[Callable[[], PolicyRule]]] = {}
+    for value in values:
+        module, _, reference = value.partition("=")
+        if module not in PIPELINE_MODULES or not reference:
+            raise SystemExit(f"Expected <module>=<package.module:factory>, got: {value}")
+        factories.setdefault(module, []).append(_load_reference(reference))
+    return factories
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay applications under a champion and a challenger rule set."
+    )
+    parser.add_argument("source", help="CSV or Parquet application file")
+    parser.add_argument(
+        "--champion",
+        default="decisioning.modules.complete:module_plans",
+        help="Champion rule set as package.module:attribute (default: the current rules)",
+    )
+    parser.add_argument(
+        "--challenger",
+        default=None,
+        help="Challenger rule set as package.module:attribute (default: the champion)",
+    )
+    parser.add_argument(
+        "--challenger-rule",
+        action="append",
+        default=[],
+        metavar="MODULE=FACTORY",
+        help="Add or replace a rule in the challenger, e.g. "
+        "eligibility=decisioning.policy_rules.eligibility_rules:d1001",
+    )
+    parser.add_argument(
+        "--drop-rule", action="append", default=[], help="Remove a rule id from the challenger"
+    )
+    parser.add_argument("--segment-by", nargs="+", default=[], help="Segment columns")
+    parser.add_argument("--counts-output", default=None, help="Write flat counts (.parquet/.csv)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    champion = load_rule_set(args.champion)
+    challenger = load_rule_set(args.challenger) if args.challenger else champion
+    challenger = with_rules(challenger, _rule_arguments(args.challenger_rule), args.drop_rule)
+    report = run_replay(args.source, champion, challenger, args.segment_by, args.counts_output)
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
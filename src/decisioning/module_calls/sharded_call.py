@@ -0,0 +1,239 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import polars as pl
+from decisioning.module_calls.complete_call import (
+    KEY_COLUMNS,
+    output_columns,
+    rule_versions_metadata,
+    scan_applications,
+)
+from decisioning.modules.complete import fact_columns, module_plans, run_complete, run_gated
+
+
+logger = logging.getLogger(__name__)
+
+ROW_INDEX_COLUMN: str = "_rowIndex"
+SHARD_COLUMN: str = "_shard"
+# Subdirectory of the shard directory holding one decided Parquet file per shard.
+RESULTS_DIR: str = "results"
+
+
+def shard_expression(num_shards: int) -> pl.Expr:
+    """
+    Assign every application to a shard by hashing its applicationId.
+    Polars hashes are stable for a given Polars version, which is all a single
+    run needs: the merge order comes from the input row index, not the hash.
+    """
+    return (pl.col("applicationId").hash(seed=0) % num_shards).alias(SHARD_COLUMN)
+
+
+def _run_shard(
+    shard_dir: str, shard: int, keep_input_columns: bool, gated: bool
+) -> tuple[int, str, dict]:
+    """
+    Decide one shard in a worker process, write it to its own Parquet file and
+    time each step. Only the file path and the timings go back to the parent,
+    so decided rows are never pickled between processes.
+    """
+    started = time.perf_counter()
+    source = Path(shard_dir) / f"{SHARD_COLUMN}={shard}" / "*.parquet"
+    result_path = Path(shard_dir) / RESULTS_DIR / f"{shard}.parquet"
+    plans = module_plans()
+    columns = None if keep_input_columns else [ROW_INDEX_COLUMN] + output_columns(plans)
+
+    stages = None
+    if gated:
+        shard_df = pl.read_parquet(source)
+        read_done = time.perf_counter()
+        result, stages = run_gated(shard_df, plans)
+        result = result if columns is None else result.select(columns)
+        result.write_parquet(result_path)
+        rows = result.height
+    else:
+        # Read, decide and write are one streaming pass; reading is not timed apart.
+        read_done = started
+        result = run_complete(pl.scan_parquet(source), plans)
+        result = result if columns is None else result.select(columns)
+        result.sink_parquet(result_path, engine="streaming")
+        rows = pl.scan_parquet(result_path).select(pl.len()).collect().item()
+    decide_done = time.perf_counter()
+
+    timing = {
+        "shard": shard,
+        "pid": os.getpid(),
+        "rows": rows,
+        "readSeconds": round(read_done - started, 4),
+        "decideSeconds": round(decide_done - read_done, 4),
+        "totalSeconds": round(decide_done - started, 4),
+        "stages": stages,
+    }
+    return shard, str(result_path), timing
+
+
+def _merge_stage_counts(shard_timings: list[dict]) -> list[dict]:
+    """Sum the per-module gating counts of every shard."""
+    merged: dict[str, dict] = {}
+    for timing in shard_timings:
+        for stage in timing["stages"]:
+            totals = merged.setdefault(stage["module"], {"module": stage["module"]})
+            for key, value in stage.items():
+                if key != "module":
+                    totals[key] = totals.get(key, 0) + value
+    return list(merged.values())
+
+
+def run_sharded_batch(
+    source: str | Path,
+    output: str | Path,
+    num_workers: int | None = None,
+    num_shards: int | None = None,
+    keep_input_columns: bool = False,
+    gated: bool = False,
+) -> dict:
+    """
+    Decide every application in ``source`` across a pool of worker processes.
+    The input is split by applicationId hash into shards (streamed to temporary
+    Parquet, so the split itself is bounded in memory; unless input columns are
+    kept, only the key and the facts the rules read are split). Each worker runs
+    the complete module pipeline on its shard independently and writes the
+    result to its own Parquet file; the files are streamed back into ``output``
+    in input order, so the output does not depend on the number of workers or
+    on which worker finishes first.
+    Args:
+        source (str | Path): CSV or Parquet application file.
+        output (str | Path): Parquet file for the merged decisions.
+        num_workers (int | None): Worker processes, defaults to the CPU count.
+        num_shards (int | None): Number of shards, defaults to ``num_workers``.
+        keep_input_columns (bool): Keep every input column, not only the key, facts and
+            decision columns.
+        gated (bool): Skip later modules for rows an earlier module already failed.
+    Returns:
+        dict: Run report with per-shard timings.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    num_shards = num_shards or num_workers
+    started = time.perf_counter()
+    plans = module_plans()
+
+    with tempfile.TemporaryDirectory(prefix="decisioning_shards_") as shard_dir:
+        applications = scan_applications(source).with_row_index(ROW_INDEX_COLUMN)
+        if not keep_input_columns:
+            available = set(applications.collect_schema().names())
+            wanted = [ROW_INDEX_COLUMN] + KEY_COLUMNS + fact_columns(plans)
+            applications = applications.select(
+                [col for col in dict.fromkeys(wanted) if col in available]
+            )
+        (
+            applications.with_columns(shard_expression(num_shards)).sink_parquet(
+                pl.PartitionByKey(shard_dir, by=[SHARD_COLUMN], include_key=False),
+                mkdir=True,
+                engine="streaming",
+            )
+        )
+        split_done = time.perf_counter()
+        shards = sorted(
+            int(path.name.split("=", 1)[1]) for path in Path(shard_dir).glob(f"{SHARD_COLUMN}=*")
+        )
+        logger.info(
+            "Sharded batch split source=%s shards=%d workers=%d", source, len(shards), num_workers
+        )
+        (Path(shard_dir) / RESULTS_DIR).mkdir()
+
+        # Polars is multi-threaded; forking a process that already started its
+        # thread pool can deadlock, so workers are spawned fresh.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(_run_shard, shard_dir, shard, keep_input_columns, gated)
+                for shard in shards
+            ]
+            outputs = sorted((future.result() for future in futures), key=lambda output: output[0])
+        pool_seconds = time.perf_counter() - split_done
+
+        # The shard files are streamed into the output before the directory goes away.
+        paths = [path for _, path, _ in outputs]
+        merged = (
+            pl.scan_parquet(paths).sort(ROW_INDEX_COLUMN).drop(ROW_INDEX_COLUMN)
+            if paths
+            else pl.LazyFrame()
+        )
+        merged.sink_parquet(output, metadata=rule_versions_metadata(plans), engine="streaming")
+    elapsed = time.perf_counter() - started
+
+    shard_timings = [timing for _, _, timing in outputs]
+    rows = sum(timing["rows"] for timing in shard_timings)
+    busy_seconds = sum(timing["totalSeconds"] for timing in shard_timings)
+    report = {
+        "source": str(source),
+        "output": str(output),
+        "workers": num_workers,
+        "shards": len(shard_timings),
+        "rows": rows,
+        "splitSeconds": round(split_done - started, 4),
+        "elapsedSeconds": round(elapsed, 4),
+        "rowsPerSecond": round(rows / elapsed, 1) if elapsed > 0 else None,
+        "poolSeconds": round(pool_seconds, 4),
+        # Share of the pool's wall time the workers spent on shards; close to 1.0
+        # means throughput is scaling linearly with the number of workers.
+        "parallelEfficiency": (
+            round(busy_seconds / (pool_seconds * min(num_workers, len(shard_timings))), 3)
+            if pool_seconds > 0 and shard_timings
+            else None
+        ),
+        "shardTimings": shard_timings,
+        "stages": _merge_stage_counts(shard_timings) if gated else None,
+    }
+    logger.info(
+        "Sharded batch done rows=%d elapsed=%.3fs rows_per_sec=%s efficiency=%s",
+        report["rows"],
+        elapsed,
+        report["rowsPerSecond"],
+        report["parallelEfficiency"],
+    )
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Sharded multi-process batch decisioning.")
+    parser.add_argument("source", help="CSV or Parquet application file")
+    parser.add_argument("output", help="Parquet file for the merged decisions")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--shards", type=int, default=None, help="Shards (defaults to workers)")
+    parser.add_argument(
+        "--keep-input-columns", action="store_true", help="Also write every input column"
+    )
+    parser.add_argument(
+        "--gated", action="store_true", help="Skip later modules for already-declined rows"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    report = run_sharded_batch(
+        args.source, args.output, args.workers, args.shards, args.keep_input_columns, args.gated
+    )
+    for timing in report["shardTimings"]:
+        print(
+            f"shard={timing['shard']} rows={timing['rows']} read={timing['readSeconds']}s "
+            f"decide={timing['decideSeconds']}s total={timing['totalSeconds']}s"
+        )
+    for stage in report["stages"] or []:
+        print(
+            f"module={stage['module']} evaluated={stage['rowsEvaluated']} "
+            f"passed={stage['rowsPassed']} failed={stage['rowsFailed']} "
+            f"skipped={stage['rowsSkipped']}"
+        )
+    print(
+        f"rows={report['rows']} workers={report['workers']} elapsed={report['elapsedSeconds']}s "
+        f"rows/sec={report['rowsPerSecond']} efficiency={report['parallelEfficiency']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
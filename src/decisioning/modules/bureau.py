@@ -0,0 +1,43 @@
+import polars as pl
+from decisioning.classes.PolicyRule import PolicyRule
+from decisioning.classes.RulePlan import RulePlan
+from decisioning.modules.features import feature_graph
+from decisioning.utility.profiler import PROFILER
+
+
+def bureau_rules() -> list[PolicyRule]:
+    """
+    Collect the bureau policy rules in evaluation order.
+    Returns:
+        list[PolicyRule]: Bureau rules.
+    """
+    rules: list[PolicyRule] = []
+
+    # ********** END OF BUREAU POLICY RULES **********
+
+    return rules
+
+
+def bureau_plan() -> RulePlan:
+    """
+    Compile the bureau rules into a single fused plan.
+    Returns:
+        RulePlan: Plan evaluating every bureau rule in one projection.
+    """
+    return RulePlan(bureau_rules())
+
+
+def check_bureau(pl_input_df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Check applicants against the bureau policy rules.
+    Args:
+        pl_input_df (pl.DataFrame): Input DataFrame containing applicant data.
+    Returns:
+        pl.DataFrame: DataFrame with bureau results.
+    """
+    plan = bureau_plan()
+    # Derived features the rules read are resolved before profiling and evaluation.
+    data = feature_graph().lazy(pl_input_df, plan.input_columns).collect()
+    if PROFILER.enabled:
+        PROFILER.profile_module("bureau", plan, data)
+    return plan.execute(data)
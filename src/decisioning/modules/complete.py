@@ -0,0 +1,436 @@
+from typing import Callable
+
+import polars as pl
+from decisioning.classes.InvalidApplicationError import InvalidApplicationError
+from decisioning.classes.RulePlan import RulePlan
+from decisioning.modules.bureau import bureau_plan
+from decisioning.modules.decision import decision_plan
+from decisioning.modules.eligibility import eligibility_plan
+from decisioning.modules.features import feature_graph
+from decisioning.modules.servicing import servicing_plan
+from decisioning.utility.profiler import PROFILER
+
+
+# Modules in pipeline order. Each entry builds the compiled plan for one module.
+PIPELINE_MODULES: dict[str, Callable[[], RulePlan]] = {
+    "eligibility": eligibility_plan,
+    "bureau": bureau_plan,
+    "servicing": servicing_plan,
+    "decision": decision_plan,
+}
+
+# Decision stage recorded when no module fails.
+FINAL_STAGE: str = "decision"
+
+# Module outcome recorded when gating skipped a module for an already-failed row.
+SKIPPED: str = "SKIPPED"
+GATE_ROW_COLUMN: str = "_gateRow"
+
+# Reason codes derived from the failed rules, in pipeline order.
+REASON_CODE_COLUMNS: list[str] = [
+    "primaryReasonCode",
+    "secondaryReasonCodes",
+    "policyRuleIdsTriggered",
+]
+
+# Representations rule outcome columns can be written in: Boolean columns,
+# one packed bitmask per module, or the legacy "Y"/"N" strings.
+RULE_OUTCOME_FORMATS: tuple[str, ...] = ("boolean", "bitmask", "yn")
+
+
+def module_plans() -> dict[str, RulePlan]:
+    """
+    Build the compiled plan for every pipeline module.
+    Returns:
+        dict[str, RulePlan]: Plans keyed by module name, in pipeline order.
+    """
+    return {module: build_plan() for module, build_plan in PIPELINE_MODULES.items()}
+
+
+def module_outcome_column(module: str) -> str:
+    return f"{module}Outcome"
+
+
+def module_mask_column(module: str) -> str:
+    return f"{module}RuleMask"
+
+
+def module_outcome_expression(module: str, plan: RulePlan) -> pl.Expr:
+    """
+    A module PASSes when every one of its rules passed, otherwise it FAILs.
+    Modules without rules always PASS.
+    """
+    if not plan.rule_ids:
+        return pl.lit("PASS").alias(module_outcome_column(module))
+    return (
+        pl.when(pl.all_horizontal([pl.col(rule_id) for rule_id in plan.rule_ids]))
+        .then(pl.lit("PASS"))
+        .otherwise(pl.lit("FAIL"))
+        .alias(module_outcome_column(module))
+    )
+
+
+def decision_columns(plans: dict[str, RulePlan]) -> list[str]:
+    """Every column the complete pipeline adds to its input, in output order."""
+    rule_ids = [rule_id for plan in plans.values() for rule_id in plan.rule_ids]
+    outcomes = [module_outcome_column(module) for module in plans]
+    return rule_ids + outcomes + ["finalDecision", "decisionStage"] + REASON_CODE_COLUMNS
+
+
+def reason_code_expressions(plans: dict[str, RulePlan]) -> list[pl.Expr]:
+    """
+    Reason-code columns computed from the Boolean rule columns.
+    policyRuleIdsTriggered lists every failed rule in pipeline order; the
+    first is the primaryReasonCode and the rest are secondaryReasonCodes.
+    Rules with a null outcome (skipped by gating) are not triggered.
+    Args:
+        plans (dict[str, RulePlan]): Module plans, in pipeline order.
+    Returns:
+        list[pl.Expr]: Expressions for the REASON_CODE_COLUMNS.
+    """
+    rule_ids = [rule_id for plan in plans.values() for rule_id in plan.rule_ids]
+    if rule_ids:
+        triggered = pl.concat_list(
+            [pl.when(pl.col(rule_id).not_()).then(pl.lit(rule_id)) for rule_id in rule_ids]
+        ).list.drop_nulls()
+    else:
+        triggered = pl.lit([], dtype=pl.List(pl.String))
+    return [
+        triggered.list.first().alias("primaryReasonCode"),
+        triggered.list.slice(1).alias("secondaryReasonCodes"),
+        triggered.alias("policyRuleIdsTriggered"),
+    ]
+
+
+def aggregate_outcomes(pipeline: pl.LazyFrame, plans: dict[str, RulePlan]) -> pl.LazyFrame:
+    """
+    Derive module outcomes, finalDecision and decisionStage from rule columns.
+    Args:
+        pipeline (pl.LazyFrame): Frame already holding every rule column.
+        plans (dict[str, RulePlan]): Module plans, in pipeline order.
+    Returns:
+        pl.LazyFrame: Frame with the outcome and decision columns added.
+    """
+    pipeline = pipeline.with_columns(
+        [module_outcome_expression(module, plan) for module, plan in plans.items()]
+    )
+    return pipeline.with_columns(decision_expressions(plans))
+
+
+def decision_expressions(plans: dict[str, RulePlan]) -> list[pl.Expr]:
+    """
+    finalDecision, decisionStage and the reason codes, from the rule and
+    module outcome columns. The first FAILed module declines; SKIPPED
+    modules and null rule outcomes never do.
+    """
+    # First failing module in pipeline order, null when every module passes.
+    failed_stage = pl.coalesce(
+        [
+            pl.when(pl.col(module_outcome_column(module)) == "FAIL").then(pl.lit(module))
+            for module in plans
+        ]
+        + [pl.lit(None, dtype=pl.String)]
+    )
+    return [
+        pl.when(failed_stage.is_null())
+        .then(pl.lit("APPROVED"))
+        .otherwise(pl.lit("DECLINED"))
+        .alias("finalDecision"),
+        failed_stage.fill_null(pl.lit(FINAL_STAGE)).alias("decisionStage"),
+        *reason_code_expressions(plans),
+    ]
+
+
+def rule_outcome_view(
+    data: pl.DataFrame | pl.LazyFrame, plans: dict[str, RulePlan], rule_outcomes: str = "boolean"
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Present the Boolean rule columns of ``data`` in another representation.
+    Args:
+        data (pl.DataFrame | pl.LazyFrame): Frame holding every rule column.
+        plans (dict[str, RulePlan]): Module plans, in pipeline order.
+        rule_outcomes (str): One of RULE_OUTCOME_FORMATS. ``bitmask`` replaces
+            each module's rule columns with a ``<module>RuleMask`` column; ``yn``
+            turns them into "Y"/"N" strings.
+    Returns:
+        pl.DataFrame | pl.LazyFrame: ``data`` in the requested representation.
+    """
+    if rule_outcomes == "boolean":
+        return data
+    if rule_outcomes == "yn":
+        return data.with_columns(
+            [expr for plan in plans.values() for expr in plan.yes_no_expressions()]
+        )
+    if rule_outcomes == "bitmask":
+        rule_ids = [rule_id for plan in plans.values() for rule_id in plan.rule_ids]
+        return data.with_columns(
+            [plan.bitmask_expression(module_mask_column(module)) for module, plan in plans.items()]
+        ).drop(rule_ids)
+    raise ValueError(f"Unknown rule outcome format: {rule_outcomes}")
+
+
+def normalize_rule_outcomes(
+    data: pl.DataFrame | pl.LazyFrame, plans: dict[str, RulePlan]
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Bring rule columns in any RULE_OUTCOME_FORMATS representation back to Boolean.
+    Packed module masks are unpacked and "Y"/"N" columns converted; Boolean
+    columns and rules the frame does not hold are left as they are.
+    """
+    schema = data.collect_schema() if isinstance(data, pl.LazyFrame) else data.schema
+    columns = []
+    for module, plan in plans.items():
+        mask = module_mask_column(module)
+        if mask in schema and not any(rule_id in schema for rule_id in plan.rule_ids):
+            columns += plan.unpack_bitmask_expressions(mask)
+            continue
+        columns += [
+            (pl.col(rule_id) == "Y").alias(rule_id)
+            for rule_id in plan.rule_ids
+            if schema.get(rule_id) == pl.String
+        ]
+    masks = [module_mask_column(module) for module in plans if module_mask_column(module) in schema]
+    return data.with_columns(columns).drop(masks) if columns or masks else data
+
+
+def yes_no_record(result: dict, plans: dict[str, RulePlan]) -> dict:
+    """A single decision dict with its Boolean rule outcomes shown as "Y"/"N"."""
+    rule_ids = {rule_id for plan in plans.values() for rule_id in plan.rule_ids}
+    return {
+        key: ("Y" if value else "N") if key in rule_ids and value is not None else value
+        for key, value in result.items()
+    }
+
+
+def fact_columns(plans: dict[str, RulePlan]) -> list[str]:
+    """
+    Input columns any rule reads (the facts behind a decision), in first-seen
+    order, followed by the inputs of the derived features those rules read.
+    """
+    return feature_graph().source_columns(RulePlan.combine(*plans.values()).input_columns)
+
+
+def with_derived_features(
+    data: pl.DataFrame | pl.LazyFrame, plans: dict[str, RulePlan]
+) -> pl.LazyFrame:
+    """
+    Resolve the derived features the plans' rules read, once for every module.
+    Args:
+        data (pl.DataFrame | pl.LazyFrame): Applicant data.
+        plans (dict[str, RulePlan]): Module plans whose rules read the features.
+    Returns:
+        pl.LazyFrame: ``data`` with one column per needed feature; supplied values are kept.
+    """
+    return feature_graph().lazy(data, RulePlan.combine(*plans.values()).input_columns)
+
+
+def feature_versions(plans: dict[str, RulePlan]) -> dict[str, str]:
+    """Version of every derived feature the plans' rules read, keyed by feature name."""
+    graph = feature_graph()
+    needed = graph.required(RulePlan.combine(*plans.values()).input_columns)
+    return {name: graph.features[name].version for name in needed}
+
+
+def module_versions(plans: dict[str, RulePlan]) -> dict[str, str]:
+    """
+    Version of every module that evaluates rules, keyed by module name: the
+    latest version of its rules and of the derived features they read. This
+    is the ``eligibility@2026-01-01`` ruleVersionsUsed form of stored decisions.
+    """
+    graph = feature_graph()
+    versions = {}
+    for module, plan in plans.items():
+        if not plan.policy_rules:
+            continue
+        features = graph.required(plan.input_columns)
+        versions[module] = max(
+            [*plan.rule_versions.values(), *(graph.features[name].version for name in features)]
+        )
+    return versions
+
+
+def rule_versions(plans: dict[str, RulePlan]) -> dict[str, str]:
+    """
+    Version of every rule in the pipeline, keyed by rule id, and of every
+    derived feature the rules read, keyed by feature name. A decision made
+    under one set is not reused under another.
+    """
+    return {**RulePlan.combine(*plans.values()).rule_versions, **feature_versions(plans)}
+
+
+def run_complete(
+    data: pl.DataFrame | pl.LazyFrame, plans: dict[str, RulePlan] | None = None
+) -> pl.LazyFrame:
+    """
+    Build the lazy end-to-end module pipeline.
+    Derived features are resolved first, then all module rules are fused into
+    a single projection, followed by the per-module outcomes and the
+    aggregated final decision.
+    Args:
+        data (pl.DataFrame | pl.LazyFrame): Applicant data.
+        plans (dict[str, RulePlan] | None): Precompiled module plans, built when omitted.
+    Returns:
+        pl.LazyFrame: Un-collected plan with rule, outcome and decision columns.
+    """
+    plans = plans if plans is not None else module_plans()
+    features = with_derived_features(data, plans)
+    return aggregate_outcomes(RulePlan.combine(*plans.values()).lazy(features), plans)
+
+
+def _profile_modules(plans: dict[str, RulePlan], data: pl.DataFrame) -> None:
+    """Record every module as having evaluated every row of ``data``, features resolved."""
+    data = with_derived_features(data, plans).collect()
+    for module, plan in plans.items():
+        PROFILER.profile_module(module, plan, data)
+
+
+def check_complete(pl_input_df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Run every decisioning module over the applicants.
+    Args:
+        pl_input_df (pl.DataFrame): Input DataFrame containing applicant data.
+    Returns:
+        pl.DataFrame: DataFrame with rule, module outcome and final decision columns.
+    """
+    plans = module_plans()
+    if PROFILER.enabled:
+        _profile_modules(plans, pl_input_df)
+    return run_complete(pl_input_df, plans).collect()
+
+
+def decide_applications(
+    applications: list[dict], plans: dict[str, RulePlan] | None = None
+) -> list[dict]:
+    """
+    Decide a list of application dicts as one vectorized batch.
+    Args:
+        applications (list[dict]): Application fields keyed by column name.
+        plans (dict[str, RulePlan] | None): Precompiled module plans, built when omitted.
+    Returns:
+        list[dict]: One dict of decision columns per application, in input order.
+    Raises:
+        InvalidApplicationError: When a field has a type the rules cannot evaluate.
+    """
+    if not applications:
+        return []
+    plans = plans if plans is not None else module_plans()
+    try:
+        batch = pl.DataFrame(applications, strict=False, infer_schema_length=None)
+        # Fields no application supplied are null, as on the online path.
+        missing = [col for col in fact_columns(plans) if col not in batch.columns]
+        if missing:
+            batch = batch.with_columns([pl.lit(None).alias(col) for col in missing])
+        if PROFILER.enabled:
+            _profile_modules(plans, batch)
+        return run_complete(batch, plans).select(decision_columns(plans)).collect().to_dicts()
+    except (TypeError, pl.exceptions.PolarsError) as exc:
+        raise InvalidApplicationError([], str(exc)) from exc
+
+
+def run_gated(
+    data: pl.DataFrame | pl.LazyFrame, plans: dict[str, RulePlan] | None = None
+) -> tuple[pl.DataFrame, list[dict]]:
+    """
+    Run the module pipeline, short-circuiting rows once a module fails them.
+    Each module only evaluates the rows every earlier module passed. Rows a
+    module fails are finished there: their later modules are recorded with a
+    SKIPPED outcome and null rule columns, so execution state stays auditable.
+    finalDecision, decisionStage and primaryReasonCode match ``run_complete``;
+    skipped rules are never triggered, so secondaryReasonCodes only holds
+    failures of the declining module. Derived features are resolved once,
+    before the first module, and carried to the later ones.
+    Args:
+        data (pl.DataFrame | pl.LazyFrame): Applicant data.
+        plans (dict[str, RulePlan] | None): Precompiled module plans, built when omitted.
+    Returns:
+        tuple[pl.DataFrame, list[dict]]: Decisions in input order, and per-module
+        counts of rows evaluated, passed, failed and skipped.
+    """
+    plans = plans if plans is not None else module_plans()
+    live = with_derived_features(data, plans).with_row_index(GATE_ROW_COLUMN).collect()
+    input_columns = [col for col in live.columns if col != GATE_ROW_COLUMN]
+    total_rows = live.height
+
+    modules = list(plans.items())
+    finished: list[pl.DataFrame] = []
+    stages: list[dict] = []
+    for position, (module, plan) in enumerate(modules):
+        outcome = module_outcome_column(module)
+        rows_in = live.height
+        if PROFILER.enabled:
+            PROFILER.profile_module(module, plan, live)
+        decided = plan.lazy(live).with_columns(module_outcome_expression(module, plan)).collect()
+        failed = decided.filter(pl.col(outcome) == "FAIL")
+        live = decided.filter(pl.col(outcome) == "PASS")
+
+        skipped_columns = []
+        for later_module, later_plan in modules[position + 1 :]:
+            skipped_columns += [
+                pl.lit(None, dtype=pl.Boolean).alias(rule_id) for rule_id in later_plan.rule_ids
+            ]
+            skipped_columns.append(pl.lit(SKIPPED).alias(module_outcome_column(later_module)))
+        finished.append(
+            failed.with_columns(
+                skipped_columns
+                + [pl.lit("DECLINED").alias("finalDecision"), pl.lit(module).alias("decisionStage")]
+            )
+        )
+        stages.append(
+            {
+                "module": module,
+                "rowsEvaluated": rows_in,
+                "rowsPassed": live.height,
+                "rowsFailed": failed.height,
+                "rowsSkipped": total_rows - rows_in,
+            }
+        )
+
+    finished.append(
+        live.with_columns(
+            pl.lit("APPROVED").alias("finalDecision"), pl.lit(FINAL_STAGE).alias("decisionStage")
+        )
+    )
+    columns = input_columns + [col for col in decision_columns(plans) if col not in input_columns]
+    result = (
+        pl.concat(finished, how="diagonal_relaxed")
+        .sort(GATE_ROW_COLUMN)
+        .with_columns(reason_code_expressions(plans))
+        .select(columns)
+    )
+    return result, stages
+
+
+def run_gated_lazy(
+    data: pl.DataFrame | pl.LazyFrame, plans: dict[str, RulePlan] | None = None
+) -> pl.LazyFrame:
+    """
+    Lazy ``run_gated`` for the streaming runner: the same columns and values,
+    built as one un-collected plan, so nothing is materialised per module.
+    A module's rules and outcome are only set for rows every earlier module
+    passed; other rows get null rule columns and a SKIPPED outcome. Polars
+    still evaluates each rule over the whole batch inside the projection, so
+    unlike ``run_gated`` this saves memory, not rule evaluations.
+    Args:
+        data (pl.DataFrame | pl.LazyFrame): Applicant data.
+        plans (dict[str, RulePlan] | None): Precompiled module plans, built when omitted.
+    Returns:
+        pl.LazyFrame: Un-collected plan with rule, outcome and decision columns.
+    """
+    plans = plans if plans is not None else module_plans()
+    pipeline = with_derived_features(data, plans)
+    reached = pl.lit(True)
+    for module, plan in plans.items():
+        outcome = module_outcome_column(module)
+        if plan.policy_rules:
+            pipeline = pipeline.with_columns(
+                pl.when(reached).then(policy_rule.outcome_expression()).alias(policy_rule.rule_id)
+                for policy_rule in plan.policy_rules
+            )
+        pipeline = pipeline.with_columns(
+            pl.when(reached)
+            .then(module_outcome_expression(module, plan))
+            .otherwise(pl.lit(SKIPPED))
+            .alias(outcome)
+        )
+        reached = reached & (pl.col(outcome) == "PASS")
+    return pipeline.with_columns(decision_expressions(plans))
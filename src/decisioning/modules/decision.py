@@ -0,0 +1,43 @@
+import polars as pl
+from decisioning.classes.PolicyRule import PolicyRule
+from decisioning.classes.RulePlan import RulePlan
+from decisioning.modules.features import feature_graph
+from decisioning.utility.profiler import PROFILER
+
+
+def decision_rules() -> list[PolicyRule]:
+    """
+    Collect the decision policy rules in evaluation order.
+    Returns:
+        list[PolicyRule]: Decision rules.
+    """
+    rules: list[PolicyRule] = []
+
+    # ********** END OF DECISION POLICY RULES **********
+
+    return rules
+
+
+def decision_plan() -> RulePlan:
+    """
+    Compile the decision rules into a single fused plan.
+    Returns:
+        RulePlan: Plan evaluating every decision rule in one projection.
+    """
+    return RulePlan(decision_rules())
+
+
+def check_decision(pl_input_df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Check applicants against the decision policy rules.
+    Args:
+        pl_input_df (pl.DataFrame): Input DataFrame containing applicant data.
+    Returns:
+        pl.DataFrame: DataFrame with decision results.
+    """
+    plan = decision_plan()
+    # Derived features the rules read are resolved before profiling and evaluation.
+    data = feature_graph().lazy(pl_input_df, plan.input_columns).collect()
+    if PROFILER.enabled:
+        PROFILER.profile_module("decision", plan, data)
+    return plan.execute(data)
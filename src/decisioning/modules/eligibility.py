@@ -1,17 +1,18 @@
 import polars as pl
 from decisioning.classes.PolicyRule import PolicyRule
-from decisioning.classes.ApplyRule import ApplyRule
+from decisioning.classes.RulePlan import RulePlan
+from decisioning.modules.features import feature_graph
+from decisioning.utility.profiler import PROFILER
 from decisioning.policy_rules.eligibility_rules import d1001
 
 
-def check_eligibility(pl_input_df: pl.DataFrame) -> pl.DataFrame:
+def eligibility_rules() -> list[PolicyRule]:
     """
-    Check eligibility of applicants based on predefined policy rules.
-    Args:
-        pl_input_df (pl.DataFrame): Input DataFrame containing applicant data.
+    Collect the eligibility policy rules in evaluation order.
     Returns:
-        pl.DataFrame: DataFrame with eligibility results.
+        list[PolicyRule]: Eligibility rules.
     """
+    rules: list[PolicyRule] = []
 
     # *****************************************************
     # *********************** D1001 ***********************
@@ -19,14 +20,11 @@ def check_eligibility(pl_input_df: pl.DataFrame) -> pl.DataFrame:
     """
     D1001: Check if age is 18 or older
     This rule checks if the applicant's age is 18 or older.
-    If the condition is met, the rule marks the applicant as eligible ("Y"),
-    otherwise as not eligible ("N").
+    If the condition is met, the rule marks the applicant as eligible (True),
+    otherwise as not eligible (False).
     """
 
-    eligibility_df: pl.DataFrame = ApplyRule(
-        policy_rule=d1001(),
-        data_frame=pl_input_df,
-    ).execute_rule()
+    rules.append(d1001())
 
     # *****************************************************
     # *********************** D1002 ***********************
@@ -34,10 +32,35 @@ def check_eligibility(pl_input_df: pl.DataFrame) -> pl.DataFrame:
     """
     D1002: Check if requested loan amount is within supported bounds
     This rule checks if the requested loan amount is between $1,000 and $50,000.
-    If the condition is met, the rule marks the applicant as eligible ("Y"),
-    otherwise as not eligible ("N").
+    If the condition is met, the rule marks the applicant as eligible (True),
+    otherwise as not eligible (False).
     """
 
     # ********** END OF ELIGIBILITY POLICY RULES **********
 
-    return eligibility_df
+    return rules
+
+
+def eligibility_plan() -> RulePlan:
+    """
+    Compile the eligibility rules into a single fused plan.
+    Returns:
+        RulePlan: Plan evaluating every eligibility rule in one projection.
+    """
+    return RulePlan(eligibility_rules())
+
+
+def check_eligibility(pl_input_df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Check eligibility of applicants based on predefined policy rules.
+    Args:
+        pl_input_df (pl.DataFrame): Input DataFrame containing applicant data.
+    Returns:
+        pl.DataFrame: DataFrame with eligibility results.
+    """
+    plan = eligibility_plan()
+    # Derived features the rules read are resolved before profiling and evaluation.
+    data = feature_graph().lazy(pl_input_df, plan.input_columns).collect()
+    if PROFILER.enabled:
+        PROFILER.profile_module("eligibility", plan, data)
+    return plan.execute(data)
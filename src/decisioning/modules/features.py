@@ -0,0 +1,54 @@
+from decisioning.classes.DerivedFeature import DerivedFeature
+from decisioning.classes.FeatureGraph import FeatureGraph
+from decisioning.policy_rules.derived_features import (
+    debt_service_ratio,
+    months_remaining_on_visa,
+    net_surplus_monthly,
+    repayment_at_stress_rate,
+    stressed_net_surplus_monthly,
+)
+
+
+def derived_features() -> list[DerivedFeature]:
+    """
+    Collect the derived features shared by every pipeline module.
+    Rules read a feature by listing its name in their ``view``; for now only
+    the feature benchmark's DEMO_RULES do.
+    Returns:
+        list[DerivedFeature]: Derived features, in any order.
+    """
+    features: list[DerivedFeature] = []
+
+    # *****************************************************
+    # ************* months_remaining_on_visa **************
+    # *****************************************************
+    features.append(months_remaining_on_visa())
+
+    # *****************************************************
+    # ******************** net_surplus ********************
+    # *****************************************************
+    features.append(net_surplus_monthly())
+
+    # *****************************************************
+    # **************** debt_service_ratio *****************
+    # *****************************************************
+    features.append(debt_service_ratio())
+
+    # *****************************************************
+    # ***************** stress_repayment ******************
+    # *****************************************************
+    features.append(repayment_at_stress_rate())
+    features.append(stressed_net_surplus_monthly())
+
+    # ************* END OF DERIVED FEATURES ***************
+
+    return features
+
+
+def feature_graph() -> FeatureGraph:
+    """
+    Order the derived features by their dependencies.
+    Returns:
+        FeatureGraph: Graph resolving every derived feature once per batch.
+    """
+    return FeatureGraph(derived_features())
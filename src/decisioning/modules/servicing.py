@@ -0,0 +1,43 @@
+import polars as pl
+from decisioning.classes.PolicyRule import PolicyRule
+from decisioning.classes.RulePlan import RulePlan
+from decisioning.modules.features import feature_graph
+from decisioning.utility.profiler import PROFILER
+
+
+def servicing_rules() -> list[PolicyRule]:
+    """
+    Collect the servicing policy rules in evaluation order.
+    Returns:
+        list[PolicyRule]: Servicing rules.
+    """
+    rules: list[PolicyRule] = []
+
+    # ********** END OF SERVICING POLICY RULES **********
+
+    return rules
+
+
+def servicing_plan() -> RulePlan:
+    """
+    Compile the servicing rules into a single fused plan.
+    Returns:
+        RulePlan: Plan evaluating every servicing rule in one projection.
+    """
+    return RulePlan(servicing_rules())
+
+
+def check_servicing(pl_input_df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Check applicants against the servicing policy rules.
+    Args:
+        pl_input_df (pl.DataFrame): Input DataFrame containing applicant data.
+    Returns:
+        pl.DataFrame: DataFrame with servicing results.
+    """
+    plan = servicing_plan()
+    # Derived features the rules read are resolved before profiling and evaluation.
+    data = feature_graph().lazy(pl_input_df, plan.input_columns).collect()
+    if PROFILER.enabled:
+        PROFILER.profile_module("servicing", plan, data)
+    return plan.execute(data)
@@ -0,0 +1,135 @@
+import polars as pl
+from decisioning.classes.DerivedFeature import DerivedFeature
+
+
+def _months_between(start: pl.Expr, end: pl.Expr) -> pl.Expr:
+    """Whole calendar months from ``start`` to ``end``."""
+    return (
+        (end.dt.year() - start.dt.year()) * 12
+        + end.dt.month().cast(pl.Int32)
+        - start.dt.month().cast(pl.Int32)
+        - (end.dt.day() < start.dt.day()).cast(pl.Int32)
+    )
+
+
+def months_remaining_on_visa() -> DerivedFeature:
+    """
+    months_remaining_on_visa: Whole months from the assessment date to visa expiry
+
+    The months_remaining_on_visa input of D912 in decline_rules_explained.csv;
+    no pipeline rule reads it yet.
+    """
+
+    feature_exprs: pl.Expr = _months_between(
+        pl.col("assessmentDate").cast(pl.Date), pl.col("visaExpiryDate").cast(pl.Date)
+    ).cast(pl.Int64)
+    feature_view: list[str] = ["assessmentDate", "visaExpiryDate"]
+    feature_description: str = "Whole months from the assessment date to visa expiry"
+    feature_name: str = "monthsRemainingOnVisa"
+    feature_version: str = "2026-01-01"
+
+    return DerivedFeature(
+        feature_name, feature_description, feature_exprs, feature_view, feature_version
+    )
+
+
+def net_surplus_monthly() -> DerivedFeature:
+    """
+    net_surplus: Income left after expenses, liabilities and the proposed repayment
+
+    The net_surplus input of D4001 in decline_rules_explained.csv; no pipeline
+    rule reads it yet.
+    """
+
+    feature_exprs: pl.Expr = (
+        pl.col("netMonthlyIncome")
+        - pl.col("livingExpensesUsed")
+        - pl.col("monthlyLiabilitiesVerified")
+        - pl.col("proposedRepayment")
+    )
+    feature_view: list[str] = [
+        "netMonthlyIncome",
+        "livingExpensesUsed",
+        "monthlyLiabilitiesVerified",
+        "proposedRepayment",
+    ]
+    feature_description: str = (
+        "Net monthly income minus living expenses, liabilities and the proposed repayment"
+    )
+    feature_name: str = "netSurplusMonthly"
+    feature_version: str = "2026-01-01"
+
+    return DerivedFeature(
+        feature_name, feature_description, feature_exprs, feature_view, feature_version
+    )
+
+
+def debt_service_ratio() -> DerivedFeature:
+    """
+    debt_service_ratio: Share of net income committed to liabilities and the new repayment
+    """
+
+    feature_exprs: pl.Expr = (
+        pl.col("monthlyLiabilitiesVerified") + pl.col("proposedRepayment")
+    ) / pl.col("netMonthlyIncome")
+    feature_view: list[str] = [
+        "monthlyLiabilitiesVerified",
+        "proposedRepayment",
+        "netMonthlyIncome",
+    ]
+    feature_description: str = (
+        "Verified liabilities plus the proposed repayment over net monthly income"
+    )
+    feature_name: str = "debtServiceRatio"
+    feature_version: str = "2026-01-01"
+
+    return DerivedFeature(
+        feature_name, feature_description, feature_exprs, feature_view, feature_version
+    )
+
+
+def repayment_at_stress_rate() -> DerivedFeature:
+    """
+    stress_repayment: Monthly repayment of the requested amount at the APR plus
+    the serviceability buffer, over the requested term
+    """
+
+    monthly_rate = (pl.col("interestRateApr") + pl.col("serviceabilityBufferApplied")) / 12
+    growth = (1 + monthly_rate).pow(pl.col("requestedTenureMonths"))
+    feature_exprs: pl.Expr = (
+        pl.col("requestedLoanAmount") * monthly_rate * growth / (growth - 1)
+    ).round(2)
+    feature_view: list[str] = [
+        "requestedLoanAmount",
+        "interestRateApr",
+        "serviceabilityBufferApplied",
+        "requestedTenureMonths",
+    ]
+    feature_description: str = (
+        "Amortised monthly repayment at the APR plus the serviceability buffer"
+    )
+    feature_name: str = "repaymentAtStressRate"
+    feature_version: str = "2026-01-01"
+
+    return DerivedFeature(
+        feature_name, feature_description, feature_exprs, feature_view, feature_version
+    )
+
+
+def stressed_net_surplus_monthly() -> DerivedFeature:
+    """
+    stressed_net_surplus: Net surplus with the proposed repayment replaced by
+    the repayment at the stress rate
+    """
+
+    feature_exprs: pl.Expr = (
+        pl.col("netSurplusMonthly") + pl.col("proposedRepayment") - pl.col("repaymentAtStressRate")
+    )
+    feature_view: list[str] = ["netSurplusMonthly", "proposedRepayment", "repaymentAtStressRate"]
+    feature_description: str = "Net surplus after the repayment at the stress rate"
+    feature_name: str = "stressedNetSurplusMonthly"
+    feature_version: str = "2026-01-01"
+
+    return DerivedFeature(
+        feature_name, feature_description, feature_exprs, feature_view, feature_version
+    )
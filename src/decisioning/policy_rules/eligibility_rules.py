@@ -9,9 +9,10 @@ def d1001() -> PolicyRule:
     """
 
     # D1001: Check if age is 18 or older
-    rule_exprs:pl.Expr = pl.when(pl.col("age") >= 18) 
-    rule_view:list[str] = ["application_id",'age']
+    rule_exprs:pl.Expr = pl.col("applicantAge") >= 18
+    rule_view:list[str] = ["applicationId", "applicantAge"]
     rule_description:str = "D1001: Check if age is 18 or older"
     rule_id = "D1001"
+    rule_version:str = "2026-01-01"
 
-    return PolicyRule(rule_id, rule_description, rule_exprs, rule_view)
\ No newline at end of file
+    return PolicyRule(rule_id, rule_description, rule_exprs, rule_view, rule_version)
\ No newline at end of file
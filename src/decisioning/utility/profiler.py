@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from collections import deque
+
+import polars as pl
+
+
+# Number of recent per-batch records kept in the report.
+_RECENT_BATCHES = 100
+
+
+class RuleProfiler:
+    """
+    Opt-in per-rule cost and selectivity instrumentation.
+
+    When enabled, module entry points report every batch they evaluate: rows
+    per module and, for each rule, its evaluation time and Y/N counts. Rule
+    timings are taken by evaluating each rule on its own, so they reflect the
+    rule's cost rather than its share of a fused projection. When disabled,
+    callers only pay for reading ``enabled``.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._modules: dict[str, dict] = {}
+            self._rules: dict[str, dict] = {}
+            self._batches: deque[dict] = deque(maxlen=_RECENT_BATCHES)
+
+    def record_rule(self, module: str, rule_id: str, rows: int, passed: int, elapsed_ns: int) -> None:
+        with self._lock:
+            stats = self._rules.setdefault(
+                rule_id,
+                {"module": module, "evaluations": 0, "rows": 0, "Y": 0, "N": 0, "elapsedNs": 0},
+            )
+            stats["evaluations"] += 1
+            stats["rows"] += rows
+            stats["Y"] += passed
+            stats["N"] += rows - passed
+            stats["elapsedNs"] += elapsed_ns
+
+    def record_module(self, module: str, rows: int) -> None:
+        with self._lock:
+            stats = self._modules.setdefault(module, {"batches": 0, "rows": 0})
+            stats["batches"] += 1
+            stats["rows"] += rows
+
+    def profile_module(self, module: str, plan, data: pl.DataFrame) -> None:
+        """
+        Evaluate each rule of ``plan`` over ``data`` on its own and record it.
+        Args:
+            module (str): Module name.
+            plan (RulePlan): The module's compiled plan.
+            data (pl.DataFrame): The rows the module evaluated in this batch.
+        """
+        self.record_module(module, data.height)
+        batch_rules = []
+        for policy_rule in plan.policy_rules:
+            started = time.perf_counter_ns()
+            outcome = data.select(policy_rule.outcome_expression()).to_series()
+            elapsed_ns = time.perf_counter_ns() - started
+            passed = int(outcome.sum())
+            self.record_rule(module, policy_rule.rule_id, data.height, passed, elapsed_ns)
+            batch_rules.append(
+                {
+                    "ruleId": policy_rule.rule_id,
+                    "Y": passed,
+                    "N": data.height - passed,
+                    "elapsedMs": round(elapsed_ns / 1e6, 4),
+                }
+            )
+        with self._lock:
+            self._batches.append({"module": module, "rows": data.height, "rules": batch_rules})
+
+    def report(self) -> dict:
+        """Cumulative per-module and per-rule statistics plus the most recent batches."""
+        with self._lock:
+            rules = {}
+            for rule_id, stats in self._rules.items():
+                rows = stats["rows"]
+                rules[rule_id] = {
+                    "module": stats["module"],
+                    "evaluations": stats["evaluations"],
+                    "rows": rows,
+                    "Y": stats["Y"],
+                    "N": stats["N"],
+                    # Share of evaluated rows the rule failed (declined).
+                    "selectivity": round(stats["N"] / rows, 4) if rows else None,
+                    "totalMs": round(stats["elapsedNs"] / 1e6, 3),
+                    "nsPerRow": round(stats["elapsedNs"] / rows, 1) if rows else None,
+                }
+            return {
+                "enabled": self.enabled,
+                "modules": {module: dict(stats) for module, stats in self._modules.items()},
+                "rules": rules,
+                "recentBatches": list(self._batches),
+            }
+
+
+PROFILER = RuleProfiler(enabled=os.getenv("DECISIONING_PROFILE", "0").lower() in ("1", "true", "yes"))
@@ -0,0 +1,163 @@
+import argparse
+import logging
+import time
+from pathlib import Path
+
+import polars as pl
+
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_FILE = (
+    Path(__file__).resolve().parents[3] / "data" / "sample_application_outcomes_realistic_complete.csv"
+)
+ROW_COLUMN = "_row"
+
+# Hash values are reduced to this many buckets to build uniform [0, 1) draws.
+_UNIFORM_BUCKETS = 1_000_003
+
+
+def _uniform(seed: int) -> pl.Expr:
+    """Seeded uniform [0, 1) draw per row, derived from the row number."""
+    return (pl.col(ROW_COLUMN).hash(seed=seed) % _UNIFORM_BUCKETS) / _UNIFORM_BUCKETS
+
+
+def _prefixed_id(prefix: str, offset: int = 0) -> pl.Expr:
+    return pl.lit(prefix) + (pl.col(ROW_COLUMN) + offset).cast(pl.String)
+
+
+# Columns whose realism matters to the rules or to lookups get explicit generators.
+_OVERRIDES = {
+    "applicationId": lambda seed: _prefixed_id("APP_", 1),
+    "decisionId": lambda seed: _prefixed_id("DEC_", 1),
+    "customerId": lambda seed: _prefixed_id("CUST_", 1_000_000),
+    "inputDataHash": lambda seed: pl.col(ROW_COLUMN).hash(seed=seed).cast(pl.String),
+    # Roughly 3% of applicants fall below the minimum age of 18.
+    "applicantAge": lambda seed: (16 + _uniform(seed) * 60).floor().cast(pl.Int64),
+    "requestedLoanAmount": lambda seed: (500 + _uniform(seed) * 60_000).round(2),
+    "netMonthlyIncome": lambda seed: (1_500 + _uniform(seed) * 9_000).round(2),
+    "monthsRemainingOnVisa": lambda seed: (_uniform(seed) * 48).floor().cast(pl.Int64),
+}
+
+
+def template_columns(template: str | Path = TEMPLATE_FILE) -> list[dict]:
+    """
+    Describe every column of the outcomes schema from the sample file.
+    Args:
+        template (str | Path): Sample CSV whose columns and value ranges are copied.
+    Returns:
+        list[dict]: One entry per column with its dtype, numeric range and observed values.
+    """
+    sample = pl.read_csv(template, infer_schema_length=None)
+    columns = []
+    for name, dtype in sample.schema.items():
+        series = sample.get_column(name).drop_nulls()
+        column = {"name": name, "dtype": dtype, "values": series.unique(maintain_order=True).to_list()}
+        if dtype.is_numeric() and series.len():
+            column["min"], column["max"] = series.min(), series.max()
+        columns.append(column)
+    return columns
+
+
+def _column_expression(column: dict, seed: int) -> pl.Expr:
+    name, dtype = column["name"], column["dtype"]
+    if name in _OVERRIDES:
+        return _OVERRIDES[name](seed).alias(name)
+
+    draw = _uniform(seed)
+    if dtype == pl.Boolean:
+        return (draw < 0.5).alias(name)
+    if dtype.is_numeric() and "min" in column:
+        low, high = column["min"], column["max"]
+        # Widen the sampled range a little so synthetic data is not clamped to five rows.
+        spread = (high - low) or max(abs(high), 1)
+        value = (low - 0.25 * spread) + draw * 1.5 * spread
+        if dtype.is_integer():
+            return value.round(0).clip(lower_bound=0 if low >= 0 else None).cast(dtype).alias(name)
+        return value.round(4).alias(name)
+    if column["values"]:
+        values = column["values"]
+        index = pl.col(ROW_COLUMN).hash(seed=seed) % len(values)
+        return index.replace_strict(
+            dict(enumerate(values)), return_dtype=dtype if dtype != pl.Null else pl.String
+        ).alias(name)
+    return pl.lit(None, dtype=pl.String).alias(name)
+
+
+def generate_applications(
+    rows: int,
+    seed: int = 42,
+    columns: int | None = None,
+    template: str | Path = TEMPLATE_FILE,
+) -> pl.LazyFrame:
+    """
+    Lazily generate seeded synthetic applications in the outcomes schema.
+    Every value is a pure function of (seed, row number, column), so the same
+    arguments always produce the same data for a given Polars version, and
+    the frame can be streamed in any chunking.
+    Args:
+        rows (int): Number of applications.
+        seed (int): Generator seed.
+        columns (int | None): Keep only the first ``columns`` schema columns.
+        template (str | Path): Sample CSV providing the schema and value ranges.
+    Returns:
+        pl.LazyFrame: Synthetic applications.
+    """
+    schema = template_columns(template)
+    if columns is not None:
+        schema = schema[:columns]
+    expressions = [
+        _column_expression(column, seed * 100_003 + position)
+        for position, column in enumerate(schema)
+    ]
+    return (
+        pl.LazyFrame()
+        .select(pl.int_range(0, rows, dtype=pl.UInt64).alias(ROW_COLUMN))
+        .select(expressions)
+    )
+
+
+def write_synthetic(
+    path: str | Path, rows: int, seed: int = 42, columns: int | None = None
+) -> Path:
+    """
+    Stream synthetic applications to a Parquet (or CSV) file with bounded memory.
+    Args:
+        path (str | Path): Output file; ``.csv`` writes CSV, anything else Parquet.
+        rows (int): Number of applications.
+        seed (int): Generator seed.
+        columns (int | None): Keep only the first ``columns`` schema columns.
+    Returns:
+        Path: The written file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    frame = generate_applications(rows, seed, columns)
+    if path.suffix.lower() == ".csv":
+        frame.sink_csv(path, engine="streaming")
+    else:
+        frame.sink_parquet(path, engine="streaming")
+    logger.info(
+        "Synthetic applications written rows=%d path=%s elapsed=%.2fs",
+        rows,
+        path,
+        time.perf_counter() - started,
+    )
+    return path
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic applications.")
+    parser.add_argument("output", help="Output .parquet or .csv file")
+    parser.add_argument("--rows", type=int, default=10_000, help="Number of applications")
+    parser.add_argument("--seed", type=int, default=42, help="Generator seed")
+    parser.add_argument("--columns", type=int, default=None, help="Keep only the first N columns")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    write_synthetic(args.output, args.rows, args.seed, args.columns)
+
+
+if __name__ == "__main__":
+    main()
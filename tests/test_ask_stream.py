@@ -0,0 +1,13 @@
+from fastapi.testclient import TestClient
+
+
+def test_failed_stream_ends_with_an_error_event(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "unsupported")
+    monkeypatch.setenv("DECISION_CACHE_PATH", "")
+    monkeypatch.setenv("DECISION_AUDIT_PATH", "")
+    from app.main import app
+
+    with TestClient(app) as client:
+        body = client.get("/ask/stream", params={"q": "What is a serviceability buffer?"}).text
+    assert "event: error" in body
+    assert "event: done" not in body
@@ -0,0 +1,26 @@
+import json
+
+import polars as pl
+
+from app.llm import context_projection
+from app.llm.tools.application_record_lookup_tool import DATA_FILE
+
+
+def test_measure_cli_runs_outside_a_chat_session(capsys):
+    context_projection.main(["--limit", "3"])
+    report = json.loads(capsys.readouterr().out)["context"]
+    assert report["full"]["records"] == 3
+    assert report["projected"]["meanTokens"] <= report["full"]["meanTokens"]
+
+
+def test_measure_cli_looks_records_up_in_the_given_csv(tmp_path, capsys):
+    # Ids the served index does not have; not-found contexts are under 2k tokens.
+    source = tmp_path / "applications.csv"
+    pl.read_csv(DATA_FILE, infer_schema_length=0).head(2).with_columns(
+        pl.format("APP_9{}", pl.int_range(pl.len())).alias("applicationId")
+    ).write_csv(source)
+
+    context_projection.main(["--csv", str(source), "--limit", "2"])
+    report = json.loads(capsys.readouterr().out)["context"]
+    assert report["full"]["records"] == 2
+    assert report["full"]["meanTokens"] > 10_000
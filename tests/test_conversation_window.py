@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+
+from app.llm.conversation_window import CONVERSATION_HEADER, ConversationWindow
+from app.llm.tools import application_record_lookup_tool
+
+
+def test_application_context_goes_into_the_stable_prefix(monkeypatch):
+    monkeypatch.setattr(
+        application_record_lookup_tool,
+        "lookup_application_record",
+        lambda app_id, index=None: f'{{"applicationId": "{app_id}"}}',
+    )
+    window = ConversationWindow("SYSTEM PROMPT")
+    history = [{"role": "user", "content": "Why was APP_1 declined?"}]
+
+    prompt = application_record_lookup_tool.apply_application_lookup(
+        window.build_prompt(history), "APP_1"
+    )
+
+    assert prompt.startswith("SYSTEM PROMPT\n")
+    context_at = prompt.index("ToolResult(application_record_lookup):")
+    assert context_at < prompt.index(CONVERSATION_HEADER) < prompt.index("User: Why was APP_1")
+    # A follow-up turn keeps the whole prefix, context included.
+    history += [
+        {"role": "assistant", "content": "APP_1 failed D1001."},
+        {"role": "user", "content": "What can they do about it?"},
+    ]
+    follow_up = application_record_lookup_tool.apply_application_lookup(
+        window.build_prompt(history), "APP_1"
+    )
+    prefix_end = prompt.index("User:")
+    assert follow_up[:prefix_end] == prompt[:prefix_end]
+
+
+def test_ask_builds_prompts_from_the_session_history(monkeypatch):
+    monkeypatch.setenv("DECISION_CACHE_PATH", "")
+    monkeypatch.setenv("DECISION_AUDIT_PATH", "")
+    from app import main
+
+    prompts = []
+
+    async def fake_generate(prompt, user_input, session_id):
+        prompts.append(prompt)
+        return f"answer {len(prompts)}"
+
+    monkeypatch.setattr(main, "generate_async", fake_generate)
+    headers = {"X-Session-Id": "window-test"}
+    with TestClient(main.app) as client:
+        client.get("/ask", params={"q": "first question"}, headers=headers)
+        client.get("/ask", params={"q": "second question"}, headers=headers)
+        client.get("/ask", params={"q": "one-off question"})
+
+    assert prompts[0].startswith(main.CONVERSATION_WINDOW.system_prompt)
+    assert "User: first question\nAssistant: answer 1\nUser: second question" in prompts[1]
+    assert "first question" not in prompts[2]
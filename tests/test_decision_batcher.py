@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import pytest
+
+from app.decision_batcher import DecisionBatcher
+
+
+def _decide(applications: list[dict]) -> list[dict]:
+    return [{"applicationId": application["applicationId"]} for application in applications]
+
+
+def test_restarted_worker_serves_requests_queued_before_it_died():
+    async def scenario():
+        batcher = DecisionBatcher(_decide, window_ms=1)
+        await batcher.submit({"applicationId": "APP_1"})
+        batcher._worker.cancel()
+        await asyncio.sleep(0)
+        # Queued while no worker was running.
+        stranded = asyncio.get_running_loop().create_future()
+        await batcher._queue.put(({"applicationId": "APP_2"}, stranded, time.perf_counter()))
+
+        result = await batcher.submit({"applicationId": "APP_3"})
+        assert result == {"applicationId": "APP_3"}
+        assert await asyncio.wait_for(stranded, 1) == {"applicationId": "APP_2"}
+        await batcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_unexpected_batch_error_fails_the_batch_and_keeps_the_worker():
+    calls = []
+
+    def decide(applications):
+        calls.append(len(applications))
+        return None if len(calls) == 1 else _decide(applications)
+
+    async def scenario():
+        batcher = DecisionBatcher(decide, window_ms=1)
+        with pytest.raises(TypeError):
+            await batcher.submit({"applicationId": "APP_1"})
+        worker = batcher._worker
+        assert await batcher.submit({"applicationId": "APP_2"}) == {"applicationId": "APP_2"}
+        assert batcher._worker is worker
+        await batcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_close_fails_pending_requests():
+    def decide(applications):
+        time.sleep(0.2)
+        return _decide(applications)
+
+    async def scenario():
+        batcher = DecisionBatcher(decide, window_ms=1, max_batch_size=1)
+        requests = [
+            asyncio.create_task(batcher.submit({"applicationId": f"APP_{n}"})) for n in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        await batcher.close()
+        results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 1)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    asyncio.run(scenario())
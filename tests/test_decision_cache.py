@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from app.decision_cache import DecisionCache, parse_versions_used
+from decisioning.module_calls.features_call import demo_plans
+from decisioning.modules.complete import module_plans, module_versions, rule_versions
+
+
+def test_module_versions_use_the_stored_decision_form():
+    assert module_versions(module_plans()) == {"eligibility": "2026-01-01"}
+    # Modules without rules report nothing; feature versions count for the rules reading them.
+    assert set(module_versions(demo_plans(shared=True))) == {
+        "eligibility",
+        "bureau",
+        "servicing",
+        "decision",
+    }
+
+
+def test_decisions_carry_module_and_model_versions():
+    plans = module_plans()
+    cache = DecisionCache(
+        rule_versions(plans),
+        model_versions=parse_versions_used("scorecard@v3.2, pd_model@v1.8"),
+        module_versions=module_versions(plans),
+    )
+
+    async def decide(application):
+        return {"finalDecision": "APPROVED"}
+
+    decision = asyncio.run(cache.get_or_decide({"applicantAge": 30}, decide))
+    assert decision["ruleVersionsUsed"] == ["eligibility@2026-01-01"]
+    assert decision["modelVersionsUsed"] == ["pd_model@v1.8", "scorecard@v3.2"]
+
+
+def test_any_rule_bump_changes_the_version_key():
+    versions = {"D1001": "2026-01-01", "D1002": "2026-03-01"}
+    modules = {"eligibility": "2026-03-01"}
+    before = DecisionCache(versions, module_versions=modules)
+    after = DecisionCache({**versions, "D1001": "2026-02-01"}, module_versions=modules)
+    assert before.rule_versions_used == after.rule_versions_used
+    assert before.version_key != after.version_key
+
+
+def test_malformed_model_versions_are_rejected():
+    with pytest.raises(ValueError):
+        parse_versions_used("scorecard")
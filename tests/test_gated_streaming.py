@@ -0,0 +1,33 @@
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from decisioning.module_calls import complete_call
+from decisioning.module_calls.features_call import demo_plans
+from decisioning.modules.complete import run_gated, run_gated_lazy
+from decisioning.utility.synthetic import generate_applications
+
+
+def _applications(rows: int = 2_000) -> pl.DataFrame:
+    return generate_applications(rows, seed=7).collect()
+
+
+def test_lazy_gated_run_matches_the_eager_one():
+    plans = demo_plans(shared=True)
+    applications = _applications()
+    eager, _ = run_gated(applications, plans)
+    lazy = run_gated_lazy(applications.lazy(), plans).collect()
+    assert_frame_equal(lazy.select(eager.columns), eager)
+
+
+def test_gated_streaming_batch_reports_module_stages(tmp_path, monkeypatch):
+    plans = demo_plans(shared=True)
+    applications = _applications()
+    source = tmp_path / "applications.parquet"
+    applications.write_parquet(source)
+    monkeypatch.setattr(complete_call, "module_plans", lambda: plans)
+
+    report = complete_call.run_streaming_batch(source, tmp_path / "decisions", gated=True)
+
+    _, stages = run_gated(applications, plans)
+    assert report["stages"] == stages
+    assert report["rows"] == applications.height
@@ -0,0 +1,31 @@
+import pytest
+
+from app.llm.agents.intent_router import evaluate_router, route_intent
+
+
+def test_labelled_set():
+    report = evaluate_router()
+    assert report["mismatches"] == []
+    assert report["localAccuracy"] == 1.0
+    assert report["escalationRate"] <= 0.10
+
+
+@pytest.mark.parametrize(
+    "message, last_application_id, expected",
+    [
+        ("why was APP_42 declined?", None, "APP_42"),
+        ("application #3310 status", None, "APP_3310"),
+        ("why did it get declined", "APP_1001", "APP_1001"),
+        ("is it possible to borrow more next year?", "APP_1001", None),
+        ("loan application 50,000 over 5 years", None, None),
+        ("I applied back in 2024, what is the minimum age?", None, None),
+    ],
+)
+def test_route_intent(message, last_application_id, expected):
+    routed = route_intent(message, last_application_id)
+    assert not routed["escalate"]
+    assert routed["applicationId"] == expected
+
+
+def test_unexplained_number_is_escalated():
+    assert route_intent("4432")["escalate"]
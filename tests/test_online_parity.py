@@ -0,0 +1,44 @@
+import polars as pl
+import pytest
+
+from decisioning.classes.InvalidApplicationError import InvalidApplicationError
+from decisioning.classes.OnlineEngine import OnlineEngine
+from decisioning.module_calls.features_call import demo_plans
+from decisioning.modules.complete import fact_columns, module_plans
+from decisioning.modules.features import feature_graph
+from decisioning.utility.synthetic import generate_applications
+
+
+def _applications(plans, rows: int = 1_000) -> pl.DataFrame:
+    return generate_applications(rows, seed=7).select(fact_columns(plans)).collect()
+
+
+def test_pipeline_rules_match_the_batch_pipeline():
+    plans = module_plans()
+    assert OnlineEngine(plans).parity_mismatches(_applications(plans)) == []
+
+
+def test_derived_feature_rules_match_the_batch_pipeline():
+    plans = demo_plans(shared=True)
+    applications = _applications(plans)
+    # Half the rows lose their supplied feature values, so both paths compute them.
+    supplied = [name for name in feature_graph().features if name in applications.columns]
+    applications = applications.with_columns(
+        pl.when(pl.int_range(pl.len()) % 2 == 0).then(pl.col(name)).alias(name)
+        for name in supplied
+    )
+    assert OnlineEngine(plans).parity_mismatches(applications) == []
+
+
+def test_numeric_strings_are_coerced():
+    engine = OnlineEngine()
+    application = engine.validate({"applicationId": "APP_1", "applicantAge": "30"})
+    assert application["applicantAge"] == 30
+    assert engine.decide(application)["finalDecision"] == "APPROVED"
+
+
+@pytest.mark.parametrize("value", ["abc", [30], True])
+def test_values_of_the_wrong_type_are_rejected(value):
+    with pytest.raises(InvalidApplicationError) as raised:
+        OnlineEngine().validate({"applicationId": "APP_1", "applicantAge": value})
+    assert raised.value.errors[0]["field"] == "applicantAge"
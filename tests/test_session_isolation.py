@@ -0,0 +1,35 @@
+import pytest
+
+from app.llm.tools.application_record_lookup_tool import (
+    _set_last_application_context,
+    get_last_application_context,
+)
+from app.session_store import check_session_isolation, current_session_id, use_session
+
+
+def test_sessions_do_not_leak_between_threads_and_tasks():
+    report = check_session_isolation(
+        _set_last_application_context,
+        get_last_application_context,
+        sessions=16,
+        rounds=25,
+        workers=8,
+    )
+    assert report["threadChecks"] and report["taskChecks"]
+    assert report["threadLeaks"] == 0
+    assert report["taskLeaks"] == 0
+
+
+def test_no_session_is_bound_by_default():
+    with pytest.raises(RuntimeError):
+        current_session_id()
+
+
+def test_requests_without_a_session_id_get_a_fresh_session():
+    with use_session(None):
+        first = current_session_id()
+    with use_session(None):
+        second = current_session_id()
+    assert first != second
+    with use_session("chat-1"), use_session(None):
+        assert current_session_id() == "chat-1"